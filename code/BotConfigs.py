@@ -1,5 +1,7 @@
 # bot_configs.py
 
+from ValueIterationBot import ValueIterationConfig
+
 class QLearningConfig:
     def __init__(self, learning_rate=0.1, discount_factor=0.9):
         """
@@ -52,5 +54,41 @@ bot_configs = {
             'per_move_penalty': -1
         }
     },
+    "VectorizedQLearningBot": {
+        "class": QLearningConfig,
+        "params": {
+            "Learning Rate": "learning_rate",
+            "Discount Factor": "discount_factor",
+            "Parallel Mazes": "num_envs"
+        },
+        "rewards": {
+            'goal_reached': 1000,
+            'hit_wall': -100,
+            'revisit_optimal_path': -10,
+            'revisit_non_optimal_path': -15,
+            'move_in_optimal_path': 5,
+            'see_goal_new_location': 50,
+            'see_goal_revisit': 5,
+            'per_move_penalty': -1
+        }
+    },
+    "ValueIterationBot": {
+        "class": ValueIterationConfig,
+        "params": {
+            "Discount Factor": "discount_factor",
+            "Tolerance": "tolerance",
+            "Max Sweeps": "max_sweeps"
+        },
+        "rewards": {
+            'goal_reached': 1000,
+            'hit_wall': -100,
+            'revisit_optimal_path': -10,
+            'revisit_non_optimal_path': -15,
+            'move_in_optimal_path': 5,
+            'see_goal_new_location': 50,
+            'see_goal_revisit': 5,
+            'per_move_penalty': -1
+        }
+    },
     # Additional bot types can be added here in the future
 }
@@ -2,8 +2,11 @@ import os
 import pickle
 
 from QLearningBot import QLearningConfig
+from VectorizedQLearningBot import VectorizedQLearningConfig
+from ValueIterationBot import ValueIterationConfig
 from RewardSystem import RewardConfig
 from BotStatistics import BotStatistics
+from EpisodeLog import EpisodeLog
 
 
 
@@ -34,7 +37,7 @@ class BotProfile:
         """
         config_data = self.config.__dict__ if hasattr(self.config, '__dict__') else self.config
         reward_config_data = self.reward_config.__dict__ if hasattr(self.reward_config, '__dict__') else self.reward_config
-        statistics_data = self.statistics.__dict__ if hasattr(self.statistics, '__dict__') else self.statistics
+        statistics_data = self.statistics.to_dict() if hasattr(self.statistics, 'to_dict') else self.statistics
         return {
             "name": self.name,
             "bot_type": self.bot_type,
@@ -54,6 +57,8 @@ class BotProfile:
         """        
         config_mapping = {
             'QLearningBot': QLearningConfig,
+            'VectorizedQLearningBot': VectorizedQLearningConfig,
+            'ValueIterationBot': ValueIterationConfig,
             # Add other bot types and their config classes here
         }
         config_class = config_mapping[data['bot_type']]#globals()[data['bot_type'] + "Config"]
@@ -67,8 +72,7 @@ class BotProfile:
             reward_config = RewardConfig(**reward_config)
         
         if isinstance(statistics, dict):
-            statistics = BotStatistics()
-            statistics.__dict__.update(data['statistics'])
+            statistics = BotStatistics.from_dict(statistics)
 
         return BotProfile(
             name=data['name'],
@@ -102,7 +106,7 @@ class ProfileManager:
             pickle.dump(profile.to_dict(), f)
 
         self._create_empty_file(os.path.join(profile_dir, "q_table.pkl"))
-        self._create_empty_file(os.path.join(profile_dir, "SimulationRewards.txt"))
+        EpisodeLog.create(os.path.join(profile_dir, "episodes.bin"))
         self._create_empty_file(os.path.join(profile_dir, "HeatmapData.txt"))
 
 
@@ -1,19 +1,165 @@
 import json
 import os
 import pickle
-from typing import Dict, Any, Tuple, Union
+import numpy as np
+from EpisodeLog import EpisodeLog
+from MazeSnapshot import MazeSnapshot
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, Tuple, Union
+
+# Zero-size visit grid that new statistics share until track_visits sizes theirs to a maze
+_EMPTY_GRID = np.zeros((0, 0), dtype=np.int32)
+_EMPTY_COUNTS = memoryview(_EMPTY_GRID.reshape(-1))
+
+
+class VisitedPositions(Mapping):
+    """
+    Read-only dict view of the visit grid of a BotStatistics: position -> visit count, iterated in
+    first-visit order like the dict it replaces. It stays valid across resets.
+    """
+
+    __slots__ = ('_statistics', '_counts', '_height', '_width')
+
+    def __init__(self, statistics: 'BotStatistics'):
+        self._statistics = statistics
+        self._bind()
+
+    def _bind(self) -> None:
+        """Pick up the grid of the statistics after it was (re)allocated; membership tests use it directly."""
+        statistics = self._statistics
+        self._counts, self._height, self._width = statistics._counts, statistics._height, statistics._width
+
+    def __getitem__(self, position: Tuple[int, int]) -> int:
+        count = self._statistics.visit_count(position)
+        if not count:
+            raise KeyError(position)
+        return count
+
+    def __contains__(self, position) -> bool:
+        x, y = position
+        return 0 <= x < self._height and 0 <= y < self._width and self._counts[x * self._width + y] > 0
+
+    def get(self, position, default=None):
+        count = self._statistics.visit_count(position)
+        return count if count else default
+
+    def __len__(self) -> int:
+        return self._statistics._visited_count
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return self.added_since(0)
+
+    def __reversed__(self) -> Iterator[Tuple[int, int]]:
+        statistics = self._statistics
+        return map(statistics._positions.__getitem__, reversed(statistics._order[:statistics._visited_count]))
+
+    def added_since(self, count: int) -> Iterator[Tuple[int, int]]:
+        """Iterate over the positions first visited after the first count positions."""
+        statistics = self._statistics
+        return map(statistics._positions.__getitem__, statistics._order[count:statistics._visited_count])
+
+    @property
+    def heatmap(self) -> np.ndarray:
+        """The dense (height, width) int32 visit counts."""
+        return self._statistics.visit_counts
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 
 class BotStatistics:
-    def __init__(self):
-        """Initialize statistics and visited positions."""
+    # Number of distinct recent positions kept by update_last_visited
+    RECENT_POSITIONS = 5
+
+    # Snapshot records of profiles being trained (absolute mazes.bin path -> records), shared by every
+    # BotStatistics in the process and written by flush_profile_data
+    _snapshot_records: Dict[str, Dict[str, Tuple[float, bytes]]] = {}
+    _unsaved_snapshots = set()
+
+    __slots__ = ('flush_interval', 'pending_times_hit_wall', 'total_steps', 'times_hit_wall', 'times_revisited_squares',
+                 'non_repeating_steps_taken', 'visited_positions', '_height', '_width', '_grid', '_counts', '_order',
+                 '_positions', '_visited_count', '_recent', '_recent_start', '_recent_length')
+
+    def __init__(self, flush_interval: int = 0):
+        """
+        Initialize statistics and visited positions.
+
+        Visit counts live in a preallocated int32 grid sized to the maze (see track_visits), with the
+        first-visit order of the positions in a second array, so recording a step allocates nothing.
+        visited_positions is a dict view of them for the state encoders, the GUI and the writers; like
+        the keys of a dict, the position tuples it returns are the ones first recorded, so state
+        keys built from them share those tuples.
+
+        :param flush_interval: Write buffered records to the episode log after this many episodes.
+                               0 writes every record as its episode ends.
+        """
+        self.flush_interval: int = flush_interval
+        self.pending_times_hit_wall: int = 0
         self.total_steps: int = 0
         self.times_hit_wall: int = 0
         self.times_revisited_squares: int = 0
         self.non_repeating_steps_taken: int = 0
-        self.visited_positions: Dict[Tuple[int, int], int] = {}
-        self.last_visited_positions: list[Tuple[int, int]] = []
+        self._height = self._width = 0
+        self._grid = _EMPTY_GRID
+        self._counts = self._order = _EMPTY_COUNTS
+        self._positions = []
+        self._visited_count = 0
+        self.visited_positions = VisitedPositions(self)
+        self._recent = [None] * self.RECENT_POSITIONS  # Ring buffer of recent positions; empty slots are None
+        self._recent_start = 0
+        self._recent_length = 0
+
+    def _allocate(self, shape: Tuple[int, int]) -> None:
+        """Allocate an empty visit grid; memoryviews of the arrays give fast scalar access."""
+        self._height, self._width = shape
+        self._grid = np.zeros(shape, dtype=np.int32)
+        self._counts = memoryview(self._grid.reshape(-1))
+        self._order = memoryview(np.zeros(self._grid.size, dtype=np.int32))
+        self._positions = [None] * self._grid.size  # Grid index -> position tuple, set on its first visit
+        self._visited_count = 0
+        self.visited_positions._bind()
 
+    def track_visits(self, shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Size the visit grid to a maze of the given (height, width) shape, keeping the visits inside it.
+
+        :return: The dense visit counts, which stay current as visits are recorded.
+        """
+        shape = tuple(shape)
+        if shape != (self._height, self._width):
+            visits = list(self.visited_positions.items())
+            self._allocate(shape)
+            for (x, y), count in visits:
+                if x < shape[0] and y < shape[1]:
+                    self._add_visits((x, y), count)
+        return self._grid
+
+    @property
+    def visit_counts(self) -> np.ndarray:
+        """The dense (height, width) int32 visit counts."""
+        return self._grid
+
+    def visit_count(self, position: Tuple[int, int]) -> int:
+        """Get the number of visits of a position."""
+        x, y = position
+        if 0 <= x < self._height and 0 <= y < self._width:
+            return self._counts[x * self._width + y]
+        return 0
+
+    def _add_visits(self, position: Tuple[int, int], count: int) -> None:
+        x, y = position
+        if x < 0 or y < 0:
+            raise ValueError(f"Invalid position: {position}")
+        if x >= self._height or y >= self._width:
+            # Outside the tracked maze: grow the grid to hold the position
+            self.track_visits((max(self._height, x + 1), max(self._width, y + 1)))
+        index = x * self._width + y
+        visits = self._counts[index]
+        if not visits:
+            self._order[self._visited_count] = index
+            self._positions[index] = position
+            self._visited_count += 1
+        self._counts[index] = visits + count
 
     def reset(self):
         """Reset statistics for a new episode."""
@@ -21,8 +167,43 @@ class BotStatistics:
         self.times_hit_wall = 0
         self.times_revisited_squares = 0
         self.non_repeating_steps_taken = 0
-        self.visited_positions.clear()
-        self.last_visited_positions.clear()
+        self._grid.fill(0)
+        self._visited_count = 0
+        self._recent[:] = [None] * self.RECENT_POSITIONS
+        self._recent_start = 0
+        self._recent_length = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the statistics as plain data, e.g. for saving them in a profile."""
+        return {
+            'flush_interval': self.flush_interval,
+            'pending_times_hit_wall': self.pending_times_hit_wall,
+            'total_steps': self.total_steps,
+            'times_hit_wall': self.times_hit_wall,
+            'times_revisited_squares': self.times_revisited_squares,
+            'non_repeating_steps_taken': self.non_repeating_steps_taken,
+            'visited_positions': dict(self.visited_positions),
+            'last_visited_positions': self.get_last_visited(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BotStatistics':
+        """Create statistics from to_dict data, or from the attribute dict of older profiles."""
+        statistics = cls.__new__(cls)
+        statistics.__setstate__(data)
+        return statistics
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state.get('flush_interval', 0))
+        for key in ('pending_times_hit_wall', 'total_steps', 'times_hit_wall', 'times_revisited_squares', 'non_repeating_steps_taken'):
+            setattr(self, key, state.get(key, 0))
+        for position, count in state.get('visited_positions', {}).items():
+            self._add_visits(tuple(position), count)
+        for position in state.get('last_visited_positions', []):
+            self.update_last_visited(tuple(position))
     
     @staticmethod
     def _ensure_dir_exists(dir_path: str) -> None:
@@ -61,12 +242,6 @@ class BotStatistics:
 
     def get_steps_from_heatmap(self, profile_name: str, heatmap_data: Dict[Tuple[int, int], int]) -> Tuple[int, int, int]:
         """Calculate total, repeated, and unique steps from heatmap data."""
-        data = self.get_json_data(profile_name, "mazes")
-        if data == "No data found":
-            return 0, 0, 0
-
-        heatmap_data = data["latest"]["heatmap_data"]
-
         # Number of different coordinates visited
         unique_steps = len(heatmap_data)
         total_steps = sum(heatmap_data.values())
@@ -74,64 +249,163 @@ class BotStatistics:
 
         return total_steps, repeated_steps, unique_steps
 
-    def update_steps_in_profile(self, profile_name: str, heatmap_data: Dict[Tuple[int, int], int]) -> None:
-        """Update the profile with steps information from heatmap data."""
-        total_steps, repeated_steps, unique_steps = self.get_steps_from_heatmap(profile_name, heatmap_data)
-        profile_data = self._read_file(self._get_file_path(profile_name, "profile", 'pkl'), 'pickle') or {}
+    def record_episode(self, profile_name: str, heatmap_data: Dict[Tuple[int, int], int], reward: float, duration: float = 0.0) -> None:
+        """
+        Log the metrics of a finished episode: one record in the profile's episode log, holding the
+        steps from the heatmap data and the wall hits counted since the last record.
+        """
+        total_steps, _, unique_steps = self.get_steps_from_heatmap(profile_name, heatmap_data)
+        self._episode_log(profile_name).append(reward, total_steps, unique_steps, self.pending_times_hit_wall, duration)
+        self.pending_times_hit_wall = 0
+
+    def log_episodes(self, profile_name: str, records: np.ndarray) -> None:
+        """Add episode records logged elsewhere (e.g. by training workers) to the profile's episode log."""
+        self._episode_log(profile_name).extend(records)
 
-        profile_data['non_repeating_steps_taken'] = profile_data.get('non_repeating_steps_taken', 0) + unique_steps
-        profile_data['total_steps'] = profile_data.get('total_steps', 0) + total_steps
-        profile_data['times_revisited_squares'] = profile_data.get('times_revisited_squares', 0) + repeated_steps
+    def _episode_log(self, profile_name: str) -> EpisodeLog:
+        """Get the writer of the profile's episode log, moving the rewards of older profiles into it first."""
+        log_path = self._get_file_path(profile_name, "episodes", "bin")
+        if not EpisodeLog.is_open(log_path):
+            records = EpisodeLog.read(log_path)
+            if records is None or not len(records):
+                EpisodeLog.open(log_path, self.flush_interval).extend(self._legacy_episode_records(profile_name))
+        return EpisodeLog.open(log_path, self.flush_interval)
 
-        self._write_file(self._get_file_path(profile_name, "profile", 'pkl'), profile_data, 'pickle')
+    def _legacy_episode_records(self, profile_name: str) -> np.ndarray:
+        """Convert the SimulationRewards.txt file of older profiles into episode records holding only the rewards."""
+        try:
+            with open(self._get_file_path(profile_name, "SimulationRewards", "txt")) as f:
+                rewards = [float(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            rewards = []
+        records = np.zeros(len(rewards), dtype=EpisodeLog.RECORD)
+        records['reward'] = rewards
+        return records
+
+    def load_episode_records(self, profile_name: str) -> np.ndarray:
+        """
+        Load every episode record of a profile, in episode order.
+        Older profiles without records in their episode log get their SimulationRewards.txt rewards.
+        """
+        records = EpisodeLog.read(self._get_file_path(profile_name, "episodes", "bin"))
+        if records is None or not len(records):
+            records = self._legacy_episode_records(profile_name)
+        return records
 
-    def update_times_hit_wall(self, profile_name, times_hit_wall=1):
-        """Increment the count of times the bot has hit a wall in the profile data."""
+    def get_profile_counters(self, profile_name: str) -> Dict[str, int]:
+        """
+        Get the step and wall-hit counters of a profile, summed from its episode log. Counters that
+        older profiles kept in profile.pkl are added to them.
+        """
+        counters = EpisodeLog.totals(self.load_episode_records(profile_name))
         profile_data = self._read_file(self._get_file_path(profile_name, "profile", 'pkl'), 'pickle') or {}
-        profile_data['times_hit_wall'] = profile_data.get('times_hit_wall', 0) + times_hit_wall
-        self._write_file(self._get_file_path(profile_name, "profile", 'pkl'), profile_data, 'pickle')
+        for key in ('total_steps', 'non_repeating_steps_taken', 'times_revisited_squares', 'times_hit_wall'):
+            counters[key] += profile_data.get(key, 0)
+        return counters
 
-    def save_all_maze_data(self, profile_name, maze, heatmap_data, reward):
-        """Save the latest, highest reward, and lowest reward mazes to a JSON file."""
-        data = self.get_json_data(profile_name, "mazes")
-        if data == "No data found":
-            data = {
-                "latest": {},
-                "highest": {"reward": float('-inf')},
-                "lowest": {"reward": float('inf')}
-            }
+    def record_wall_hit(self, profile_name: str) -> None:
+        """Count a wall hit; it is logged with the record of the episode."""
+        self.times_hit_wall += 1
+        self.pending_times_hit_wall += 1
 
-        heatmap_data_str_keys = {str(k): v for k, v in heatmap_data.items()}
+    def flush_profile_data(self, profile_name: str, close: bool = False) -> None:
+        """
+        Write the buffered episode records and maze snapshots of a profile to disk, e.g. when training stops.
 
-        data["latest"] = {
-            "maze": maze.grid,
-            "start": maze.get_start(),
-            "end": maze.end,
-            "heatmap_data": heatmap_data_str_keys,
-            "reward": reward
-        }
+        :param profile_name: The name of the profile.
+        :param close: Also close the episode log and drop the cached snapshots, e.g. before the profile directory is removed.
+        """
+        snapshot_path = self._get_file_path(profile_name, "mazes", "bin")
+        self._write_snapshots(snapshot_path)
+        log_path = self._get_file_path(profile_name, "episodes", "bin")
+        if EpisodeLog.is_open(log_path):
+            if close:
+                EpisodeLog.open(log_path).close()
+            else:
+                EpisodeLog.open(log_path).flush()
+        if close:
+            self._snapshot_records.pop(os.path.abspath(snapshot_path), None)
 
-        if reward > data["highest"]["reward"]:
-            data["highest"] = {
-                "maze": maze.grid,
-                "start": maze.get_start(),
-                "end": maze.end,
-                "heatmap_data": heatmap_data_str_keys,
-                "reward": reward
-            }
+    def _maze_records(self, snapshot_path):
+        """Get the snapshot records of a profile, reading them on first use; changes stay in memory until flushed."""
+        key = os.path.abspath(snapshot_path)
+        records = self._snapshot_records.get(key)
+        if records is None:
+            records = MazeSnapshot.read_records(snapshot_path)
+            if records is None:
+                records = self._legacy_maze_records(os.path.splitext(snapshot_path)[0] + ".json")
+            self._snapshot_records[key] = records
+        return records
 
-        if reward < data["lowest"]["reward"]:
-            data["lowest"] = {
-                "maze": maze.grid,
-                "start": maze.get_start(),
-                "end": maze.end,
-                "heatmap_data": heatmap_data_str_keys,
-                "reward": reward
-            }
+    def _write_snapshots(self, snapshot_path):
+        key = os.path.abspath(snapshot_path)
+        if key in self._unsaved_snapshots:
+            MazeSnapshot.write(snapshot_path, {name: raw for name, (_, raw) in self._snapshot_records[key].items()})
+            self._unsaved_snapshots.discard(key)
+
+    def save_all_maze_data(self, profile_name, maze, heatmap_data, reward):
+        """
+        Record the latest, highest reward, and lowest reward mazes.
+        They are written to the binary snapshot file by flush_profile_data.
+        """
+        snapshot_path = self._get_file_path(profile_name, "mazes", "bin")
+        records = self._maze_records(snapshot_path)
+
+        # Existing records are kept as raw bytes; only the new snapshot is encoded
+        record = (reward, MazeSnapshot.encode(maze.grid, maze.get_start(), maze.end, heatmap_data, reward))
+        if reward > records["highest"][0]:
+            records["highest"] = record
+        if reward < records["lowest"][0]:
+            records["lowest"] = record
+        records["latest"] = record
+        self._unsaved_snapshots.add(os.path.abspath(snapshot_path))
 
-        self.dump_json_data(profile_name, "mazes", data)
+    def merge_maze_records(self, profile_name, records):
+        """
+        Merge raw snapshot records from another snapshot file (e.g. a training worker's) into the profile.
+        The incoming latest record replaces the profile's, and the highest and lowest records are kept if they beat it.
+        """
+        snapshot_path = self._get_file_path(profile_name, "mazes", "bin")
+        current = self._maze_records(snapshot_path)
+
+        if MazeSnapshot.RECORD_HEADER.unpack_from(records["latest"][1])[0]:
+            current["latest"] = records["latest"]
+        if records["highest"][0] > current["highest"][0]:
+            current["highest"] = records["highest"]
+        if records["lowest"][0] < current["lowest"][0]:
+            current["lowest"] = records["lowest"]
+        self._unsaved_snapshots.add(os.path.abspath(snapshot_path))
+
+    def _legacy_maze_records(self, json_path):
+        """Convert a mazes.json file from older profiles into raw snapshot records."""
+        data = self._load_legacy_maze_data(json_path)
+        records = {}
+        for name in MazeSnapshot.SNAPSHOT_NAMES:
+            snapshot = data[name]
+            reward = snapshot.get("reward", MazeSnapshot.EMPTY_REWARDS[name])
+            if "maze" in snapshot:
+                raw = MazeSnapshot.encode(snapshot["maze"], snapshot["start"], snapshot["end"], snapshot["heatmap_data"], reward)
+            else:
+                raw = MazeSnapshot.encode_empty(reward)
+            records[name] = (reward, raw)
+        return records
 
     def load_all_maze_data(self, file_path):
+        """
+        Load the latest, highest reward, and lowest reward mazes.
+        Snapshots recorded in this process are decoded from memory, so reading them (e.g. from the GUI
+        while training runs) never writes the snapshot file; it is written once by flush_profile_data.
+        Falls back to the mazes.json file of older profiles if the snapshot file does not exist.
+        """
+        records = self._snapshot_records.get(os.path.abspath(file_path))
+        if records is not None:
+            return {name: MazeSnapshot.decode(raw) for name, (_, raw) in dict(records).items()}
+        data = MazeSnapshot.load(file_path)
+        if data is None:
+            data = self._load_legacy_maze_data(os.path.splitext(file_path)[0] + ".json")
+        return data
+
+    def _load_legacy_maze_data(self, file_path):
         data = self._read_file(file_path, 'json')
         if data:
             for key in ['latest', 'highest', 'lowest']:
@@ -147,19 +421,31 @@ class BotStatistics:
 
     def update_visited_positions(self, position):
         """Update the count of times a position has been visited."""
-        self.visited_positions[position] = self.visited_positions.get(position, 0) + 1
+        self._add_visits(position, 1)
 
     def get_visited_positions(self):
-        """Retrieve the dictionary of visited positions."""
+        """Retrieve the dict view of visited positions."""
         return self.visited_positions
 
+    def get_heatmap(self) -> np.ndarray:
+        """Retrieve the dense (height, width) visit counts."""
+        return self._grid
+
     def update_last_visited(self, position):
-        """Update the list of the last visited positions."""
-        if len(self.last_visited_positions) >= 5:
-            self.last_visited_positions.pop(0)
-        if position not in self.last_visited_positions:
-            self.last_visited_positions.append(position)
+        """Update the ring buffer of the last visited positions."""
+        recent = self._recent
+        if self._recent_length >= self.RECENT_POSITIONS:
+            recent[self._recent_start] = None
+            self._recent_start = (self._recent_start + 1) % self.RECENT_POSITIONS
+            self._recent_length -= 1
+        if position not in recent:
+            recent[(self._recent_start + self._recent_length) % self.RECENT_POSITIONS] = position
+            self._recent_length += 1
 
     def get_last_visited(self):
         """Retrieve the list of the last visited positions."""
-        return self.last_visited_positions
+        return [self._recent[(self._recent_start + i) % self.RECENT_POSITIONS] for i in range(self._recent_length)]
+
+    @property
+    def last_visited_positions(self):
+        return self.get_last_visited()
@@ -1,14 +1,22 @@
-from Pathfinding import Pathfinding
+from Pathfinding import Pathfinding, pathfinding_engines
 import numpy as np
 from typing import Tuple, List, Union
 class BotTools:
-    def __init__(self, maze):
+    # Row/column offsets of the actions Up, Down, Left, Right, indexed by action; every bot uses this order
+    ACTION_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+    def __init__(self, maze, pathfinding_engine: str = 'astar'):
         """
         Initialize the BotTools with a given maze.
 
         :param maze: The maze instance the tools will operate on.
+        :param pathfinding_engine: Name of the engine in pathfinding_engines used for path queries the
+                                   maze's distance map cannot answer.
         """
+        if pathfinding_engine not in pathfinding_engines:
+            raise ValueError(f"Unknown pathfinding engine: {pathfinding_engine}")
         self.maze = maze
+        self.pathfinder = pathfinding_engines[pathfinding_engine]()
     
     def check_goal_in_sight(self, position):
         """
@@ -17,12 +25,15 @@ class BotTools:
         :param position: The current position of the bot.
         :return: 1 if the goal is in sight, otherwise 0.
         """
+        if self._is_within_bounds(position) and self.maze.goal_directions is not None:
+            return int(self.maze.goal_directions[position].any())
+
         directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
         for dx, dy in directions:
             current_position = position
             while True:
                 new_position = (current_position[0] + dx, current_position[1] + dy)
-                if self.maze.is_valid_position(None, new_position[0], new_position[1]):
+                if self.maze.is_valid_position(new_position[0], new_position[1]):
                     if new_position == self.maze.end:
                         return 1 # True
                     current_position = new_position
@@ -47,7 +58,7 @@ class BotTools:
         :param position: The position to check.
         :return: True if the position is valid, otherwise False.
         """
-        return self.maze.is_valid_position(None, position[0], position[1])
+        return self.maze.is_valid_position(position[0], position[1])
 
     def detect_walls(self, position: Tuple[int, int]) -> Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]:
         """
@@ -56,12 +67,11 @@ class BotTools:
         :param position: The current position of the bot.
         :return: A tuple containing distances to walls and goal directions for all four directions.
         """
-        directions = {
-            'Up': (-1, 0),
-            'Down': (1, 0),
-            'Left': (0, -1),
-            'Right': (0, 1),
-        }
+        if self._is_within_bounds(position) and self.maze.wall_distances is not None:
+            # Precomputed per maze, in the same Up, Down, Left, Right order as below
+            return tuple(self.maze.wall_distances[position].tolist()), tuple(self.maze.goal_directions[position].tolist())
+
+        directions = dict(zip(('Up', 'Down', 'Left', 'Right'), self.ACTION_OFFSETS))
 
         wall_distances = []
         goal_directions = []
@@ -89,7 +99,7 @@ class BotTools:
         while True:
             next_position = (current_position[0] + dx, current_position[1] + dy)
 
-            if self._is_within_bounds(next_position) and self.maze.is_valid_position(None, next_position[0], next_position[1]):
+            if self._is_within_bounds(next_position) and self.maze.is_valid_position(next_position[0], next_position[1]):
                 current_position = next_position
                 distance += 1
                 if next_position == self.maze.end:
@@ -126,8 +136,7 @@ class BotTools:
         :param action: The action to be taken.
         :return: The next position of the bot.
         """
-        direction_map = {0: (-1, 0), 1: (1, 0), 2: (0, -1), 3: (0, 1)}
-        direction = direction_map[action]
+        direction = self.ACTION_OFFSETS[action]
         return position[0] + direction[0], position[1] + direction[1]
     
     def get_optimal_path_info(self, start: Tuple[int, int], end: Tuple[int, int], output: str = 'path') -> Union[List[Tuple[int, int]], int]:
@@ -139,11 +148,27 @@ class BotTools:
         :param output: The type of output ('path' or 'length').
         :return: The optimal path or its length.
         """
-        optimal_path = Pathfinding.a_star_search(self.maze, start, end)
+        if end == self.maze.end and self.maze.distance_map is not None:
+            # The maze keeps a goal-rooted distance map, so no search is needed
+            if output == 'length':
+                steps = self.maze.get_steps_to_goal(*start)
+                return steps + 1 if steps >= 0 else 0
+            optimal_path = Pathfinding.trace_path(self.maze.distance_map, start)
+        else:
+            optimal_path = self.pathfinder.find_path(self.maze, start, end)
         if output == 'path':
             return optimal_path
         elif output == 'length':
             return len(optimal_path)
         else:
             raise ValueError("Output parameter must be 'path' or 'length'")
-        
\ No newline at end of file
+
+    def is_on_optimal_path(self, position: Tuple[int, int], next_position: Tuple[int, int]) -> bool:
+        """
+        Check if the next position lies on the optimal path from the current position to the goal.
+
+        :param position: The current position of the bot.
+        :param next_position: The position the bot is moving to.
+        :return: True if the move follows a shortest path to the goal, otherwise False.
+        """
+        return self.maze.is_on_optimal_path(position, next_position)
@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Dict, Optional
+
+from QTableStore import QTableStore
+
+
+class CheckpointWriter:
+    def __init__(self):
+        """
+        Initialize a background writer for Q-table checkpoints.
+
+        Checkpoints are snapshots taken on the training thread (see QTable.to_state) and written by a
+        daemon thread. Only the newest pending snapshot per profile directory is kept, so saves that
+        arrive while the writer is busy are coalesced into one write.
+        """
+        self._pending: Dict[str, Any] = {}
+        self._condition = threading.Condition()
+        self._writing = False
+        self._thread: Optional[threading.Thread] = None
+        self.checkpoints_written = 0
+        self.checkpoints_coalesced = 0
+
+    @staticmethod
+    def write_checkpoint(profile_dir: str, state: Any) -> None:
+        """
+        Atomically write a Q-table snapshot with QTableStore: the chunk checksums are computed while
+        the data file is written, and replacing the manifest commits the save.
+
+        :param profile_dir: Directory of the profile.
+        :param state: The Q-table snapshot, as returned by QTable.to_state.
+        """
+        QTableStore.save(profile_dir, state)
+
+    def submit(self, profile_dir: str, state: Any) -> None:
+        """
+        Queue a snapshot to be written in the background, replacing any snapshot still pending for the same directory.
+
+        :param profile_dir: Directory of the profile.
+        :param state: The picklable Q-table snapshot. It must not be modified after submitting.
+        """
+        with self._condition:
+            if profile_dir in self._pending:
+                self.checkpoints_coalesced += 1
+            self._pending[profile_dir] = state
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="CheckpointWriter", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def flush(self) -> None:
+        """Block until every submitted snapshot has been written."""
+        with self._condition:
+            while self._pending or self._writing:
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                profile_dir = next(iter(self._pending))
+                state = self._pending.pop(profile_dir)
+                self._writing = True
+            try:
+                self.write_checkpoint(profile_dir, state)
+                self.checkpoints_written += 1
+            except OSError as e:
+                print(f"Error writing checkpoint to {profile_dir}: {e}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -2,9 +2,14 @@
 # Not used in the main program because it's not necessary for user to see all this information.
 # This class is used for debugging and testing purposes.
 
+import os
 import pickle
+import sys
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from QTableFile import QTableFile
+
 # 0 up, 2 left, 1 down, 3 right
 class QTableChecker:
     def __init__(self, q_table_file):
@@ -13,8 +18,14 @@ class QTableChecker:
     
     def load_q_table(self):
         try:
+            if self.q_table_file.endswith('.qtab'):
+                # Memory-mapped: only the rows and keys that are looked at get read
+                return QTableFile(self.q_table_file)
             with open(self.q_table_file, 'rb') as f:
                 q_table = pickle.load(f)
+            if isinstance(q_table, dict) and q_table.get('format') == 'dense-v1':
+                # Dense format: one key list plus one value matrix
+                q_table = dict(zip(q_table['keys'], q_table['values']))
             return q_table
         except FileNotFoundError:
             print(f"Q-table file {self.q_table_file} not found.")
@@ -26,7 +37,7 @@ class QTableChecker:
             return
         
         num_states = len(self.q_table)
-        num_actions = len(next(iter(self.q_table.values())))
+        num_actions = self.q_table.num_actions if isinstance(self.q_table, QTableFile) else len(next(iter(self.q_table.values())))
         print(f"Q-table contains {num_states} states and {num_actions} actions per state.")
     
     def print_state_q_values(self, state):
@@ -45,9 +56,13 @@ class QTableChecker:
             return None
     
     def print_top_states(self, top_n=1000):
-        sorted_states = sorted(self.q_table.keys(), key=lambda state: np.max(self.q_table[state]), reverse=True)
-        for i, state in enumerate(sorted_states[:top_n]):
-            best_action = np.argmax(self.q_table[state])
+        if isinstance(self.q_table, QTableFile):
+            top_states = [(state, q_values) for _, (state, q_values) in self.q_table.top_states(top_n)]
+        else:
+            sorted_states = sorted(self.q_table.keys(), key=lambda state: np.max(self.q_table[state]), reverse=True)
+            top_states = [(state, self.q_table[state]) for state in sorted_states[:top_n]]
+        for i, (state, q_values) in enumerate(top_states):
+            best_action = np.argmax(q_values)
             if(best_action == 0):
                 best_action = "Up"
             elif(best_action == 1):
@@ -57,7 +72,7 @@ class QTableChecker:
             elif(best_action == 3):
                 best_action = "Right"
 
-            best_q_value = np.max(self.q_table[state])
+            best_q_value = np.max(q_values)
             print(f"Rank {i+1}: State {state}, Best Action: {best_action}, Best Q-value: {best_q_value}")
 
 # Usage:
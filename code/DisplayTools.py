@@ -5,6 +5,8 @@ import numpy as np
 import tkinter as tk
 from tkinter import ttk, messagebox
 import matplotlib.colors as mcolors
+from BotStatistics import BotStatistics
+from MazeSnapshot import MazeSnapshot
 from matplotlib import pyplot as plt
 
 class DisplayTools:
@@ -33,6 +35,7 @@ class DisplayTools:
 
         try:
             if os.path.exists(profile_dir):
+                BotStatistics().flush_profile_data(profile_name, close=True)  # Release the episode log before removing it
                 shutil.rmtree(profile_dir)
             profile_pkl = f"{profile_manager.profile_directory}/{profile_name}.pkl"
             if os.path.exists(profile_pkl):
@@ -50,31 +53,25 @@ class DisplayTools:
         if maze is None:
             return
 
-        maze_width = len(maze[0])
-        maze_height = len(maze)
+        maze = np.asarray(maze, dtype=np.uint8)
+        maze_height, maze_width = maze.shape
         cell_width = canvas.winfo_width() / maze_width
         cell_height = canvas.winfo_height() / maze_height
 
-        heatmap = np.zeros((maze_height, maze_width))
-        for (x, y), count in heatmap_data.items():
-            heatmap[x, y] = count
+        heatmap = MazeSnapshot.dense_heatmap(heatmap_data, maze.shape)
 
         max_heat = heatmap.max() if heatmap.max() > 0 else 1  # Avoid division by zero
         cmap = plt.cm.Reds
 
-        for y in range(maze_height):
-            for x in range(maze_width):
-                if maze[y][x] == 1:
-                    canvas.create_rectangle(x * cell_width, y * cell_height,
-                                                         (x + 1) * cell_width, (y + 1) * cell_height,
-                                                         fill="black")
-                else:
-                    heat_value = heatmap[y, x] / max_heat
-                    if heat_value > 0:
-                        color = mcolors.to_hex(cmap(heat_value))
-                        canvas.create_rectangle(x * cell_width, y * cell_height,
-                                                             (x + 1) * cell_width, (y + 1) * cell_height,
-                                                             fill=color, outline=color)
+        for y, x in np.argwhere(maze == 1):
+            canvas.create_rectangle(x * cell_width, y * cell_height,
+                                    (x + 1) * cell_width, (y + 1) * cell_height,
+                                    fill="black")
+        for y, x in np.argwhere((maze == 0) & (heatmap > 0)):
+            color = mcolors.to_hex(cmap(heatmap[y, x] / max_heat))
+            canvas.create_rectangle(x * cell_width, y * cell_height,
+                                    (x + 1) * cell_width, (y + 1) * cell_height,
+                                    fill=color, outline=color)
 
         canvas.create_rectangle(start[1] * cell_width, start[0] * cell_height,
                                              (start[1] + 1) * cell_width, (start[0] + 1) * cell_height,
@@ -0,0 +1,212 @@
+import os
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class EpisodeLog:
+    """
+    Append-only binary log of per-episode metrics of a profile.
+
+    The file starts with a small header (magic, version, record size) followed by one fixed-size
+    little-endian record per episode: reward, steps, unique steps, wall hits and duration. Records
+    go through a buffered writer and reach the file in one sequential write every flush_interval
+    episodes, and the whole log reads back with np.fromfile as a structured array. Profile totals
+    are not stored anywhere; they are summed from the records when needed (see totals).
+
+    The rewards are also kept in a reward column next to the log: a headerless little-endian float64
+    file with the reward of every episode, which readers map into memory instead of reading the log
+    (see rewards). The writer appends to both files, and the column is brought back in line with the
+    log when a writer opens it.
+
+    One writer is shared by everything in the process that logs to the same file (see open).
+    """
+
+    MAGIC = b"EPLG"
+    VERSION = 1
+    FILE_HEADER = struct.Struct("<4sHH")
+    RECORD = np.dtype([('reward', '<f8'), ('steps', '<i8'), ('unique_steps', '<i8'), ('wall_hits', '<i8'), ('duration', '<f8')])
+    RECORD_STRUCT = struct.Struct("<dqqqd")
+    REWARD = np.dtype('<f8')
+    REWARD_STRUCT = struct.Struct("<d")
+
+    _open_logs: Dict[str, 'EpisodeLog'] = {}  # Absolute path -> writer
+
+    def __init__(self, file_path: str, flush_interval: int = 1):
+        """
+        Open a log for appending, creating it if it does not exist.
+
+        :param file_path: Path to the log file.
+        :param flush_interval: Write the buffered records to the file after this many episodes.
+        """
+        self.file_path = file_path
+        self.flush_interval = max(1, flush_interval)
+        self.pending = 0
+        self.create(file_path)
+        self._truncate_partial_record(file_path)
+        self.sync_rewards(file_path)
+        self.file = open(file_path, 'ab')
+        self.rewards_file = open(self.rewards_path(file_path), 'ab')
+
+    @classmethod
+    def open(cls, file_path: str, flush_interval: int = 1) -> 'EpisodeLog':
+        """
+        Get the writer of a log, opening it on first use. Later calls for the same file return the
+        same writer, so its records are never interleaved with those of another writer.
+        """
+        key = os.path.abspath(file_path)
+        log = cls._open_logs.get(key)
+        if log is None:
+            log = cls._open_logs[key] = cls(file_path, flush_interval)
+        return log
+
+    @classmethod
+    def is_open(cls, file_path: str) -> bool:
+        """Whether a writer of the log is open in this process."""
+        return os.path.abspath(file_path) in cls._open_logs
+
+    @classmethod
+    def create(cls, file_path: str) -> None:
+        """Create an empty log if the file does not exist."""
+        if not os.path.exists(file_path):
+            with open(file_path, 'wb') as f:
+                f.write(cls.FILE_HEADER.pack(cls.MAGIC, cls.VERSION, cls.RECORD.itemsize))
+
+    @staticmethod
+    def rewards_path(file_path: str) -> str:
+        """Path of the reward column of a log."""
+        return os.path.splitext(file_path)[0] + ".rewards.f64"
+
+    @classmethod
+    def _record_count(cls, file_path: str) -> int:
+        return max(0, (os.path.getsize(file_path) - cls.FILE_HEADER.size) // cls.RECORD.itemsize)
+
+    @classmethod
+    def sync_rewards(cls, file_path: str) -> None:
+        """
+        Make the reward column hold exactly the rewards of the log: rewards missing after an interrupted
+        write, or in logs written before the column existed, are copied from the log.
+        """
+        rewards_path = cls.rewards_path(file_path)
+        count = cls._record_count(file_path)
+        size = os.path.getsize(rewards_path) if os.path.exists(rewards_path) else 0
+        column_count = min(size // cls.REWARD.itemsize, count)
+        with open(rewards_path, 'ab') as f:
+            if size != column_count * cls.REWARD.itemsize:
+                f.truncate(column_count * cls.REWARD.itemsize)
+            if column_count < count:
+                records = np.memmap(file_path, dtype=cls.RECORD, mode='r', offset=cls.FILE_HEADER.size, shape=(count,))
+                f.write(np.ascontiguousarray(records['reward'][column_count:], dtype=cls.REWARD).tobytes())
+
+    @classmethod
+    def _truncate_partial_record(cls, file_path: str) -> None:
+        """Drop the tail of a record cut short by an interrupted write, so new records stay aligned."""
+        extra = (os.path.getsize(file_path) - cls.FILE_HEADER.size) % cls.RECORD.itemsize
+        if extra:
+            print(f"Dropping an incomplete record at the end of {file_path}")
+            with open(file_path, 'r+b') as f:
+                f.truncate(os.path.getsize(file_path) - extra)
+
+    def append(self, reward: float, steps: int, unique_steps: int, wall_hits: int, duration: float) -> None:
+        """Add the record of one episode."""
+        self.file.write(self.RECORD_STRUCT.pack(reward, steps, unique_steps, wall_hits, duration))
+        self.rewards_file.write(self.REWARD_STRUCT.pack(reward))
+        self.pending += 1
+        if self.pending >= self.flush_interval:
+            self.flush()
+
+    def extend(self, records: np.ndarray) -> None:
+        """Add a block of records, e.g. the episodes of a training worker's log."""
+        if len(records):
+            records = np.ascontiguousarray(records, dtype=self.RECORD)
+            self.file.write(records.tobytes())
+            self.rewards_file.write(np.ascontiguousarray(records['reward'], dtype=self.REWARD).tobytes())
+            self.pending += len(records)
+            if self.pending >= self.flush_interval:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records to the log and the reward column."""
+        self.file.flush()
+        self.rewards_file.flush()
+        self.pending = 0
+
+    def close(self) -> None:
+        """Flush and close the writer; the next open of the file starts a new one."""
+        self.flush()
+        self.file.close()
+        self.rewards_file.close()
+        self._open_logs.pop(os.path.abspath(self.file_path), None)
+
+    @classmethod
+    def read(cls, file_path: str) -> Optional[np.ndarray]:
+        """
+        Read every record of a log, including records still buffered by a writer in this process.
+
+        :param file_path: Path to the log file.
+        :return: A structured array with the fields of RECORD, or None if the file does not exist or is not a log.
+        """
+        log = cls._open_logs.get(os.path.abspath(file_path))
+        if log is not None:
+            log.flush()
+        try:
+            with open(file_path, 'rb') as f:
+                header = f.read(cls.FILE_HEADER.size)
+                if len(header) < cls.FILE_HEADER.size:
+                    return None
+                magic, version, record_size = cls.FILE_HEADER.unpack(header)
+                if magic != cls.MAGIC or version != cls.VERSION or record_size != cls.RECORD.itemsize:
+                    print(f"Unsupported episode log: {file_path}")
+                    return None
+                count = (os.fstat(f.fileno()).st_size - cls.FILE_HEADER.size) // record_size
+                return np.fromfile(f, dtype=cls.RECORD, count=count)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def rewards(cls, file_path: str) -> Optional[np.ndarray]:
+        """
+        Map the reward column of a log into memory, including rewards still buffered by a writer in
+        this process. Slicing the result reads only the episodes in the slice.
+
+        Neither file is modified: rewards missing from the column (see sync_rewards) are read from
+        the log instead, and the column is repaired the next time a writer opens the log.
+
+        :param file_path: Path to the log file.
+        :return: A read-only float64 array with the reward of every episode, or None if the log does not exist.
+        """
+        if not os.path.exists(file_path):
+            return None
+        log = cls._open_logs.get(os.path.abspath(file_path))
+        if log is not None:
+            log.flush()
+        count = cls._record_count(file_path)
+        rewards_path = cls.rewards_path(file_path)
+        column_count = min(os.path.getsize(rewards_path) // cls.REWARD.itemsize if os.path.exists(rewards_path) else 0, count)
+        # Empty arrays are allocated, as mmap cannot map zero bytes
+        column = np.memmap(rewards_path, dtype=cls.REWARD, mode='r', shape=(column_count,)) if column_count else np.zeros(0, dtype=cls.REWARD)
+        if column_count == count:
+            return column
+        records = np.memmap(file_path, dtype=cls.RECORD, mode='r', offset=cls.FILE_HEADER.size, shape=(count,))
+        rewards = np.concatenate([column, records['reward'][column_count:].astype(cls.REWARD)])
+        rewards.flags.writeable = False
+        return rewards
+
+    @staticmethod
+    def totals(records: np.ndarray) -> Dict[str, int]:
+        """
+        Sum episode records into the profile counters.
+
+        :return: A dict with the number of episodes and the total_steps, non_repeating_steps_taken,
+                 times_revisited_squares and times_hit_wall counters.
+        """
+        steps = int(records['steps'].sum())
+        unique_steps = int(records['unique_steps'].sum())
+        return {
+            'episodes': len(records),
+            'total_steps': steps,
+            'non_repeating_steps_taken': unique_steps,
+            'times_revisited_squares': steps - unique_steps,
+            'times_hit_wall': int(records['wall_hits'].sum()),
+        }
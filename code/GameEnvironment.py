@@ -1,20 +1,31 @@
 from BotFactory import BotFactory
 from Maze import Maze
+from MazePool import MazePool
+from ParallelTraining import ParallelTrainer
 from RewardSystem import RewardConfig
 from BotStatistics import BotStatistics
 from BotProfile import BotProfile, ProfileManager
-from typing import Any, List, Optional
+from typing import Any, Callable, List, Optional
 
 class GameEnvironment:
-    def __init__(self, width: int = 10, height: int = 10, profile_directory: str = 'profiles'):
+    def __init__(self, width: int = 10, height: int = 10, profile_directory: str = 'profiles', maze_pool_size: int = 0, maze_seed: Optional[int] = None):
         """
         Initialize the GameEnvironment with a maze, bot factory, and profile manager.
 
         :param width: Width of the maze.
         :param height: Height of the maze.
         :param profile_directory: Directory where profiles are stored.
+        :param maze_pool_size: Number of mazes a background process keeps ready for reset_environment.
+                               0 generates every maze synchronously instead.
+        :param maze_seed: Seed for the maze pool, giving a reproducible maze sequence.
         """
+        self.width = width
+        self.height = height
         self.maze = Maze(width, height)
+        self.maze_pool = None
+        if maze_pool_size > 0:
+            self.maze_pool = MazePool(width, height, maze_pool_size, maze_seed)
+            self.maze.apply_layout(self.maze_pool.get())
         self.bot_factory = BotFactory(self.maze)
         self.profile_manager = ProfileManager(profile_directory)
         self.bots: List = []
@@ -25,7 +36,11 @@ class GameEnvironment:
         Register available bots with the bot factory.
         """
         from QLearningBot import QLearningBot  # Ensure QLearningBot is imported only when needed
+        from VectorizedQLearningBot import VectorizedQLearningBot
+        from ValueIterationBot import ValueIterationBot
         self.bot_factory.register_bot('QLearningBot', QLearningBot)
+        self.bot_factory.register_bot('VectorizedQLearningBot', VectorizedQLearningBot)
+        self.bot_factory.register_bot('ValueIterationBot', ValueIterationBot)
         # Register other bots as needed
         # self.bot_factory.register_bot('AnotherBot', AnotherBot)
         
@@ -42,21 +57,49 @@ class GameEnvironment:
         self.profile_manager.save_profile(profile)
         self.setup_bots(profile.bot_type, profile.name, config, reward_config, profile.statistics, profile.bot_specific_data)
 
-    def game_loop(self, rounds: int, bot_index: int, visualize: bool = False, visualization_window: Optional[Any] = None):
+    def game_loop(self, rounds: int, bot_index: int, visualize: bool = False, visualization_window: Optional[Any] = None,
+                  progress_callback: Optional[Callable[[int, int], None]] = None):
         """
         Run the game loop for a specified number of rounds.
 
+        Checkpoints, episode records and maze snapshots are flushed once, after the last round, so
+        a training run should be a single call rather than one call per round.
+
         :param rounds: Number of rounds to run.
         :param bot_index: Index of the bot to run.
         :param visualize: Whether to visualize the game.
         :param visualization_window: Visualization window object.
+        :param progress_callback: Called with (completed rounds, total rounds) after every round.
         """
         bot = self.bots[bot_index]
-        for _ in range(rounds):
+        for completed in range(1, rounds + 1):
             bot.run_episode()
+            if hasattr(bot, 'compact_q_table'):
+                bot.compact_q_table()  # Between episodes, while no row ids are held by a running episode
             self.reset_environment(bot_index)
             if visualize and visualization_window:
                 visualization_window.update_visualization()
+            if progress_callback:
+                progress_callback(completed, rounds)
+        if hasattr(bot, 'flush_checkpoints'):
+            bot.flush_checkpoints()
+        bot.statistics.flush_profile_data(bot.profile_name)  # Episode records and maze snapshots buffered by the episodes
+
+    def parallel_game_loop(self, rounds: int, bot_index: int, workers: Optional[int] = None, merge_interval: int = 5,
+                           merge_rule: str = 'visit_weighted', progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Run the game loop in a pool of worker processes, each training a copy of the bot's Q-table on its own mazes.
+        The copies are merged back into the bot's table every merge_interval episodes and saved to its profile.
+
+        :param rounds: Total number of rounds to run across all workers.
+        :param bot_index: Index of the bot to train.
+        :param workers: Number of worker processes; defaults to the number of CPUs.
+        :param merge_interval: Rounds each worker runs between merges.
+        :param merge_rule: Name of the rule in ParallelTraining.merge_rules, e.g. 'visit_weighted' or 'max_delta'.
+        :param progress_callback: Called with (completed rounds, total rounds) after every merge.
+        """
+        trainer = ParallelTrainer(workers, merge_interval, merge_rule)
+        trainer.train(self.bots[bot_index], rounds, self.width, self.height, progress_callback=progress_callback)
 
     def reset_environment(self, bot_index: int):
         """
@@ -64,11 +107,21 @@ class GameEnvironment:
 
         :param bot_index: Index of the bot to reset.
         """
-        self.maze.setup_simple_maze()
+        if self.maze_pool is not None:
+            self.maze.apply_layout(self.maze_pool.get())
+        else:
+            self.maze.setup_simple_maze()
         for bot in self.bots:
             if bot == self.bots[bot_index]:
                 bot.reset_bot()
 
+    def close(self):
+        """
+        Stop the background maze pool, if one is running.
+        """
+        if self.maze_pool is not None:
+            self.maze_pool.close()
+
     def load_profile(self, profile_name: str):
         """
         Load a bot profile from the profile manager.
@@ -78,27 +131,33 @@ class GameEnvironment:
         profile = self.profile_manager.load_profile(profile_name)
         self.apply_profile(profile)
 
-    def apply_profile(self, profile) -> int:
+    def apply_profile(self, profile, bot_type: Optional[str] = None) -> int:
         """
         Apply a loaded profile to the environment.
 
         :param profile: The bot profile to apply.
+        :param bot_type: Registered bot type to run the profile with instead of profile.bot_type,
+                         e.g. 'VectorizedQLearningBot' to train a QLearningBot profile on several mazes at once.
         :return: The index of the bot.
         """
+        bot_type = bot_type or profile.bot_type
         # Check if a bot with the same profile name already exists
         bot_index = next((i for i, bot in enumerate(self.bots) if bot.profile_name == profile.name), -1)
-        if bot_index == -1:
-            # If the bot does not exist, create a new one and append it
+        if bot_index == -1 or type(self.bots[bot_index]).__name__ != bot_type:
+            # If the bot does not exist, or runs as a different bot type, create a new one
             bot = self.bot_factory.create_bot(
-                profile.bot_type,
+                bot_type,
                 profile.name,
                 profile.config,
                 profile.reward_config,
                 profile.statistics,
                 profile.bot_specific_data
             )
-            self.bots.append(bot)
-            bot_index = len(self.bots) - 1
+            if bot_index == -1:
+                self.bots.append(bot)
+                bot_index = len(self.bots) - 1
+            else:
+                self.bots[bot_index] = bot
         else:
             bot = self.bots[bot_index]
             bot.config = profile.config
@@ -1,33 +1,36 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import random
-from BotStatistics import BotStatistics
+from Pathfinding import Pathfinding
 class Maze:
-    def __init__(self, width, height, start=None, end=None):
+    # Attributes that fully describe a generated maze, including its precomputed lookup tables
+    LAYOUT_FIELDS = ('width', 'height', 'grid', 'start', 'end', 'distance_map', 'optimal_path_mask',
+                     'optimal_path_length', 'wall_distances', 'goal_directions')
+
+    def __init__(self, width, height, start=None, end=None, rng=None):
         """
         Initialize the maze with given dimensions and optionally set start and end points.
+
+        :param rng: Optional random.Random used for generation; defaults to the global random module.
         """
         self.width = width
         self.height = height
-        self.grid = [[0 for _ in range(width)] for _ in range(height)]
+        self.grid = np.zeros((height, width), dtype=np.uint8)
         self.start = start
         self.end = end
         self.minimum_distance = max(width, height) // 2
-        self.setup_simple_maze()
-
-        # Initialize the figure and axes here for reuse
-        self.fig, self.ax = plt.subplots()
-        plt.ion() # Enable interactive mode for live plotting
+        self.distance_map = None
+        self.optimal_path_mask = None
+        self.optimal_path_length = 0
+        self.wall_distances = None
+        self.goal_directions = None
+        self._renderer = None  # Created lazily, only when the maze is visualized
+        self.setup_simple_maze(rng)
     
-    def is_valid_position(self, bot_name, x, y):
+    def is_valid_position(self, x, y):
         """
         Check if a position is valid (within bounds and not a wall).
-        Optionally update the bot's statistics if it hits a wall.
         """
-        is_valid = 0 <= x < self.height and 0 <= y < self.width and self.grid[x][y] == 0
-        if not is_valid and bot_name != None:
-            BotStatistics().update_times_hit_wall(bot_name)
-        return is_valid # 0 is an open path.
+        return 0 <= x < self.height and 0 <= y < self.width and self.grid[x, y] == 0 # 0 is an open path.
 
     def set_wall(self, x, y):
         """
@@ -35,7 +38,9 @@ class Maze:
         Raise an error if the position is out of bounds.
         """
         if 0 <= x < self.height and 0 <= y < self.width:
-            self.grid[x][y] = 1
+            self.grid[x, y] = 1
+            if self.distance_map is not None:
+                self.update_lookup_tables()
         else:
             raise ValueError("Position out of maze bounds")
     
@@ -46,8 +51,10 @@ class Maze:
         return self.start
     
     def set_start(self, x, y):
-        if self.is_valid_position(None, x, y):
+        if self.is_valid_position(x, y):
             self.start = (x, y)
+            if self.distance_map is not None:
+                self.update_optimal_path()
         else:
             raise ValueError("Invalid start position")
     
@@ -56,18 +63,111 @@ class Maze:
         Set the goal position of the maze if it's valid.
         Raise an error if the position is invalid.
         """
-        if self.is_valid_position(None, x, y):
+        if self.is_valid_position(x, y):
             self.end = (x, y)
+            self.update_lookup_tables()
         else:
             raise ValueError("Invalid goal position")
+
+    def update_lookup_tables(self):
+        """
+        Recompute the per-maze lookup tables: the goal-rooted BFS distance map, the optimal path
+        from the start and the ray-cast wall distance and goal visibility tables.
+        Must be called again whenever the grid or the goal changes.
+        """
+        self.distance_map = Pathfinding.bfs_distance_field(self, self.end)
+        self.update_optimal_path()
+
+        is_open = self.grid == 0
+        is_goal = np.zeros_like(is_open)
+        is_goal[self.end] = True
+
+        # Every direction is the same scan towards lower row indices on a flipped/transposed view
+        views = {
+            'Up': lambda a: a,
+            'Down': lambda a: a[::-1],
+            'Left': lambda a: a.T,
+            'Right': lambda a: a.T[::-1],
+        }
+        self.wall_distances = np.zeros((self.height, self.width, 4), dtype=np.int32)
+        self.goal_directions = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        for i, view in enumerate(views.values()):
+            distances, goal_seen = self._scan_rays(view(is_open), view(is_goal))
+            view(self.wall_distances[..., i])[...] = distances
+            view(self.goal_directions[..., i])[...] = goal_seen
+
+    @staticmethod
+    def _scan_rays(is_open, is_goal):
+        """
+        For every cell, count the open cells a ray passes towards lower row indices before it hits a
+        wall or the maze edge, stopping early (and including the goal) if it reaches the goal.
+
+        :return: A tuple of (distances, goal_seen) arrays shaped like the inputs.
+        """
+        rows = np.arange(is_open.shape[0])[:, None]
+        # Index of the nearest wall / goal at or above each row, -1 if there is none
+        last_wall = np.maximum.accumulate(np.where(is_open, -1, rows), axis=0)
+        last_goal = np.maximum.accumulate(np.where(is_goal, rows, -1), axis=0)
+        # A ray starting at row i only looks at rows strictly above it
+        none_above = np.full((1, is_open.shape[1]), -1)
+        last_wall = np.concatenate([none_above, last_wall[:-1]])
+        last_goal = np.concatenate([none_above, last_goal[:-1]])
+
+        goal_seen = last_goal > last_wall
+        distances = np.where(goal_seen, rows - last_goal, rows - 1 - last_wall)
+        return distances, goal_seen
+
+    def update_optimal_path(self):
+        """
+        Rebuild the on-path bitmap and the optimal path length from the current start to the goal.
+        """
+        self.optimal_path_mask = np.zeros((self.height, self.width), dtype=bool)
+        optimal_path = Pathfinding.trace_path(self.distance_map, self.start) if self.start is not None else []
+        for position in optimal_path:
+            self.optimal_path_mask[position] = True
+        self.optimal_path_length = len(optimal_path)
+
+    def get_steps_to_goal(self, x, y):
+        """
+        Get the number of moves needed to reach the goal from a position, or -1 if unreachable.
+        """
+        if 0 <= x < self.height and 0 <= y < self.width:
+            return int(self.distance_map[x, y])
+        return -1
+
+    def is_on_optimal_path(self, position, next_position):
+        """
+        Check if moving from position to next_position follows a shortest path to the goal.
+        """
+        next_distance = self.get_steps_to_goal(*next_position)
+        return next_distance >= 0 and next_distance == self.get_steps_to_goal(*position) - 1
         
-    def setup_simple_maze(self):
+    def export_layout(self):
+        """
+        Get the generated maze and its lookup tables as a plain dict that can be pickled to another process.
+        """
+        return {field: getattr(self, field) for field in self.LAYOUT_FIELDS}
+
+    def apply_layout(self, layout):
+        """
+        Replace the current maze in place with a layout produced by export_layout, without regenerating
+        it or recomputing its lookup tables.
+        """
+        for field in self.LAYOUT_FIELDS:
+            setattr(self, field, layout[field])
+
+    def setup_simple_maze(self, rng=None):
+        rng = rng or random
+
         # Randomly adjust width and height
-        self.width = random.randint(self.width, self.width + 2)
-        self.height = random.randint(self.height, self.height + 2)
+        self.width = rng.randint(self.width, self.width + 2)
+        self.height = rng.randint(self.height, self.height + 2)
 
-        # Initialize grid with walls
-        self.grid = [[1 for _ in range(self.width)] for _ in range(self.height)]
+        # Initialize grid with walls. The carver works on a flat bytearray (cheap scalar writes)
+        # that becomes the backing buffer of the uint8 grid afterwards.
+        width = self.width
+        cells = bytearray(b"\x01" * (self.height * width))
+        self.distance_map = None
 
         def dfs_iterative(x, y, algorithm_type):
             stack = [(x, y)]
@@ -75,81 +175,88 @@ class Maze:
 
             while stack:
                 cx, cy = stack.pop()
-                random.shuffle(directions)
+                rng.shuffle(directions)
                 for dx, dy in directions:
                     nx, ny = cx + 2 * dx, cy + 2 * dy
-                    if 1 <= nx < self.height - 1 and 1 <= ny < self.width - 1 and self.grid[nx][ny] == 1:
-                        self.grid[cx + dx][cy + dy] = 0
-                        self.grid[nx][ny] = 0
+                    if 1 <= nx < self.height - 1 and 1 <= ny < width - 1 and cells[nx * width + ny] == 1:
+                        cells[(cx + dx) * width + cy + dy] = 0
+                        cells[nx * width + ny] = 0
                         if algorithm_type == 1:
                             stack.append((cx, cy))
                         stack.append((nx, ny))
                         break
 
         # Randomly choose a starting position
-        start_x = random.randrange(1, self.height - 1, 2)
-        start_y = random.randrange(1, self.width - 1, 2)
-        self.grid[start_x][start_y] = 0
+        start_x = rng.randrange(1, self.height - 1, 2)
+        start_y = rng.randrange(1, self.width - 1, 2)
+        cells[start_x * width + start_y] = 0
 
         # Randomly choose an algorithm type
-        algorithm_type = random.randint(1, 2)
+        algorithm_type = rng.randint(1, 2)
         dfs_iterative(start_x, start_y, algorithm_type)
+        self.grid = np.frombuffer(cells, dtype=np.uint8).reshape(self.height, width)
 
-        # Collect all path positions
-        start_positions = [(x, y) for x in range(1, self.height - 1) for y in range(1, self.width - 1) if self.grid[x][y] == 0]
-        self.start = random.choice(start_positions)
+        # Collect all path positions (row-major, excluding the border)
+        start_positions = np.argwhere(self.grid[1:-1, 1:-1] == 0) + 1
+        self.start = tuple(int(v) for v in rng.choice(start_positions))
 
         # Ensure the goal is at least minimum_distance away from the start
-        self.end = self.get_farthest_valid_end_position(start_positions)
+        self.end = self.get_farthest_valid_end_position(start_positions, rng)
 
         self.set_start(*self.start)
-        self.set_goal(*self.end)
+        self.set_goal(*self.end)  # Also builds the distance map for the new layout
 
-    def get_farthest_valid_end_position(self, start_positions):
+    def get_farthest_valid_end_position(self, start_positions, rng=None):
         """
         Get the farthest valid end position that is at least minimum_distance away from the start.
         """
-        valid_end_positions = [
-            pos for pos in start_positions if np.linalg.norm(np.array(pos) - np.array(self.start)) >= self.minimum_distance
-        ]
+        rng = rng or random
+        positions = np.asarray(start_positions).reshape(-1, 2)
+        distances = np.linalg.norm(positions - np.asarray(self.start), axis=1)
+        valid_end_positions = positions[distances >= self.minimum_distance]
 
-        if valid_end_positions:
-            return random.choice(valid_end_positions)
+        if len(valid_end_positions):
+            end = rng.choice(valid_end_positions)
         else:
-            return max(start_positions, key=lambda pos: np.linalg.norm(np.array(pos) - np.array(self.start)))
+            end = positions[np.argmax(distances)]
+        return tuple(int(v) for v in end)
 
-        
-    def display_with_bot(self, bot_position, canvas):
+    @property
+    def grid_list(self):
         """
-        Display the maze with the bot's current position highlighted on the canvas.
+        Get the grid as a list of lists, for consumers such as the JSON writers that need plain Python values.
         """
-        canvas.delete("all")
-        cell_width = canvas.winfo_width() / self.width
-        cell_height = canvas.winfo_height() / self.height
+        return self.grid.tolist()
 
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.grid[y][x] == 1:
-                    canvas.create_rectangle(x * cell_width, y * cell_height,
-                                            (x + 1) * cell_width, (y + 1) * cell_height,
-                                            fill="black")
-
-        start = self.get_start()
-        end = self.end
+    def get_open_neighbor_mask(self):
+        """
+        Get a (height, width, 4) boolean array telling, for every cell, whether the neighbor
+        Up, Down, Left and Right of it is open. Neighbors outside the maze count as walls.
+        """
+        padded = np.pad(self.grid == 0, 1, constant_values=False)
+        return np.stack([
+            padded[:-2, 1:-1],  # Up
+            padded[2:, 1:-1],   # Down
+            padded[1:-1, :-2],  # Left
+            padded[1:-1, 2:],   # Right
+        ], axis=-1)
 
-        canvas.create_rectangle(start[1] * cell_width, start[0] * cell_height,
-                                (start[1] + 1) * cell_width, (start[0] + 1) * cell_height,
-                                fill="blue")
+    @property
+    def renderer(self):
+        """
+        Get the renderer for this maze, creating it on first use so headless runs never load a GUI backend.
+        """
+        if self._renderer is None:
+            from MazeRenderer import MazeRenderer
+            self._renderer = MazeRenderer(self)
+        return self._renderer
 
-        canvas.create_rectangle(end[1] * cell_width, end[0] * cell_height,
-                                (end[1] + 1) * cell_width, (end[0] + 1) * cell_height,
-                                fill="green")
+    def display_with_bot(self, bot_position, canvas):
+        """
+        Display the maze with the bot's current position highlighted on the canvas.
+        """
+        self.renderer.display_with_bot(bot_position, canvas)
 
-        canvas.create_oval(bot_position[1] * cell_width, bot_position[0] * cell_height,
-                        (bot_position[1] + 1) * cell_width, (bot_position[0] + 1) * cell_height,
-                        fill="red")    
-    
     def finalize_display(self):
         """Finalize the display by turning off interactive mode and showing the plot."""
-        plt.ioff()
-        plt.show()
+        self.renderer.finalize_display()
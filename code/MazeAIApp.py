@@ -1,6 +1,4 @@
-import json
 import os
-import pickle
 from DisplayTools import DisplayTools
 import tkinter as tk
 from tkinter import ttk, messagebox
@@ -14,17 +12,21 @@ import numpy as np
 
 from GameEnvironment import GameEnvironment
 from QLearningBot import QLearningConfig
+from VectorizedQLearningBot import VectorizedQLearningConfig
+from ValueIterationBot import ValueIterationConfig
 from RewardSystem import RewardConfig
 from BotStatistics import BotStatistics
+from EpisodeLog import EpisodeLog
 from RewardGrapher import RewardGrapher
-from VisualizationStrategy import QLearningBotVisualizationStrategy
+from VisualizationStrategy import QLearningBotVisualizationStrategy, ValueIterationBotVisualizationStrategy
 from BotProfile import BotProfile
+from MazeSnapshot import MazeSnapshot
 
 class MazeAIApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Maze AI Experiment")
-        self.game_env = GameEnvironment()
+        self.game_env = GameEnvironment(maze_pool_size=4)  # Mazes are generated ahead of time in the background
         self.create_navigation_bar()
         self.create_main_frames()
         
@@ -214,6 +216,12 @@ class CreateEditProfileFrame(tk.Frame):
         # Create the appropriate configuration object
         if bot_type == "QLearningBot":
             bot_config = QLearningConfig(**bot_params)
+        elif bot_type == "VectorizedQLearningBot":
+            bot_params['num_envs'] = int(bot_params.get('num_envs', 8))
+            bot_config = VectorizedQLearningConfig(**bot_params)
+        elif bot_type == "ValueIterationBot":
+            bot_params['max_sweeps'] = int(bot_params.get('max_sweeps', 10000))
+            bot_config = ValueIterationConfig(**bot_params)
         else:
             bot_config = None  # Replace with appropriate config class for other bot types
 
@@ -232,17 +240,10 @@ class CreateEditProfileFrame(tk.Frame):
 
         self.controller.game_env.setup_new_profile(profile_name, bot_type, bot_config, reward_config_obj)
 
-        # Initialize the mazes.json file
+        # Initialize the maze snapshot file with empty latest/highest/lowest records
         profile_dir = f"profiles/{profile_name}"
         os.makedirs(profile_dir, exist_ok=True)
-        maze_data_path = f"{profile_dir}/mazes.json"
-        initial_data = {
-            "latest": {},
-            "highest": {"reward": float('-inf')},
-            "lowest": {"reward": float('inf')}
-        }
-        with open(maze_data_path, 'w') as f:
-            json.dump(initial_data, f, indent=4)
+        MazeSnapshot.write(f"{profile_dir}/mazes.bin", {})
 
         # Notify the user
         messagebox.showinfo("Profile Saved", "Profile has been saved.")
@@ -272,6 +273,16 @@ class BotTrainingFrame(tk.Frame):
         self.rounds_entry = ttk.Entry(self)
         self.rounds_entry.pack()
 
+        ttk.Label(self, text="Parallel Mazes (1 = single maze):").pack()
+        self.parallel_mazes_entry = ttk.Entry(self)
+        self.parallel_mazes_entry.insert(0, "1")
+        self.parallel_mazes_entry.pack()
+
+        ttk.Label(self, text="Worker Processes (1 = train in this process):").pack()
+        self.workers_entry = ttk.Entry(self)
+        self.workers_entry.insert(0, "1")
+        self.workers_entry.pack()
+
         ttk.Button(self, text="Start Training", command=self.start_training).pack(pady=10)
         self.training_progress = ttk.Progressbar(self, orient="horizontal", length=200, mode="determinate")
         self.training_progress.pack(pady=10)
@@ -296,8 +307,31 @@ class BotTrainingFrame(tk.Frame):
             return
 
 
+        parallel_mazes = self.parallel_mazes_entry.get() or "1"
+        if not parallel_mazes.isdigit() or int(parallel_mazes) < 1:
+            messagebox.showerror("Error", "Number of parallel mazes must be a positive integer.")
+            return
+
+        workers = self.workers_entry.get() or "1"
+        if not workers.isdigit() or int(workers) < 1:
+            messagebox.showerror("Error", "Number of worker processes must be a positive integer.")
+            return
+
         profile = self.controller.game_env.profile_manager.load_profile(selected_profile)
-        profile_index = self.controller.game_env.apply_profile(profile)
+        if profile.bot_type == "ValueIterationBot" and (int(parallel_mazes) > 1 or int(workers) > 1):
+            # Both train a Q-table, which a value iteration profile does not have
+            messagebox.showerror("Error", "Value iteration profiles train with 1 parallel maze and 1 worker process.")
+            return
+        if int(workers) > 1 and getattr(profile.config, 'q_table_backend', 'memory') != 'memory':
+            # Workers train copies of the in-memory table; ParallelTrainer cannot merge into the tiered store
+            messagebox.showerror("Error", "Worker processes need the in-memory Q-table backend; this profile uses the tiered backend.")
+            return
+        if int(parallel_mazes) > 1:
+            # Train the profile's Q-table on several mazes in lockstep
+            profile.config.num_envs = int(parallel_mazes)
+            profile_index = self.controller.game_env.apply_profile(profile, bot_type='VectorizedQLearningBot')
+        else:
+            profile_index = self.controller.game_env.apply_profile(profile)
 
         rounds = self.rounds_entry.get()
         if not rounds.isdigit():
@@ -309,14 +343,17 @@ class BotTrainingFrame(tk.Frame):
         self.training_progress['value'] = 0
         self.log_output.insert(tk.END, f"Training started for {selected_profile} with {rounds} rounds...\n")
 
-        training_thread = threading.Thread(target=self.run_training, args=(rounds, profile_index, selected_profile))
+        training_thread = threading.Thread(target=self.run_training, args=(rounds, profile_index, selected_profile, int(workers)))
         training_thread.start()
 
-    def run_training(self, rounds, profile_index, selected_profile):
-        profile_dir = f"{self.controller.game_env.profile_manager.profile_directory}/{selected_profile}"
-        for i in range(rounds):
-            self.controller.game_env.game_loop(1, profile_index, profile_dir)
-            self.controller.root.after(0, self.update_progress, i + 1, rounds)
+    def run_training(self, rounds, profile_index, selected_profile, workers=1):
+        progress_callback = lambda completed, total: self.controller.root.after(0, self.update_progress, completed, total)
+        if workers > 1:
+            # Worker processes train copies of the Q-table that are merged back into the profile
+            self.controller.game_env.parallel_game_loop(rounds, profile_index, workers, progress_callback=progress_callback)
+            return
+        # One call for the whole run, so checkpoints keep their configured cadence and are flushed once at the end
+        self.controller.game_env.game_loop(rounds, profile_index, progress_callback=progress_callback)
 
     def update_progress(self, completed_rounds, total_rounds):
         self.training_progress['value'] = completed_rounds
@@ -376,12 +413,10 @@ class VisualizationWindow(tk.Toplevel):
         cell_width = self.canvas.winfo_width() / maze.width
         cell_height = self.canvas.winfo_height() / maze.height
 
-        for y in range(maze.height):
-            for x in range(maze.width):
-                if maze.grid[y][x] == 1:
-                    self.canvas.create_rectangle(x * cell_width, y * cell_height,
-                                                 (x + 1) * cell_width, (y + 1) * cell_height,
-                                                 fill="black")
+        for y, x in np.argwhere(maze.grid == 1):
+            self.canvas.create_rectangle(x * cell_width, y * cell_height,
+                                         (x + 1) * cell_width, (y + 1) * cell_height,
+                                         fill="black")
 
         start = maze.get_start()
         end = maze.end
@@ -411,19 +446,15 @@ class VisualizationWindow(tk.Toplevel):
         max_heat = heatmap.max() if heatmap.max() > 0 else 1  # Avoid division by zero
         cmap = plt.cm.Reds
 
-        for y in range(maze.height):
-            for x in range(maze.width):
-                if maze.grid[y][x] == 1:
-                    self.canvas.create_rectangle(x * cell_width, y * cell_height,
-                                                 (x + 1) * cell_width, (y + 1) * cell_height,
-                                                 fill="black")
-                else:
-                    heat_value = heatmap[y, x] / max_heat
-                    if heat_value > 0:
-                        color = mcolors.to_hex(cmap(heat_value))
-                        self.canvas.create_rectangle(x * cell_width, y * cell_height,
-                                                     (x + 1) * cell_width, (y + 1) * cell_height,
-                                                     fill=color, outline=color)
+        for y, x in np.argwhere(maze.grid == 1):
+            self.canvas.create_rectangle(x * cell_width, y * cell_height,
+                                         (x + 1) * cell_width, (y + 1) * cell_height,
+                                         fill="black")
+        for y, x in np.argwhere((maze.grid == 0) & (heatmap > 0)):
+            color = mcolors.to_hex(cmap(heatmap[y, x] / max_heat))
+            self.canvas.create_rectangle(x * cell_width, y * cell_height,
+                                         (x + 1) * cell_width, (y + 1) * cell_height,
+                                         fill=color, outline=color)
 
         start = maze.get_start()
         end = maze.end
@@ -452,6 +483,8 @@ class VisualizationFrame(tk.Frame):
         self.controller = controller
         self.visualization_strategies = {
             'QLearningBot': QLearningBotVisualizationStrategy(),
+            'VectorizedQLearningBot': QLearningBotVisualizationStrategy(),
+            'ValueIterationBot': ValueIterationBotVisualizationStrategy(),
             # Add other bot types and their strategies here
         }
         self.canvas_agg = None # Store the reference to the canvas object
@@ -522,27 +555,21 @@ class VisualizationFrame(tk.Frame):
         if maze is None:
             return
 
-        maze_width = len(maze[0])
-        maze_height = len(maze)
+        maze = np.asarray(maze, dtype=np.uint8)
+        maze_height, maze_width = maze.shape
         cell_width = canvas.winfo_width() / maze_width
         cell_height = canvas.winfo_height() / maze_height
 
-        heatmap = np.zeros((maze_height, maze_width))
-        for (x, y), count in heatmap_data.items():
-            heatmap[x, y] = count
+        heatmap = MazeSnapshot.dense_heatmap(heatmap_data, maze.shape)
 
         max_heat = heatmap.max() if heatmap.max() > 0 else 1
         cmap = plt.cm.Reds
 
-        for y in range(maze_height):
-            for x in range(maze_width):
-                if maze[y][x] == 1:
-                    canvas.create_rectangle(x * cell_width, y * cell_height, (x + 1) * cell_width, (y + 1) * cell_height, fill="black")
-                else:
-                    heat_value = heatmap[y, x] / max_heat
-                    if heat_value > 0:
-                        color = mcolors.to_hex(cmap(heat_value))
-                        canvas.create_rectangle(x * cell_width, y * cell_height, (x + 1) * cell_width, (y + 1) * cell_height, fill=color, outline=color)
+        for y, x in np.argwhere(maze == 1):
+            canvas.create_rectangle(x * cell_width, y * cell_height, (x + 1) * cell_width, (y + 1) * cell_height, fill="black")
+        for y, x in np.argwhere((maze == 0) & (heatmap > 0)):
+            color = mcolors.to_hex(cmap(heatmap[y, x] / max_heat))
+            canvas.create_rectangle(x * cell_width, y * cell_height, (x + 1) * cell_width, (y + 1) * cell_height, fill=color, outline=color)
 
         canvas.create_rectangle(start[1] * cell_width, start[0] * cell_height, (start[1] + 1) * cell_width, (start[0] + 1) * cell_height, fill="blue")
         canvas.create_rectangle(end[1] * cell_width, end[0] * cell_height, (end[1] + 1) * cell_width, (end[0] + 1) * cell_height, fill="green")
@@ -567,9 +594,7 @@ class VisualizationFrame(tk.Frame):
     def display_statistics(self, bot, profile_index):
         statistics = bot.statistics
         self.statistics_output.delete("1.0", tk.END)
-        profile_pkl_path = f"profiles/{bot.profile_name}/profile.pkl"
-        with open(profile_pkl_path, 'rb') as file:
-            profile_data = pickle.load(file)
+        profile_data = statistics.get_profile_counters(bot.profile_name)
         self.statistics_output.insert(tk.END, f"Total Steps: {profile_data.get('total_steps', 0)}\n")
         self.statistics_output.insert(tk.END, f"Non-Repeating Steps: {profile_data.get('non_repeating_steps_taken', 0)}\n")
         self.statistics_output.insert(tk.END, f"Times Revisited Squares: {profile_data.get('times_revisited_squares', 0)}\n")
@@ -578,23 +603,17 @@ class VisualizationFrame(tk.Frame):
     def display_reward_graph(self, bot):
         if self.canvas_agg:
             self.canvas_agg.get_tk_widget().destroy()
-        reward_filenames = [f'profiles/{bot.profile_name}/SimulationRewards.txt']
+        # Older profiles keep their rewards in SimulationRewards.txt until they log an episode; new
+        # profiles have no such file, and an empty or missing episode log plots as an empty graph
+        episode_log = f'profiles/{bot.profile_name}/episodes.bin'
+        legacy_rewards = f'profiles/{bot.profile_name}/SimulationRewards.txt'
+        has_records = os.path.exists(episode_log) and os.path.getsize(episode_log) > EpisodeLog.FILE_HEADER.size
+        reward_filenames = [legacy_rewards if not has_records and os.path.exists(legacy_rewards) else episode_log]
         grapher = RewardGrapher(reward_filenames)
         self.canvas_agg = grapher.run(self.reward_canvas)
 
     def get_top_q_values(self, bot, profile_index, n=10):
-        q_table_items = bot.q_learning.q_table.items()
-        top_items = []
-        for item in q_table_items:
-            q_value = np.max(item[1])
-            if len(top_items) < n:
-                top_items.append((q_value, item))
-                top_items.sort(reverse=True, key=lambda x: x[0])
-            else:
-                if q_value > top_items[-1][0]:
-                    top_items[-1] = (q_value, item)
-                    top_items.sort(reverse=True, key=lambda x: x[0])
-        return top_items
+        return bot.q_learning.q_table.top_states(n)
 
     def get_action_label(self, action_index):
         action_labels = ["Up", "Down", "Left", "Right"]
@@ -0,0 +1,71 @@
+import multiprocessing
+import queue
+import random
+
+from Maze import Maze
+
+
+def _fill_pool(width, height, seed, layouts):
+    """
+    Worker process entry point: generate mazes forever and queue their layouts.
+    The queue is bounded, so the worker blocks once the pool is full.
+    """
+    rng = random.Random(seed)
+    maze = Maze(width, height, rng=rng)
+    while True:
+        layouts.put(maze.export_layout())
+        # Every pooled maze is drawn from the base size the pool was created with
+        maze.width, maze.height = width, height
+        maze.setup_simple_maze(rng)
+
+
+class MazePool:
+    def __init__(self, width, height, size=4, seed=None):
+        """
+        Initialize a pool of mazes generated ahead of time by a background process.
+
+        :param width: Base width of the generated mazes.
+        :param height: Base height of the generated mazes.
+        :param size: Maximum number of ready mazes kept in the pool.
+        :param seed: Seed for maze generation. The same seed always gives the same sequence of mazes.
+        """
+        self.width = width
+        self.height = height
+        self.size = size
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self._context = multiprocessing.get_context('spawn')
+        self._layouts = None
+        self._worker = None
+
+    def start(self):
+        """Start the background worker if it is not already running."""
+        if self._worker is not None:
+            return
+        self._layouts = self._context.Queue(maxsize=self.size)
+        self._worker = self._context.Process(target=_fill_pool, args=(self.width, self.height, self.seed, self._layouts), daemon=True)
+        self._worker.start()
+
+    def get(self):
+        """
+        Take the next ready maze layout from the pool, waiting for the worker if the pool is empty.
+
+        :return: A layout dict as produced by Maze.export_layout, to be passed to Maze.apply_layout.
+        :raises RuntimeError: If the worker process has stopped.
+        """
+        self.start()
+        while True:
+            try:
+                return self._layouts.get(timeout=1)
+            except queue.Empty:
+                if not self._worker.is_alive():
+                    raise RuntimeError("Maze pool worker stopped unexpectedly")
+
+    def close(self):
+        """Stop the background worker and release the queue."""
+        if self._worker is None:
+            return
+        self._worker.terminate()
+        self._worker.join()
+        self._layouts.close()
+        self._worker = None
+        self._layouts = None
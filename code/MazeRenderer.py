@@ -0,0 +1,66 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+class MazeRenderer:
+    def __init__(self, maze):
+        """
+        Initialize the renderer for a maze. The matplotlib figure is only created when first needed.
+
+        :param maze: The maze instance to draw.
+        """
+        self.maze = maze
+        self._fig = None
+        self._ax = None
+
+    def _ensure_figure(self):
+        """Create the figure and axes for reuse the first time they are needed."""
+        if self._fig is None:
+            self._fig, self._ax = plt.subplots()
+            plt.ion() # Enable interactive mode for live plotting
+
+    @property
+    def fig(self):
+        """Get the figure, creating it on first access."""
+        self._ensure_figure()
+        return self._fig
+
+    @property
+    def ax(self):
+        """Get the axes, creating the figure on first access."""
+        self._ensure_figure()
+        return self._ax
+
+    def display_with_bot(self, bot_position, canvas):
+        """
+        Display the maze with the bot's current position highlighted on the canvas.
+        """
+        canvas.delete("all")
+        cell_width = canvas.winfo_width() / self.maze.width
+        cell_height = canvas.winfo_height() / self.maze.height
+
+        for y, x in np.argwhere(self.maze.grid == 1):
+            canvas.create_rectangle(x * cell_width, y * cell_height,
+                                    (x + 1) * cell_width, (y + 1) * cell_height,
+                                    fill="black")
+
+        start = self.maze.get_start()
+        end = self.maze.end
+
+        canvas.create_rectangle(start[1] * cell_width, start[0] * cell_height,
+                                (start[1] + 1) * cell_width, (start[0] + 1) * cell_height,
+                                fill="blue")
+
+        canvas.create_rectangle(end[1] * cell_width, end[0] * cell_height,
+                                (end[1] + 1) * cell_width, (end[0] + 1) * cell_height,
+                                fill="green")
+
+        canvas.create_oval(bot_position[1] * cell_width, bot_position[0] * cell_height,
+                        (bot_position[1] + 1) * cell_width, (bot_position[0] + 1) * cell_height,
+                        fill="red")
+    
+    def finalize_display(self):
+        """Finalize the display by turning off interactive mode and showing the plot."""
+        self._ensure_figure()
+        plt.ioff()
+        plt.show()
@@ -0,0 +1,158 @@
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class MazeSnapshot:
+    """
+    Compact binary format for the latest, highest and lowest reward maze snapshots of a profile.
+
+    The file starts with a small header (magic, version) followed by one record per snapshot, in
+    SNAPSHOT_NAMES order. Each record has a fixed-size header (present flag, height, width, start,
+    end, reward) followed, if present, by the grid packed one bit per cell and the heatmap as a dense
+    little-endian int32 array. Records are read with np.frombuffer straight from the file bytes.
+    """
+
+    MAGIC = b"MZSN"
+    VERSION = 1
+    SNAPSHOT_NAMES = ("latest", "highest", "lowest")
+    FILE_HEADER = struct.Struct("<4sH")
+    RECORD_HEADER = struct.Struct("<B3xIIiiiid")
+    EMPTY_REWARDS = {"latest": 0.0, "highest": float('-inf'), "lowest": float('inf')}
+
+    @staticmethod
+    def dense_heatmap(heatmap_data, shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Convert heatmap data (a dict or dict view of position -> count, or an array) into a dense int32 array.
+
+        :param heatmap_data: The visit counts to convert.
+        :param shape: The (height, width) of the maze.
+        :return: An int32 array of the given shape.
+        """
+        dense = getattr(heatmap_data, 'heatmap', heatmap_data)  # Dense counts behind a BotStatistics view
+        if isinstance(dense, np.ndarray) and dense.shape == tuple(shape):
+            return np.ascontiguousarray(dense, dtype=np.int32)
+        heatmap = np.zeros(shape, dtype=np.int32)
+        if isinstance(heatmap_data, np.ndarray):
+            rows, cols = min(shape[0], heatmap_data.shape[0]), min(shape[1], heatmap_data.shape[1])
+            heatmap[:rows, :cols] = heatmap_data[:rows, :cols]
+        elif heatmap_data:
+            positions = np.array(list(heatmap_data.keys()), dtype=np.intp)
+            heatmap[positions[:, 0], positions[:, 1]] = list(heatmap_data.values())
+        return heatmap
+
+    @staticmethod
+    def encode(grid, start, end, heatmap_data, reward: float) -> bytes:
+        """
+        Encode one maze snapshot as a record.
+
+        :param grid: The maze grid (array or list of lists, 1 is a wall).
+        :param start: The start position.
+        :param end: The goal position.
+        :param heatmap_data: The visit counts, as a dict or a dense array.
+        :param reward: The total reward of the episode.
+        :return: The encoded record.
+        """
+        grid = np.asarray(grid, dtype=np.uint8)
+        height, width = grid.shape
+        header = MazeSnapshot.RECORD_HEADER.pack(1, height, width, start[0], start[1], end[0], end[1], reward)
+        heatmap = MazeSnapshot.dense_heatmap(heatmap_data, grid.shape).astype('<i4', copy=False)
+        return header + np.packbits(grid, axis=None).tobytes() + heatmap.tobytes()
+
+    @staticmethod
+    def encode_empty(reward: float) -> bytes:
+        """Encode a placeholder record for a snapshot that has not been recorded yet."""
+        return MazeSnapshot.RECORD_HEADER.pack(0, 0, 0, 0, 0, 0, 0, reward)
+
+    @staticmethod
+    def _record_size(height: int, width: int) -> int:
+        cells = height * width
+        return MazeSnapshot.RECORD_HEADER.size + (cells + 7) // 8 + 4 * cells
+
+    @staticmethod
+    def read_records(file_path: str) -> Optional[Dict[str, Tuple[float, bytes]]]:
+        """
+        Read the raw records of a snapshot file without decoding the grids or heatmaps.
+
+        :param file_path: Path to the snapshot file.
+        :return: A dict mapping snapshot name to (reward, raw record bytes), or None if the file is missing or invalid.
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                buffer = f.read()
+        except FileNotFoundError:
+            return None
+        if len(buffer) < MazeSnapshot.FILE_HEADER.size:
+            return None
+        magic, version = MazeSnapshot.FILE_HEADER.unpack_from(buffer)
+        if magic != MazeSnapshot.MAGIC or version != MazeSnapshot.VERSION:
+            return None
+
+        records = {}
+        offset = MazeSnapshot.FILE_HEADER.size
+        for name in MazeSnapshot.SNAPSHOT_NAMES:
+            present, height, width, *_, reward = MazeSnapshot.RECORD_HEADER.unpack_from(buffer, offset)
+            size = MazeSnapshot._record_size(height, width) if present else MazeSnapshot.RECORD_HEADER.size
+            records[name] = (reward, buffer[offset:offset + size])
+            offset += size
+        return records
+
+    @staticmethod
+    def decode(record: bytes) -> Dict[str, Any]:
+        """
+        Decode a raw record into the snapshot dict used by the GUI.
+
+        :param record: Raw record bytes as returned by read_records.
+        :return: A dict with "maze" (uint8 array), "start", "end", "heatmap_data" (int32 array) and "reward";
+                 only "reward" for an empty record.
+        """
+        present, height, width, start_x, start_y, end_x, end_y, reward = MazeSnapshot.RECORD_HEADER.unpack_from(record)
+        if not present:
+            return {"reward": reward}
+
+        cells = height * width
+        offset = MazeSnapshot.RECORD_HEADER.size
+        packed = np.frombuffer(record, dtype=np.uint8, count=(cells + 7) // 8, offset=offset)
+        grid = np.unpackbits(packed, count=cells).reshape(height, width)
+        offset += packed.size
+        heatmap = np.frombuffer(record, dtype='<i4', count=cells, offset=offset).reshape(height, width)
+        return {
+            "maze": grid,
+            "start": (start_x, start_y),
+            "end": (end_x, end_y),
+            "heatmap_data": heatmap,
+            "reward": reward
+        }
+
+    @staticmethod
+    def write(file_path: str, records: Dict[str, bytes]) -> None:
+        """
+        Atomically write a snapshot file.
+
+        :param file_path: Path to the snapshot file.
+        :param records: Raw records by snapshot name; missing names are written as empty records.
+        """
+        directory = os.path.dirname(file_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, dir=directory) as tmp_file:
+            tmp_file.write(MazeSnapshot.FILE_HEADER.pack(MazeSnapshot.MAGIC, MazeSnapshot.VERSION))
+            for name in MazeSnapshot.SNAPSHOT_NAMES:
+                tmp_file.write(records.get(name) or MazeSnapshot.encode_empty(MazeSnapshot.EMPTY_REWARDS[name]))
+            temp_name = tmp_file.name
+        os.replace(temp_name, file_path)
+
+    @staticmethod
+    def load(file_path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Load and decode all snapshots in a file.
+
+        :param file_path: Path to the snapshot file.
+        :return: A dict mapping snapshot name to its decoded dict, or None if the file is missing or invalid.
+        """
+        records = MazeSnapshot.read_records(file_path)
+        if records is None:
+            return None
+        return {name: MazeSnapshot.decode(record) for name, (_, record) in records.items()}
@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import random
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from BotStatistics import BotStatistics
+from EpisodeLog import EpisodeLog
+from MazeSnapshot import MazeSnapshot
+from QLearningBot import QLearning
+from QTable import QTable
+
+
+def _train_worker(profile_name, bot_type, config, reward_config, width, height, episodes, seed, table_state):
+    """
+    Worker process entry point: train a local copy of the Q-table for a number of episodes.
+
+    The worker runs in a scratch directory holding a copy of the profile, so the episode bookkeeping
+    of run_episode never touches the real profile; it is sent back and merged by the ParallelTrainer.
+
+    :return: A dict with the Q-table rows updated during the episodes ("keys", "values", "visits"),
+             the episode log records and the raw maze snapshot records.
+    """
+    from GameEnvironment import GameEnvironment  # Imported here, GameEnvironment imports this module
+
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='puzzleai-worker-') as scratch_dir:
+        os.chdir(scratch_dir)
+        try:
+            profile_dir = f"profiles/{profile_name}"
+            q_learning = QLearning(config)
+            q_learning.q_table = QTable.from_state(table_state)
+            q_learning.save_q_table(profile_name)
+            MazeSnapshot.write(f"{profile_dir}/mazes.bin", {})
+
+            env = GameEnvironment(width, height)
+            statistics = BotStatistics()
+            env.setup_bots(bot_type, profile_name, config, reward_config, statistics, {})
+            q_table = env.bots[0].q_learning.q_table
+            q_table.visits[:] = 0  # Only count the updates made by this worker
+            env.game_loop(episodes, 0)
+            statistics.flush_profile_data(profile_name, close=True)  # The scratch directory is removed next
+
+            q_table = env.bots[0].q_learning.q_table
+            touched = np.flatnonzero(q_table.visits[:len(q_table)].any(axis=1))
+            return {
+                'keys': [q_table.state_keys[i] for i in touched],
+                'values': q_table.q_values[touched],
+                'visits': q_table.visits[touched],
+                'episodes': EpisodeLog.read(f"{profile_dir}/episodes.bin"),
+                'maze_records': MazeSnapshot.read_records(f"{profile_dir}/mazes.bin"),
+            }
+        finally:
+            os.chdir(cwd)
+
+
+class MergeRule(ABC):
+    def __init__(self, base: np.ndarray):
+        """
+        Initialize a merge of worker Q-values into the master table.
+
+        :param base: The master Q-values the workers started from, one row per master state id.
+        """
+        self.base = base
+
+    @abstractmethod
+    def add(self, state_ids: np.ndarray, values: np.ndarray, visits: np.ndarray) -> None:
+        """
+        Add the rows one worker updated.
+
+        :param state_ids: Master state ids of the rows.
+        :param values: The worker's Q-values of the rows.
+        :param visits: The number of updates the worker applied to each state-action pair.
+        """
+        pass
+
+    @abstractmethod
+    def merged(self) -> np.ndarray:
+        """Get the merged Q-values, aligned with base."""
+        pass
+
+
+class VisitWeightedMerge(MergeRule):
+    """Average the workers' changes to each state-action pair, weighted by how often each worker updated it."""
+
+    def __init__(self, base):
+        super().__init__(base)
+        self.weighted_deltas = np.zeros(base.shape, dtype=np.float64)
+        self.weights = np.zeros(base.shape, dtype=np.float64)
+
+    def add(self, state_ids, values, visits):
+        self.weighted_deltas[state_ids] += visits * (values - self.base[state_ids])
+        self.weights[state_ids] += visits
+
+    def merged(self):
+        deltas = np.divide(self.weighted_deltas, self.weights, out=np.zeros_like(self.weighted_deltas), where=self.weights > 0)
+        return self.base + deltas
+
+
+class MaxDeltaMerge(MergeRule):
+    """Keep, for each state-action pair, the worker value that moved furthest from the master value."""
+
+    def __init__(self, base):
+        super().__init__(base)
+        self.best_deltas = np.zeros(base.shape, dtype=np.float64)
+
+    def add(self, state_ids, values, visits):
+        deltas = np.where(visits > 0, values - self.base[state_ids], 0)
+        current = self.best_deltas[state_ids]
+        self.best_deltas[state_ids] = np.where(np.abs(deltas) > np.abs(current), deltas, current)
+
+    def merged(self):
+        return self.base + self.best_deltas
+
+
+# Merge rules selectable by name through ParallelTrainer
+merge_rules = {
+    'visit_weighted': VisitWeightedMerge,
+    'max_delta': MaxDeltaMerge,
+}
+
+
+class ParallelTrainer:
+    def __init__(self, workers: Optional[int] = None, merge_interval: int = 5, merge_rule: str = 'visit_weighted'):
+        """
+        Initialize a trainer that runs episodes in a pool of worker processes.
+
+        Every round each worker trains a copy of the master Q-table for merge_interval episodes on its
+        own mazes; the updated rows are then merged back into the master table with the merge rule,
+        and the rewards, counters and maze snapshots of the workers are added to the profile.
+
+        :param workers: Number of worker processes; defaults to the number of CPUs.
+        :param merge_interval: Episodes each worker runs between merges.
+        :param merge_rule: Name of the rule in merge_rules used to combine the worker tables.
+        """
+        if merge_rule not in merge_rules:
+            raise ValueError(f"Unknown merge rule: {merge_rule}")
+        self.workers = workers or os.cpu_count() or 1
+        self.merge_interval = max(1, merge_interval)
+        self.merge_rule = merge_rule
+
+    def train(self, bot, episodes: int, width: int, height: int, bot_type: Optional[str] = None,
+              progress_callback: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Train a bot's Q-table and save the result to its profile.
+
+        :param bot: The Q-learning bot whose table is the master table.
+        :param episodes: Total number of episodes to run across all workers.
+        :param width: Base width of the worker mazes.
+        :param height: Base height of the worker mazes.
+        :param bot_type: Registered bot type the workers run; defaults to the type of bot.
+        :param progress_callback: Called with (completed episodes, total episodes) after every merge.
+        """
+        if bot.q_learning.q_table_backend != 'memory':
+            raise ValueError("Parallel training needs the in-memory Q-table backend")
+        bot_type = bot_type or type(bot).__name__
+        seed = random.randrange(2 ** 32)
+        completed = 0
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            while completed < episodes:
+                table_state = bot.q_learning.q_table.to_state()
+                batches = [min(self.merge_interval, episodes - completed - worker * self.merge_interval) for worker in range(self.workers)]
+                futures = [
+                    executor.submit(_train_worker, bot.profile_name, bot_type, bot.config, bot.reward_system.reward_config,
+                                    width, height, batch, seed + completed + worker, table_state)
+                    for worker, batch in enumerate(batches) if batch > 0
+                ]
+                results = [future.result() for future in futures]
+
+                self.merge(bot.q_learning.q_table, results)
+                self._save_results(bot, results)
+                bot.q_learning.save_q_table(bot.profile_name, wait=False)  # Written while the workers train the next round
+                completed += sum(batch for batch in batches if batch > 0)
+                if progress_callback:
+                    progress_callback(completed, episodes)
+        bot.q_learning.flush_checkpoints()
+        bot.statistics.flush_profile_data(bot.profile_name)
+
+    def merge(self, q_table: QTable, results: List[Dict[str, Any]]) -> None:
+        """Merge the rows updated by the workers into the master table in place."""
+        worker_ids = [np.array([q_table.row_id(key) for key in result['keys']], dtype=np.int64) for result in results]
+        size = len(q_table)
+        rule = merge_rules[self.merge_rule](q_table.q_values[:size].astype(np.float64))
+        for state_ids, result in zip(worker_ids, results):
+            if len(state_ids):
+                rule.add(state_ids, result['values'], result['visits'])
+                q_table.visits[state_ids] += result['visits']
+        q_table.q_values[:size] = rule.merged()
+
+    @staticmethod
+    def _save_results(bot, results: List[Dict[str, Any]]) -> None:
+        """Add the episode bookkeeping of the workers to the bot's profile."""
+        for result in results:
+            if result['episodes'] is not None:
+                bot.statistics.log_episodes(bot.profile_name, result['episodes'])
+            if result['maze_records'] is not None:
+                bot.statistics.merge_maze_records(bot.profile_name, result['maze_records'])
@@ -1,45 +1,319 @@
 import heapq
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import List, Optional, Tuple
 import numpy as np
 
-class Pathfinding:
+
+class PathfindingEngine(ABC):
+    """
+    Base class for shortest-path searches over a maze.
+
+    Engines work on a flat byte view of the grid (0 is an open path, 1 is a wall) indexed by
+    x * width + y, so neighbor checks are plain sequence lookups instead of maze method calls.
+    """
+
+    @abstractmethod
+    def find_path(self, maze, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Find a shortest path between two positions.
+
+        :param maze: The maze to search.
+        :param start: The start position.
+        :param goal: The goal position.
+        :return: The path as a list of positions including both ends, or an empty list if unreachable.
+        """
+        pass
+
     @staticmethod
-    def a_star_search(maze, start, goal):
-        def heuristic(a, b):
-            return np.linalg.norm(np.array(a) - np.array(b))
-        
-        def get_neighbors(pos):
-            neighbors = []
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-            for dx, dy in directions:
-                x2, y2 = pos[0] + dx, pos[1] + dy
-                if 0 <= x2 < maze.height and 0 <= y2 < maze.width and maze.is_valid_position(None, x2, y2):
-                    neighbors.append((x2, y2))
-            return neighbors
-
-        open_list = []
-        heapq.heappush(open_list, (0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-        
+    def flatten_grid(maze) -> bytes:
+        """Get the maze grid as a flat bytes object in row-major order."""
+        return np.ascontiguousarray(maze.grid, dtype=np.uint8).tobytes()
+
+    @staticmethod
+    def _open_neighbors(grid, index, width, height):
+        """Yield the flat indices of the open cells next to index."""
+        x, y = divmod(index, width)
+        if x > 0 and not grid[index - width]:
+            yield index - width
+        if x < height - 1 and not grid[index + width]:
+            yield index + width
+        if y > 0 and not grid[index - 1]:
+            yield index - 1
+        if y < width - 1 and not grid[index + 1]:
+            yield index + 1
+
+    @staticmethod
+    def _build_path(came_from, goal_index, width):
+        """Walk the came_from links back from the goal and return the path in start-to-goal order."""
+        path = []
+        current = goal_index
+        while current != -1:
+            path.append(divmod(current, width))
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    @staticmethod
+    def _is_open(grid, position, width, height):
+        """Check that a position is inside the grid and not a wall."""
+        return 0 <= position[0] < height and 0 <= position[1] < width and not grid[position[0] * width + position[1]]
+
+
+class AStarEngine(PathfindingEngine):
+    """A* with an integer Manhattan-distance heuristic."""
+
+    def find_path(self, maze, start, goal):
+        width, height = maze.width, maze.height
+        grid = self.flatten_grid(maze)
+        if not (self._is_open(grid, start, width, height) and self._is_open(grid, goal, width, height)):
+            return []
+
+        start_index = start[0] * width + start[1]
+        goal_index = goal[0] * width + goal[1]
+        goal_x, goal_y = goal
+        came_from = {start_index: -1}
+        cost_so_far = {start_index: 0}
+        open_list = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), start_index)]
+
         while open_list:
             _, current = heapq.heappop(open_list)
-            
-            if current == goal:
-                break
-            
-            for neighbor in get_neighbors(current):
-                new_cost = cost_so_far[current] + 1
+            if current == goal_index:
+                return self._build_path(came_from, goal_index, width)
+
+            new_cost = cost_so_far[current] + 1
+            for neighbor in self._open_neighbors(grid, current, width, height):
                 if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
                     cost_so_far[neighbor] = new_cost
-                    priority = new_cost + heuristic(goal, neighbor)
-                    heapq.heappush(open_list, (priority, neighbor))
                     came_from[neighbor] = current
+                    x, y = divmod(neighbor, width)
+                    heapq.heappush(open_list, (new_cost + abs(x - goal_x) + abs(y - goal_y), neighbor))
+        return []
 
-        path = []
-        current = goal
-        while current != start:
+
+class BFSEngine(PathfindingEngine):
+    """Plain breadth-first search; optimal on the uniform-cost maze grid."""
+
+    def find_path(self, maze, start, goal):
+        width, height = maze.width, maze.height
+        grid = self.flatten_grid(maze)
+        if not (self._is_open(grid, start, width, height) and self._is_open(grid, goal, width, height)):
+            return []
+
+        start_index = start[0] * width + start[1]
+        goal_index = goal[0] * width + goal[1]
+        came_from = {start_index: -1}
+        queue = deque([start_index])
+        while queue:
+            current = queue.popleft()
+            if current == goal_index:
+                return self._build_path(came_from, goal_index, width)
+            for neighbor in self._open_neighbors(grid, current, width, height):
+                if neighbor not in came_from:
+                    came_from[neighbor] = current
+                    queue.append(neighbor)
+        return []
+
+
+class BidirectionalBFSEngine(PathfindingEngine):
+    """Breadth-first search run from both ends, always expanding the smaller frontier by one level."""
+
+    def find_path(self, maze, start, goal):
+        width, height = maze.width, maze.height
+        grid = self.flatten_grid(maze)
+        if not (self._is_open(grid, start, width, height) and self._is_open(grid, goal, width, height)):
+            return []
+
+        start_index = start[0] * width + start[1]
+        goal_index = goal[0] * width + goal[1]
+        if start_index == goal_index:
+            return [start]
+
+        forward = {start_index: -1}
+        backward = {goal_index: -1}
+        forward_frontier = [start_index]
+        backward_frontier = [goal_index]
+
+        while forward_frontier and backward_frontier:
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            frontier = forward_frontier if expand_forward else backward_frontier
+            visited, other = (forward, backward) if expand_forward else (backward, forward)
+
+            meeting_point = None
+            next_frontier = []
+            for current in frontier:
+                for neighbor in self._open_neighbors(grid, current, width, height):
+                    if neighbor in visited:
+                        continue
+                    visited[neighbor] = current
+                    if neighbor in other:
+                        meeting_point = neighbor
+                        break
+                    next_frontier.append(neighbor)
+                if meeting_point is not None:
+                    break
+
+            if meeting_point is not None:
+                path = self._build_path(forward, meeting_point, width)
+                current = backward[meeting_point]
+                while current != -1:
+                    path.append(divmod(current, width))
+                    current = backward[current]
+                return path
+
+            if expand_forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return []
+
+
+class JumpPointSearchEngine(PathfindingEngine):
+    """
+    Jump point search for the 4-connected grid.
+
+    Straight moves are expanded as jumps that only stop at the goal or at a cell with an open side
+    passage, so A* only ever queues corridor junctions. Jumps into dead ends are discarded.
+    """
+
+    def find_path(self, maze, start, goal):
+        width, height = maze.width, maze.height
+        grid = self.flatten_grid(maze)
+        if not (self._is_open(grid, start, width, height) and self._is_open(grid, goal, width, height)):
+            return []
+
+        start_index = start[0] * width + start[1]
+        goal_index = goal[0] * width + goal[1]
+        goal_x, goal_y = goal
+        came_from = {start_index: -1}
+        cost_so_far = {start_index: 0}
+        open_list = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), start_index)]
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current == goal_index:
+                return self._expand_jumps(came_from, goal_index, width)
+
+            x, y = divmod(current, width)
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                jump = self._jump(grid, x, y, dx, dy, goal_index, width, height)
+                if jump is None:
+                    continue
+                jump_point, distance = jump
+                new_cost = cost_so_far[current] + distance
+                if jump_point not in cost_so_far or new_cost < cost_so_far[jump_point]:
+                    cost_so_far[jump_point] = new_cost
+                    came_from[jump_point] = current
+                    jx, jy = divmod(jump_point, width)
+                    heapq.heappush(open_list, (new_cost + abs(jx - goal_x) + abs(jy - goal_y), jump_point))
+        return []
+
+    @staticmethod
+    def _jump(grid, x, y, dx, dy, goal_index, width, height) -> Optional[Tuple[int, int]]:
+        """
+        Move in a straight line from (x, y) until reaching the goal or a cell with an open side passage.
+
+        :return: A tuple of (jump point index, distance travelled), or None if the ray ends in a dead end.
+        """
+        distance = 0
+        while True:
+            x, y = x + dx, y + dy
+            if not (0 <= x < height and 0 <= y < width):
+                return None
+            index = x * width + y
+            if grid[index]:
+                return None
+            distance += 1
+            if index == goal_index:
+                return index, distance
+            if dx:
+                side_open = (y > 0 and not grid[index - 1]) or (y < width - 1 and not grid[index + 1])
+            else:
+                side_open = (x > 0 and not grid[index - width]) or (x < height - 1 and not grid[index + width])
+            if side_open:
+                return index, distance
+
+    @staticmethod
+    def _expand_jumps(came_from, goal_index, width):
+        """Rebuild the full cell-by-cell path from the chain of jump points."""
+        jump_points = PathfindingEngine._build_path(came_from, goal_index, width)
+        path = [jump_points[0]]
+        for (x2, y2) in jump_points[1:]:
+            x, y = path[-1]
+            dx, dy = (x2 > x) - (x2 < x), (y2 > y) - (y2 < y)
+            while (x, y) != (x2, y2):
+                x, y = x + dx, y + dy
+                path.append((x, y))
+        return path
+
+
+# Engines selectable by name, e.g. BotTools(maze, pathfinding_engine='jps')
+pathfinding_engines = {
+    'astar': AStarEngine,
+    'bfs': BFSEngine,
+    'bidirectional_bfs': BidirectionalBFSEngine,
+    'jps': JumpPointSearchEngine,
+}
+
+
+class Pathfinding:
+    @staticmethod
+    def a_star_search(maze, start, goal):
+        """Find a shortest path from start to goal with the default A* engine."""
+        return AStarEngine().find_path(maze, start, goal)
+
+    @staticmethod
+    def bfs_distance_field(maze, goal):
+        """
+        Compute the shortest-path distance from every cell to the goal with a single BFS.
+
+        :param maze: The maze to search.
+        :param goal: The goal position the distances are measured to.
+        :return: An int32 array of shape (height, width); walls and unreachable cells are -1.
+        """
+        height, width = maze.height, maze.width
+        if not maze.is_valid_position(goal[0], goal[1]):
+            return np.full((height, width), -1, dtype=np.int32)
+
+        # Work on flat Python sequences; per-element NumPy indexing is far slower in this loop
+        grid = PathfindingEngine.flatten_grid(maze)
+        distances = [-1] * (height * width)
+        goal_index = goal[0] * width + goal[1]
+        distances[goal_index] = 0
+        queue = deque([goal_index])
+        while queue:
+            index = queue.popleft()
+            next_distance = distances[index] + 1
+            x, y = divmod(index, width)
+            for neighbor, in_bounds in ((index - width, x > 0), (index + width, x < height - 1),
+                                        (index - 1, y > 0), (index + 1, y < width - 1)):
+                if in_bounds and not grid[neighbor] and distances[neighbor] == -1:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+        return np.array(distances, dtype=np.int32).reshape(height, width)
+
+    @staticmethod
+    def trace_path(distances, start):
+        """
+        Follow a distance field downhill from start to the cell it was rooted at.
+
+        :param distances: A distance field produced by bfs_distance_field.
+        :param start: The position to start tracing from.
+        :return: The path as a list of positions including both ends, or an empty list if unreachable.
+        """
+        if distances[start] < 0:
+            return []
+
+        height, width = distances.shape
+        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        path = [start]
+        current = start
+        while distances[current] > 0:
+            target = distances[current] - 1
+            for dx, dy in directions:
+                x2, y2 = current[0] + dx, current[1] + dy
+                if 0 <= x2 < height and 0 <= y2 < width and distances[x2, y2] == target:
+                    current = (x2, y2)
+                    break
             path.append(current)
-            current = came_from[current]
-        path.append(start)
-        path.reverse()
         return path
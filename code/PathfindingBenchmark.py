@@ -0,0 +1,67 @@
+# Times every pathfinding engine on corner-to-corner queries in mazes of increasing size,
+# next to the number of open cells and the length of the path found.
+# Used for comparing engines; not part of the main program.
+#
+# Usage: python PathfindingBenchmark.py [size ...]
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from Maze import Maze
+from Pathfinding import pathfinding_engines
+
+DEFAULT_SIZES = [10, 50, 100, 500, 1000, 2000]
+# Some seeds make setup_simple_maze carve a single short corridor; this one gives full mazes at the default sizes
+DEFAULT_SEED = 2
+
+
+def corner_query(maze):
+    """
+    Get the open cells nearest to the top-left and bottom-right corners of a maze. The maze's own
+    start and goal are only a fixed distance apart, so they would time the same short query at every size.
+    """
+    open_cells = np.argwhere(maze.grid == 0)
+    return tuple(int(v) for v in open_cells[0]), tuple(int(v) for v in open_cells[-1])
+
+
+def benchmark_engines(size, repeats=3, seed=DEFAULT_SEED):
+    """
+    Time each engine on the corner-to-corner query of a size x size maze.
+
+    :param size: Width and height passed to Maze.
+    :param repeats: Number of timed runs per engine; the best run is reported.
+    :param seed: Seed for maze generation, so every engine sees the same maze.
+    :return: The number of open cells of the maze, and a dict mapping engine name to (best time in seconds, path length).
+    """
+    random.seed(seed)
+    maze = Maze(size, size)
+    start, goal = corner_query(maze)
+    results = {}
+    for name, engine_class in pathfinding_engines.items():
+        engine = engine_class()
+        best = float('inf')
+        path = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            path = engine.find_path(maze, start, goal)
+            best = min(best, time.perf_counter() - started)
+        results[name] = (best, len(path))
+    return int((maze.grid == 0).sum()), results
+
+
+def main(sizes):
+    print(f"{'size':>6} {'open':>9} {'path':>7} " + " ".join(f"{name:>18}" for name in pathfinding_engines))
+    for size in sizes:
+        open_cells, results = benchmark_engines(size, repeats=1 if size >= 1000 else 3)
+        lengths = {length for _, length in results.values()}
+        if len(lengths) != 1:
+            print(f"Warning: engines disagree on the path length for size {size}: {results}")
+        path_length = max(lengths)
+        print(f"{size:>6} {open_cells:>9} {path_length:>7} " + " ".join(f"{results[name][0] * 1000:>15.2f} ms" for name in pathfinding_engines))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,130 @@
+import heapq
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+
+class PrioritizedSweeping:
+    def __init__(self, num_actions: int = 4, threshold: float = 1e-4):
+        """
+        Initialize a Dyna-Q planner with prioritized sweeping.
+
+        The planner learns a deterministic model of the environment from the real transitions: for
+        each (state id, action) pair the last observed reward and next state id, stored in arrays
+        aligned with the QTable rows. State-action pairs whose TD error exceeds the threshold are kept
+        in a priority queue, largest error first. Each planning round pops a batch of pairs, backs
+        them up in one vectorized update from the model, and queues the predecessors of the updated
+        states, so value changes sweep backwards from where they happened.
+
+        The model only lives as long as the planner; it is relearned when training resumes.
+
+        :param num_actions: Number of actions per state.
+        :param threshold: Smallest TD error that queues a state-action pair.
+        """
+        self.num_actions = num_actions
+        self.threshold = threshold
+        self.next_state_ids = np.full((0, num_actions), -1, dtype=np.int64)  # -1 where the pair was never tried
+        self.rewards = np.zeros((0, num_actions), dtype=np.float64)
+        # State id -> pairs (state id * num_actions + action) the model says lead to it
+        self.predecessors: Dict[int, Set[int]] = {}
+        self.queue: List[Tuple[float, int]] = []  # (-priority, pair) min-heap
+        self.queued: Dict[int, float] = {}  # Pair -> priority of its live heap entry; older entries are stale
+        self.backups = 0
+
+    def __len__(self) -> int:
+        return len(self.queued)
+
+    def _ensure_capacity(self, size: int) -> None:
+        if size > len(self.next_state_ids):
+            capacity = max(size, 2 * len(self.next_state_ids), 1024)
+            next_state_ids = np.full((capacity, self.num_actions), -1, dtype=np.int64)
+            rewards = np.zeros((capacity, self.num_actions), dtype=np.float64)
+            next_state_ids[:len(self.next_state_ids)] = self.next_state_ids
+            rewards[:len(self.rewards)] = self.rewards
+            self.next_state_ids, self.rewards = next_state_ids, rewards
+
+    def _priorities(self, q_values: np.ndarray, gamma: float, state_ids: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        """TD errors of state-action pairs under the model."""
+        targets = self.rewards[state_ids, actions] + gamma * q_values[self.next_state_ids[state_ids, actions]].max(axis=1)
+        return np.abs(targets - q_values[state_ids, actions])
+
+    def _push(self, pairs: np.ndarray, priorities: np.ndarray) -> None:
+        for pair, priority in zip(pairs.tolist(), priorities.tolist()):
+            if priority > self.threshold and priority > self.queued.get(pair, 0.0):
+                self.queued[pair] = priority
+                heapq.heappush(self.queue, (-priority, pair))
+
+    def observe(self, q_values: np.ndarray, gamma: float, state_ids, actions, rewards, next_state_ids) -> None:
+        """
+        Record real transitions (single values or arrays of QTable row ids) in the model and queue
+        them by their TD error.
+        """
+        state_ids, actions = np.atleast_1d(state_ids), np.atleast_1d(actions)
+        rewards, next_state_ids = np.atleast_1d(rewards), np.atleast_1d(next_state_ids)
+        self._ensure_capacity(int(max(state_ids.max(), next_state_ids.max())) + 1)
+
+        old_next_state_ids = self.next_state_ids[state_ids, actions]
+        self.rewards[state_ids, actions] = rewards
+        self.next_state_ids[state_ids, actions] = next_state_ids
+        pairs = state_ids * self.num_actions + actions
+        for pair, old_next, new_next in zip(pairs.tolist(), old_next_state_ids.tolist(), next_state_ids.tolist()):
+            if old_next != new_next:
+                if old_next >= 0:
+                    self.predecessors[old_next].discard(pair)
+                self.predecessors.setdefault(new_next, set()).add(pair)
+        self._push(pairs, self._priorities(q_values, gamma, state_ids, actions))
+
+    def plan(self, q_values: np.ndarray, learning_rate: float, gamma: float, backups: int) -> None:
+        """
+        Run up to a number of planning backups, highest priority first, as one batched update.
+        Planned updates are not counted in the table's visits.
+        """
+        pairs = []
+        while self.queue and len(pairs) < backups:
+            negative_priority, pair = heapq.heappop(self.queue)
+            if self.queued.get(pair) == -negative_priority:  # Skip entries superseded by a higher priority
+                del self.queued[pair]
+                pairs.append(pair)
+        if not pairs:
+            return
+        state_ids, actions = np.divmod(np.array(pairs, dtype=np.int64), self.num_actions)
+        targets = self.rewards[state_ids, actions] + gamma * q_values[self.next_state_ids[state_ids, actions]].max(axis=1)
+        q_values[state_ids, actions] += learning_rate * (targets - q_values[state_ids, actions])
+        self.backups += len(pairs)
+
+        predecessors = [pair for state_id in set(state_ids.tolist()) for pair in self.predecessors.get(state_id, ())]
+        if predecessors:
+            predecessor_pairs = np.array(predecessors, dtype=np.int64)
+            predecessor_ids, predecessor_actions = np.divmod(predecessor_pairs, self.num_actions)
+            self._push(predecessor_pairs, self._priorities(q_values, gamma, predecessor_ids, predecessor_actions))
+
+    def remap(self, id_map: np.ndarray) -> None:
+        """
+        Rewrite the model after the Q-table was compacted, dropping the transitions and queued pairs
+        of evicted states.
+
+        :param id_map: Array mapping old row ids to new ones, -1 for evicted states (see QTable.compact).
+        """
+        size = min(len(self.next_state_ids), len(id_map))
+        kept = np.flatnonzero(id_map[:size] >= 0)
+        new_ids = id_map[kept]
+        next_state_ids = np.full((max(int(new_ids.max()) + 1 if len(new_ids) else 0, 1024), self.num_actions), -1, dtype=np.int64)
+        rewards = np.zeros(next_state_ids.shape, dtype=np.float64)
+        old_next = self.next_state_ids[kept]
+        next_state_ids[new_ids] = np.where(old_next >= 0, id_map[np.maximum(old_next, 0)], -1)
+        rewards[new_ids] = self.rewards[kept]
+        self.next_state_ids, self.rewards = next_state_ids, rewards
+
+        self.predecessors = {}
+        tried_ids, tried_actions = np.nonzero(next_state_ids >= 0)
+        for state_id, action, next_state_id in zip(tried_ids.tolist(), tried_actions.tolist(), next_state_ids[tried_ids, tried_actions].tolist()):
+            self.predecessors.setdefault(next_state_id, set()).add(state_id * self.num_actions + action)
+
+        queued = {}
+        for pair, priority in self.queued.items():
+            state_id, action = divmod(pair, self.num_actions)
+            if state_id < len(id_map) and id_map[state_id] >= 0 and next_state_ids[id_map[state_id], action] >= 0:
+                queued[int(id_map[state_id]) * self.num_actions + action] = priority
+        self.queued = queued
+        self.queue = [(-priority, pair) for pair, priority in queued.items()]
+        heapq.heapify(self.queue)
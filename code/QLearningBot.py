@@ -1,18 +1,43 @@
 import os
 import pickle
 import hashlib
-import tempfile
+import time
 import numpy as np
 from typing import Any, Dict, Tuple
 
-from BotStatistics import BotStatistics
 from BaseBot import BaseBot
+from CheckpointWriter import CheckpointWriter
 from BotTools import BotTools
+from QTable import QTable
+from QTableStore import QTableStore
+from PrioritizedSweeping import PrioritizedSweeping
+from ReplayBuffer import ReplayBuffer
+from StateEncoders import state_encoders
+from TieredQTable import TieredQTable
 
 class QLearningConfig:
-    def __init__(self, learning_rate: float = 0.1, discount_factor: float = 0.9):
+    def __init__(self, learning_rate: float = 0.1, discount_factor: float = 0.9, q_table_dtype: str = 'float64', state_encoder: str = 'full',
+                 replay_capacity: int = 0, replay_batch_size: int = 32, replay_interval: int = 1,
+                 checkpoint_every_episodes: int = 1, checkpoint_every_seconds: float = 0,
+                 memory_budget_bytes: int = 0, compaction_idle_episodes: int = 10, compaction_value_tolerance: float = 1e-9,
+                 q_table_backend: str = 'memory', cache_states: int = 100000,
+                 planning_steps: int = 0, planning_threshold: float = 1e-4):
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
+        self.q_table_dtype = q_table_dtype  # 'float64' or 'float32'
+        self.state_encoder = state_encoder  # Name of the visited-positions encoder in state_encoders
+        self.replay_capacity = replay_capacity  # Transitions kept for experience replay; 0 disables replay
+        self.replay_batch_size = replay_batch_size  # Transitions replayed per replay batch
+        self.replay_interval = replay_interval  # Steps between replay batches; 0 replays only at the end of each episode
+        self.checkpoint_every_episodes = checkpoint_every_episodes  # Save the Q-table every N episodes; 0 disables
+        self.checkpoint_every_seconds = checkpoint_every_seconds  # Also save once this many seconds have passed; 0 disables
+        self.memory_budget_bytes = memory_budget_bytes  # Compact the Q-table between episodes when it grows past this; 0 disables
+        self.compaction_idle_episodes = compaction_idle_episodes  # Episodes a state must go unused before it can be evicted
+        self.compaction_value_tolerance = compaction_value_tolerance  # Largest |Q-value| of a state still considered untrained
+        self.q_table_backend = q_table_backend  # 'memory', or 'tiered' to keep only cache_states hot states in memory over a sqlite3 store
+        self.cache_states = cache_states  # States cached in memory by the tiered backend
+        self.planning_steps = planning_steps  # Dyna-Q planning backups per real transition, by prioritized sweeping; 0 disables
+        self.planning_threshold = planning_threshold  # Smallest TD error that queues a state-action pair for planning
 
 class QLearning:
     def __init__(self, q_learning_config: QLearningConfig):
@@ -20,39 +45,118 @@ class QLearning:
         self.lr = q_learning_config.learning_rate
         self.gamma = q_learning_config.discount_factor
         self.num_actions = 4
-        self.q_table: Dict[Any, np.ndarray] = {}
+        self.q_table_dtype = np.dtype(getattr(q_learning_config, 'q_table_dtype', 'float64'))
+        self.q_table = QTable(self.num_actions, self.q_table_dtype)
+        self.q_table_backend = getattr(q_learning_config, 'q_table_backend', 'memory')
+        if self.q_table_backend not in ('memory', 'tiered'):
+            raise ValueError(f"Unknown Q-table backend: {self.q_table_backend}")
+        self.cache_states = int(getattr(q_learning_config, 'cache_states', 100000))
+        self.state_encoder = state_encoders[getattr(q_learning_config, 'state_encoder', 'full')]()
+        replay_capacity = int(getattr(q_learning_config, 'replay_capacity', 0))
+        if replay_capacity > 0 and self.q_table_backend == 'tiered':
+            raise ValueError("Experience replay needs the in-memory Q-table backend")  # Replayed row ids would outlive the cache slots
+        self.replay_buffer = ReplayBuffer(replay_capacity) if replay_capacity > 0 else None
+        self.planning_steps = int(getattr(q_learning_config, 'planning_steps', 0))
+        if self.planning_steps > 0 and self.q_table_backend == 'tiered':
+            raise ValueError("Dyna-Q planning needs the in-memory Q-table backend")  # The model is indexed by row id
+        self.planner = PrioritizedSweeping(self.num_actions, float(getattr(q_learning_config, 'planning_threshold', 1e-4))) if self.planning_steps > 0 else None
+        self.replay_batch_size = int(getattr(q_learning_config, 'replay_batch_size', 32))
+        self.replay_interval = int(getattr(q_learning_config, 'replay_interval', 1))
+        self.steps_since_replay = 0
+        self.checkpoint_every_episodes = int(getattr(q_learning_config, 'checkpoint_every_episodes', 1))
+        self.checkpoint_every_seconds = float(getattr(q_learning_config, 'checkpoint_every_seconds', 0))
+        self.checkpoint_writer = CheckpointWriter()
+        self.episodes_since_checkpoint = 0
+        self.last_checkpoint_time = time.monotonic()
+        self.memory_budget_bytes = int(getattr(q_learning_config, 'memory_budget_bytes', 0))
+        self.compaction_idle_episodes = int(getattr(q_learning_config, 'compaction_idle_episodes', 10))
+        self.compaction_value_tolerance = float(getattr(q_learning_config, 'compaction_value_tolerance', 1e-9))
         self.initial_exploration_rate = 1.0
         self.min_exploration_rate = 0.1
         self.exploration_decay_rate = 0.001
 
     def update_q_value(self, state: Any, action: int, reward: float, new_state: Any) -> None:
         """ Update Q-value for the given state-action pair."""
-        state_key = self.state_to_key(state)
-        new_state_key = self.state_to_key(new_state)
+        state_id = self.q_table.row_id(self.state_to_key(state))
+        new_state_id = self.q_table.row_id(self.state_to_key(new_state))
+        q_values = self.q_table.q_values  # Fetched after interning, which may have grown the matrix
 
-        if state_key not in self.q_table:
-            self.q_table[state_key] = np.zeros(self.num_actions)
-        if new_state_key not in self.q_table:
-            self.q_table[new_state_key] = np.zeros(self.num_actions)
-
-        old_value = self.q_table[state_key][action]
-        future_optimal_value = np.max(self.q_table[new_state_key])
+        old_value = q_values[state_id, action]
+        future_optimal_value = q_values[new_state_id].max()
         new_value = old_value + self.lr * (reward + self.gamma * future_optimal_value - old_value)
-        self.q_table[state_key][action] = new_value
+        q_values[state_id, action] = new_value
+        self.q_table.visits[state_id, action] += 1
+        self.remember(state_id, action, reward, new_state_id)
+
+    def remember(self, state_ids, actions, rewards, new_state_ids) -> None:
+        """
+        Store transitions (single values or arrays of Q-table row ids) for experience replay,
+        replaying a batch every replay_interval steps, and in the Dyna-Q model, running
+        planning_steps planning backups per transition. Does nothing when both are disabled.
+        """
+        if self.planner is not None:
+            self.planner.observe(self.q_table.q_values, self.gamma, state_ids, actions, rewards, new_state_ids)
+            self.planner.plan(self.q_table.q_values, self.lr, self.gamma, self.planning_steps * np.size(state_ids))
+        if self.replay_buffer is None:
+            return
+        self.replay_buffer.add(state_ids, actions, rewards, new_state_ids)
+        self.steps_since_replay += np.size(state_ids)
+        if self.replay_interval and self.steps_since_replay >= self.replay_interval:
+            self.steps_since_replay = 0
+            self.replay()
+
+    def replay(self, batches: int = 1) -> None:
+        """
+        Apply TD updates to batches of transitions sampled from the replay buffer.
+        Each batch is one vectorized update; replayed updates are not counted in the table's visits.
+        """
+        if self.replay_buffer is None or len(self.replay_buffer) == 0:
+            return
+        q_values = self.q_table.q_values
+        for _ in range(batches):
+            state_ids, actions, rewards, new_state_ids = self.replay_buffer.sample(self.replay_batch_size)
+            targets = rewards + self.gamma * q_values[new_state_ids].max(axis=1)
+            np.add.at(q_values, (state_ids, actions), self.lr * (targets - q_values[state_ids, actions]))
+
+    def end_episode(self) -> None:
+        """
+        Finish an episode: advance the Q-table's episode stamp, and replay the transitions of the
+        episode when replay happens only between episodes, with enough batches that each new
+        transition is replayed about once.
+        """
+        self.q_table.episode += 1
+        if self.replay_buffer is not None and not self.replay_interval and self.steps_since_replay:
+            self.replay(-(-self.steps_since_replay // self.replay_batch_size))
+            self.steps_since_replay = 0
+
+    def compact(self) -> int:
+        """
+        Evict cold, untrained states if the Q-table has grown past the memory budget, and remap the
+        row ids held by the replay buffer and the planning model.
+
+        :return: The bytes reclaimed.
+        """
+        if not self.memory_budget_bytes:
+            return 0
+        reclaimed, id_map = self.q_table.compact(self.memory_budget_bytes, self.compaction_idle_episodes, self.compaction_value_tolerance)
+        if id_map is not None:
+            if self.replay_buffer is not None:
+                self.replay_buffer.remap(id_map)
+            if self.planner is not None:
+                self.planner.remap(id_map)
+        return reclaimed
     
+    def exploration_rate(self) -> float:
+        """The epsilon of the epsilon-greedy policy, shared by every bot that trains on this Q-table."""
+        return max(self.min_exploration_rate, self.initial_exploration_rate)
+
     def choose_action(self, state: Any) -> int:
         """ Choose an action based on the exploration-exploitation trade-off."""
-        state_key = self.state_to_key(state)
-
-        if state_key not in self.q_table:
-            self.q_table[state_key] = np.zeros(self.num_actions) 
-        
-        exploration_rate = max(
-            self.min_exploration_rate, self.initial_exploration_rate - self.exploration_decay_rate * BotStatistics().non_repeating_steps_taken
-        )
-        if np.random.rand() < exploration_rate:
+        state_id = self.q_table.row_id(self.state_to_key(state))
+
+        if np.random.rand() < self.exploration_rate():
             return np.random.randint(self.num_actions)
-        return np.argmax(self.q_table[state_key])
+        return np.argmax(self.q_table.q_values[state_id])
     
     @staticmethod
     def get_file_checksum(file_path: str) -> str:
@@ -63,25 +167,92 @@ class QLearning:
                 sha256.update(block)
         return sha256.hexdigest()
     
-    def save_q_table(self, profile_name):
-        """Save the Q-table to a file atomically."""
+    def save_q_table(self, profile_name, wait: bool = True):
+        """
+        Save the Q-table to a file atomically.
+
+        :param profile_name: Name of the profile to save to.
+        :param wait: Write on the calling thread; otherwise the snapshot is written by the background checkpoint writer.
+        """
         profile_dir = f"profiles/{profile_name}"
-        os.makedirs(profile_dir, exist_ok=True)
-        q_table_path = f"{profile_dir}/q_table.pkl"
+        if isinstance(self.q_table, TieredQTable):
+            # The store is the checkpoint: write back the changed cached rows and commit
+            self.q_table.flush()
+            self.episodes_since_checkpoint = 0
+            self.last_checkpoint_time = time.monotonic()
+            return
+        self.q_table.detach()  # The file the table was opened from is about to be replaced
+        state = self.q_table.to_state()  # A copy, so training can continue while it is written
+        self.episodes_since_checkpoint = 0
+        self.last_checkpoint_time = time.monotonic()
+        if wait:
+            self.checkpoint_writer.flush()  # Never let an older background write land after this one
+            CheckpointWriter.write_checkpoint(profile_dir, state)
+        else:
+            self.checkpoint_writer.submit(profile_dir, state)
+
+    def checkpoint(self, profile_name, episode_finished: bool = True) -> None:
+        """
+        Save the Q-table in the background if the configured checkpoint cadence is due.
+
+        :param profile_name: Name of the profile to save to.
+        :param episode_finished: Whether an episode just ended; only then does it count towards checkpoint_every_episodes.
+        """
+        if episode_finished:
+            self.episodes_since_checkpoint += 1
+        episodes_due = self.checkpoint_every_episodes and self.episodes_since_checkpoint >= self.checkpoint_every_episodes
+        seconds_due = self.checkpoint_every_seconds and time.monotonic() - self.last_checkpoint_time >= self.checkpoint_every_seconds
+        if episodes_due or seconds_due:
+            self.save_q_table(profile_name, wait=False)
 
-        with tempfile.NamedTemporaryFile(delete=False, dir=profile_dir) as tmp_file:
-            pickle.dump(self.q_table, tmp_file)
-            temp_name = tmp_file.name
-        os.replace(temp_name, q_table_path)
+    def flush_checkpoints(self, profile_name=None) -> None:
+        """
+        Wait for background checkpoints to be written.
 
-        # Save the checksum ("fingerprint") of the Q-table file
-        checksum = self.get_file_checksum(q_table_path)
-        with open(f"{profile_dir}/q_table.checksum", 'w') as f:
-            f.write(checksum)
+        :param profile_name: If given, first save any episodes not yet covered by a checkpoint.
+        """
+        if profile_name is not None and self.episodes_since_checkpoint:
+            self.save_q_table(profile_name, wait=False)
+        self.checkpoint_writer.flush()
+        if isinstance(self.q_table, TieredQTable):
+            stats = self.q_table.cache_stats()
+            print(f"Q-table cache: hit rate {stats['hit_rate']:.3f}, {stats['evictions']} evictions, {stats['writebacks']} write-backs")
 
     def load_q_table(self, profile_name: str) -> None:
-        """Load the Q-table from a file."""
+        """
+        Load the Q-table from a file.
+
+        Tables saved by QTableStore are verified chunk by chunk in parallel threads and then
+        memory-mapped instead of read; corrupted chunks are reported and skipped. Pickled tables of
+        older profiles are checked against their checksum file and loaded whole.
+
+        With the tiered backend the table is opened from the profile's sqlite3 store instead; a new
+        store is filled from the profile's existing Q-table, if any.
+        """
         profile_dir = f"profiles/{profile_name}"
+        if self.q_table_backend == 'tiered' and not isinstance(self.q_table, TieredQTable):
+            os.makedirs(profile_dir, exist_ok=True)
+            q_table = TieredQTable(f"{profile_dir}/q_table.sqlite", self.cache_states, self.num_actions, self.q_table_dtype)
+            if len(q_table) == 0:
+                self.q_table = QTable(self.num_actions, self.q_table_dtype)
+                self._load_q_table_file(profile_dir)
+                if len(self.q_table):
+                    q_table.import_state(self.q_table.to_state())
+            self.q_table = q_table
+        elif not isinstance(self.q_table, TieredQTable):  # An open tiered table is always current
+            self._load_q_table_file(profile_dir)
+
+    def _load_q_table_file(self, profile_dir: str) -> None:
+        """Load the in-memory Q-table saved in a profile directory."""
+        try:
+            q_table = QTableStore.load(profile_dir, self.q_table_dtype)
+        except ValueError as ve:
+            print("ValueError: ", ve)
+            return
+        if q_table is not None:
+            self.q_table = q_table
+            return
+
         q_table_path = f"{profile_dir}/q_table.pkl"
         q_table_path_no_ext = f"{profile_dir}/q_table"
         try:
@@ -98,7 +269,7 @@ class QLearning:
                 print("Checksum does not match or was not found at file not found at:", checksum_path)
 
             with open(q_table_path, 'rb') as f:
-                self.q_table = pickle.load(f)
+                self.q_table = QTable.coerce(pickle.load(f), self.num_actions, self.q_table_dtype)
         except FileNotFoundError:
             print("FileNotFoundError: Q-table file not found.")
         except ValueError as ve:
@@ -106,9 +277,17 @@ class QLearning:
         except EOFError:
             print("Q-table file is incomplete or corrupted.")
 
+    def encode_visited(self, position: Tuple[int, int], visited: Dict[Tuple[int, int], int]) -> Any:
+        """Encode the visited positions into the state with the configured state encoder."""
+        return self.state_encoder.encode_visited(position, visited)
+
     @staticmethod
     def state_to_key(state: Any) -> Tuple:
-        """Convert the state to a hashable key for the Q-table."""
+        """
+        Convert the state to a hashable key for the Q-table.
+        The visited component is already encoded by encode_visited when the state is calculated,
+        because the visited positions keep changing after that.
+        """
         position_index, wall_distances, visited, distance_to_goal, goal_direction = state
         return position_index, wall_distances, visited, distance_to_goal, goal_direction
 
@@ -134,7 +313,7 @@ class QLearningBot(BaseBot):
         self.state = self.calculate_state()
         self.q_learning.load_q_table(profile_name)  # Load Q-table when initializing
 
-        maze_data_path = f"profiles/{profile_name}/mazes.json"
+        maze_data_path = f"profiles/{profile_name}/mazes.bin"
         maze_data = self.statistics.load_all_maze_data(maze_data_path)
 
         self.highest_reward = maze_data["highest"].get("reward", float('-inf'))
@@ -146,22 +325,25 @@ class QLearningBot(BaseBot):
     
     def initialize_specific_data(self, data):
         """Initialize bot-specific data."""
-        self.q_learning.q_table = data.get('q_table', {})
+        if isinstance(self.q_learning.q_table, TieredQTable):
+            return  # The tiered store, not the pickled profile, holds the table
+        self.q_learning.q_table = QTable.coerce(data.get('q_table', {}), self.q_learning.num_actions, self.q_learning.q_table_dtype)
         self.q_learning.load_q_table(self.profile_name) # Load the Q-table from a file
 
     def calculate_state(self):
         """Calculate the state based on the position"""
         position_index = self.tools.pos_to_state(self.position)
         wall_distances, goal_direction = self.tools.detect_walls(self.position)
-        visited = self.statistics.get_visited_positions()
+        visited = self.q_learning.encode_visited(self.position, self.statistics.get_visited_positions())
         distance_to_goal = self.tools.get_distance_to_goal(self.position)
-        return (position_index, wall_distances, tuple(visited), distance_to_goal, goal_direction)
+        return (position_index, wall_distances, visited, distance_to_goal, goal_direction)
     
     def run_episode(self):
         """Run a single episode of Q-learning."""
+        started = time.perf_counter()
         step_limit = 1000 * self.tools.get_optimal_path_info(self.maze.start, self.maze.end, output='length')
         steps = 0
-        times_hit_wall = 0
+        visit_counts = self.statistics.track_visits(self.maze.grid.shape)
 
         while self.position != self.maze.end:
             reward = 0
@@ -169,17 +351,17 @@ class QLearningBot(BaseBot):
             new_position = self.tools.calculate_next_position(self.position, action)
             self.statistics.total_steps = self.statistics.times_revisited_squares + self.statistics.non_repeating_steps_taken
 
-            if not self.maze.is_valid_position(self.profile_name, new_position[0], new_position[1]):
-                reward += self.reward_system.get_reward(new_position, self.tools.get_optimal_path_info(self.position, self.maze.end), self.tools.get_optimal_path_info(self.position, self.maze.end, output='length'), self.statistics.get_visited_positions())
+            if not self.maze.is_valid_position(new_position[0], new_position[1]):
+                reward += self.reward_system.get_reward(self.position, new_position, visit_counts)
                 new_state = self.calculate_state()
                 self.q_learning.update_q_value(self.state, action, reward, new_state)
                 self.total_reward += reward
-                times_hit_wall += 1
+                self.statistics.record_wall_hit(self.profile_name)
                 continue
 
             self.statistics.update_last_visited(self.position)
             self.statistics.update_visited_positions(self.position)
-            reward += self.reward_system.get_reward(new_position, self.tools.get_optimal_path_info(self.position, self.maze.end), self.tools.get_optimal_path_info(self.position, self.maze.end, output='length'), self.statistics.get_visited_positions())
+            reward += self.reward_system.get_reward(self.position, new_position, visit_counts)
 
             if new_position in self.statistics.get_visited_positions():
                 self.statistics.times_revisited_squares += 1
@@ -195,7 +377,7 @@ class QLearningBot(BaseBot):
                 break
 
             self.total_reward += reward
-            self.statistics.visited_positions[self.position] = self.statistics.visited_positions.get(self.position, 0) + 1
+            self.statistics.update_visited_positions(self.position)
             new_state = self.calculate_state()
             self.q_learning.update_q_value(self.state, action, reward, new_state)
 
@@ -208,27 +390,27 @@ class QLearningBot(BaseBot):
                 print("Potential infinite loop detected. Breaking out.")
                 break
 
-            heatmap_data = self.statistics.get_visited_positions()
-            
-            profile_dir = f"profiles/{self.profile_name}"
-            os.makedirs(profile_dir, exist_ok=True)
-            simulation_rewards_path = f"{profile_dir}/SimulationRewards.txt"
-            
             if self.statistics.total_steps > step_limit:
                 print("Step limit reached: ", self.statistics.total_steps, ". Resetting bot.")
                 self.statistics.total_steps = 0
-                self.q_learning.save_q_table(self.profile_name)  # Save Q-table after each episode
+                self.q_learning.checkpoint(self.profile_name, episode_finished=False)
 
                 self.reset_bot()
 
         heatmap_data = self.statistics.get_visited_positions()
         self.statistics.save_all_maze_data(self.profile_name, self.maze, heatmap_data, self.total_reward)
-        self.statistics.update_steps_in_profile(self.profile_name, heatmap_data)
-        self.statistics.update_times_hit_wall(self.profile_name, times_hit_wall)
-        with open(simulation_rewards_path, 'a') as f:
-            f.write(f"{self.total_reward}\n")
-        
-        self.q_learning.save_q_table(self.profile_name)  # Save Q-table after each episode
+        self.statistics.record_episode(self.profile_name, heatmap_data, self.total_reward, time.perf_counter() - started)
+        self.q_learning.end_episode()
+
+        self.q_learning.checkpoint(self.profile_name)  # Saved in the background at the configured cadence
+
+    def compact_q_table(self):
+        """Compact the Q-table if it is over its memory budget; returns the bytes reclaimed."""
+        return self.q_learning.compact()
+
+    def flush_checkpoints(self):
+        """Save any unsaved training and wait for the Q-table checkpoints to reach the disk."""
+        self.q_learning.flush_checkpoints(self.profile_name)
 
     def reset_bot(self):
         """Reset the bot's position, statistics, and Q-learning data."""
@@ -0,0 +1,273 @@
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from QTableFile import QTableFile
+
+
+class QTable:
+    """
+    Q-table backed by a single growable value matrix.
+
+    State keys are interned to consecutive integer row ids; the Q-values of all states live in one
+    (capacity, num_actions) array that doubles in size when full. Lookups by key return row views,
+    so code written against the old dict-of-arrays table keeps working. A parallel matrix counts the
+    Q-updates applied to each state-action pair, and every state is stamped with the episode in
+    which it was last looked up, so compact can evict states that are cold and still untrained.
+    """
+
+    FORMAT = 'dense-v1'
+    _key_source: Optional[QTableFile] = None  # Set by from_file until the state keys are first needed
+
+    def __init__(self, num_actions: int = 4, dtype: Any = np.float64, initial_capacity: int = 1024):
+        """
+        Initialize an empty Q-table.
+
+        :param num_actions: Number of actions (columns) per state.
+        :param dtype: Value type of the matrix, e.g. np.float64 or np.float32.
+        :param initial_capacity: Number of rows allocated up front.
+        """
+        self.num_actions = num_actions
+        self.index: Dict[Any, int] = {}
+        self.state_keys: List[Any] = []
+        self.q_values = np.zeros((max(1, initial_capacity), num_actions), dtype=dtype)
+        self.visits = np.zeros((max(1, initial_capacity), num_actions), dtype=np.int64)
+        self.last_touched = np.zeros(max(1, initial_capacity), dtype=np.int64)
+        self.episode = 0  # Stamp written to last_touched; advanced by the trainer after each episode
+
+    def __getattr__(self, name: str) -> Any:
+        # Tables opened with from_file unpickle their verified state keys on first use
+        if name in ('index', 'state_keys') and self._key_source is not None:
+            self.state_keys = self.__dict__.pop('_key_source').load_keys()
+            self.index = {key: i for i, key in enumerate(self.state_keys)}
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __len__(self) -> int:
+        if self._key_source is not None:
+            return len(self._key_source)
+        return len(self.state_keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.index
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Get the Q-values of a state as a writable row view."""
+        return self.q_values[self.index[key]]
+
+    def __setitem__(self, key: Any, values) -> None:
+        self.q_values[self.row_id(key)] = values
+
+    def get_id(self, key: Any) -> Optional[int]:
+        """Get the row id of a state, or None if the state is not in the table."""
+        return self.index.get(key)
+
+    def row_id(self, key: Any) -> int:
+        """Get the row id of a state, adding it with zero Q-values if it is new."""
+        state_id = self.index.get(key)
+        if state_id is None:
+            state_id = len(self.state_keys)
+            if state_id == len(self.q_values):
+                self._grow()
+            self.index[key] = state_id
+            self.state_keys.append(key)
+        self.last_touched[state_id] = self.episode
+        return state_id
+
+    def _grow(self) -> None:
+        """Double the capacity of the value and visit matrices."""
+        grown = np.zeros((2 * len(self.q_values), self.num_actions), dtype=self.q_values.dtype)
+        grown[:len(self.q_values)] = self.q_values
+        self.q_values = grown
+        grown_visits = np.zeros(grown.shape, dtype=np.int64)
+        grown_visits[:len(self.visits)] = self.visits
+        self.visits = grown_visits
+        grown_last_touched = np.zeros(len(grown), dtype=np.int64)
+        grown_last_touched[:len(self.last_touched)] = self.last_touched
+        self.last_touched = grown_last_touched
+
+    def record_visits(self, state_ids, actions) -> None:
+        """Count one Q-update for each (state id, action) pair; ids and actions may be scalars or arrays."""
+        np.add.at(self.visits, (state_ids, actions), 1)
+
+    def memory_bytes(self, sample_size: int = 64) -> int:
+        """
+        Estimate the memory held by the table: the allocated matrices plus the state keys and their
+        index entries, extrapolated from a random sample of keys.
+        """
+        size = len(self)
+        array_bytes = self.q_values.nbytes + self.visits.nbytes + self.last_touched.nbytes
+        if size == 0 or self._key_source is not None:
+            return array_bytes  # Keys that were never loaded take no memory
+        sample = np.random.default_rng(size).integers(size, size=min(sample_size, size))
+        seen = set()
+        key_bytes = sum(self._object_bytes(self.state_keys[i], seen) for i in sample) / len(sample)
+        # Per key: the list slot, a dict entry (hash, key and value pointers) at the dict's usual load, and the int row id
+        per_key_overhead = 8 + 3 * 8 * 1.5 + 28
+        return array_bytes + int(size * (key_bytes + per_key_overhead))
+
+    @staticmethod
+    def _object_bytes(obj: Any, seen: set) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, tuple):
+            size += sum(QTable._object_bytes(item, seen) for item in obj)
+        return size
+
+    def compact(self, memory_budget: int, min_idle_episodes: int = 10, value_tolerance: float = 1e-9) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Evict cold, untrained states until the table fits in a memory budget.
+
+        Only states that were not looked up in the last min_idle_episodes episodes and whose
+        Q-values are all within value_tolerance of their initial zero are evicted, the least
+        visited and longest idle first. Trained states are never evicted, so the table may stay
+        over budget. Row ids change: the returned map must be applied to anything holding ids.
+
+        :param memory_budget: Target size in bytes, as estimated by memory_bytes.
+        :param min_idle_episodes: Episodes a state must have gone untouched to be evicted.
+        :param value_tolerance: Largest absolute Q-value still considered initial.
+        :return: The bytes reclaimed (the estimated size of the evicted rows and their keys), and an
+                 array mapping old row ids to new ones (-1 for evicted states), or None if nothing was evicted.
+        """
+        size_before = self.memory_bytes()
+        size = len(self)
+        if size_before <= memory_budget or size == 0:
+            return 0, None
+
+        cold = (self.last_touched[:size] <= self.episode - min_idle_episodes) & (np.abs(self.q_values[:size]).max(axis=1) <= value_tolerance)
+        candidates = np.flatnonzero(cold)
+        if len(candidates) == 0:
+            return 0, None
+        # Least visited, then longest idle, first
+        order = np.lexsort((self.last_touched[candidates], self.visits[candidates].sum(axis=1)))
+        bytes_per_state = size_before / size
+        evict_count = min(len(candidates), int(np.ceil((size_before - memory_budget) / bytes_per_state)))
+        keep = np.ones(size, dtype=bool)
+        keep[candidates[order[:evict_count]]] = False
+        # Counted per evicted row: the matrices are reallocated to a power-of-two capacity, so the
+        # change in their allocated size does not follow the number of rows evicted
+        row_bytes = (self.q_values.itemsize + self.visits.itemsize) * self.num_actions + self.last_touched.itemsize
+        array_bytes = self.q_values.nbytes + self.visits.nbytes + self.last_touched.nbytes
+        reclaimed = int(evict_count * (row_bytes + (size_before - array_bytes) / size))
+
+        kept_ids = np.flatnonzero(keep)
+        id_map = np.full(size, -1, dtype=np.int64)
+        id_map[kept_ids] = np.arange(len(kept_ids))
+        capacity = max(1024, 1 << int(len(kept_ids)).bit_length())
+        for name in ('q_values', 'visits', 'last_touched'):
+            array = getattr(self, name)
+            compacted = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            compacted[:len(kept_ids)] = array[kept_ids]
+            setattr(self, name, compacted)
+        self.state_keys = [self.state_keys[i] for i in kept_ids]
+        self.index = {key: i for i, key in enumerate(self.state_keys)}
+        return reclaimed, id_map
+
+    def keys(self) -> List[Any]:
+        return self.state_keys
+
+    def items(self) -> Iterator[Tuple[Any, np.ndarray]]:
+        """Iterate over (state key, Q-value row) pairs in insertion order."""
+        return zip(self.state_keys, self.q_values[:len(self.state_keys)])
+
+    def top_states(self, n: int = 10) -> List[Tuple[float, Tuple[Any, np.ndarray]]]:
+        """
+        Get the n states with the highest maximum Q-value.
+
+        :return: A list of (max Q-value, (state key, Q-value row)) sorted from highest to lowest.
+        """
+        size = len(self)
+        if size == 0:
+            return []
+        best_values = self.q_values[:size].max(axis=1)
+        top_ids = np.argpartition(-best_values, min(n, size) - 1)[:n]
+        top_ids = top_ids[np.argsort(-best_values[top_ids], kind='stable')]
+        key = self._key_source.key if self._key_source is not None else self.state_keys.__getitem__
+        return [(best_values[i], (key(i), self.q_values[i])) for i in top_ids]
+
+    def to_state(self) -> Dict[str, Any]:
+        """Get a plain, picklable representation of the table trimmed to its used rows."""
+        size = len(self.state_keys)
+        return {'format': self.FORMAT, 'keys': list(self.state_keys), 'values': self.q_values[:size].copy(), 'visits': self.visits[:size].copy()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], dtype: Any = None) -> 'QTable':
+        """Rebuild a table from the output of to_state."""
+        values = np.asarray(state['values'])
+        table = cls(values.shape[1] if values.ndim == 2 else 4, dtype or values.dtype, max(1, len(values)))
+        table.state_keys = list(state['keys'])
+        table.index = {key: i for i, key in enumerate(table.state_keys)}
+        table.q_values[:len(values)] = values
+        if 'visits' in state:  # Tables saved before visit counting start from zero
+            table.visits[:len(values)] = state['visits']
+        return table
+
+    @classmethod
+    def from_file(cls, file_path: str, dtype: Any = None, verified: bool = False) -> 'QTable':
+        """
+        Open a table saved with QTableFile without reading it.
+
+        The value and visit matrices are memory-mapped copy-on-write, so pages are loaded by the OS
+        as they are used and updates stay in memory. Unless the file was already verified, the state
+        keys are read and checked against their checksum here; either way they are only unpickled on
+        first use. The matrices are copied into memory when the table grows or is detached.
+
+        :param verified: Whether the caller has already checked the file, e.g. against its manifest
+                         (see QTableStore.verify); the keys are then read only when first used.
+        :raises ValueError: If the file is not a valid Q-table file or its keys do not match their checksum.
+        """
+        mapped = QTableFile(file_path)
+        if verified:
+            mapped.keys_verified = True
+        else:
+            mapped.verify_keys()
+        table = cls.__new__(cls)
+        table.num_actions = mapped.num_actions
+        if mapped.num_states == 0:
+            table.q_values = np.zeros((1, mapped.num_actions), dtype=dtype or mapped.dtype)
+            table.visits = np.zeros((1, mapped.num_actions), dtype=np.int64)
+        else:
+            table.q_values, table.visits = mapped.map_matrices('c')
+            if dtype is not None and np.dtype(dtype) != mapped.dtype:
+                table.q_values = table.q_values.astype(dtype)
+        table.last_touched = np.zeros(len(table.q_values), dtype=np.int64)  # Not saved; loaded states start as touched in episode 0
+        table.episode = 0
+        table._key_source = mapped
+        return table
+
+    def detach(self) -> None:
+        """Read everything still backed by a file into memory, so the file can be replaced."""
+        if self._key_source is not None:
+            self.state_keys  # Loads the keys
+        if isinstance(self.q_values, np.memmap):
+            self.q_values = np.array(self.q_values)
+        if isinstance(self.visits, np.memmap):
+            self.visits = np.array(self.visits)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[Any, Any], num_actions: int = 4, dtype: Any = np.float64) -> 'QTable':
+        """Build a table from a legacy dict mapping state keys to Q-value arrays."""
+        table = cls(num_actions, dtype, max(1, len(mapping)))
+        if mapping:
+            table.state_keys = list(mapping.keys())
+            table.index = {key: i for i, key in enumerate(table.state_keys)}
+            table.q_values[:len(mapping)] = np.array(list(mapping.values()))
+        return table
+
+    @classmethod
+    def coerce(cls, data: Any, num_actions: int = 4, dtype: Any = np.float64) -> 'QTable':
+        """Convert any in-memory Q-table representation (QTable, to_state dict or legacy dict) into a QTable."""
+        if isinstance(data, QTable):
+            return data
+        if isinstance(data, dict) and data.get('format') == cls.FORMAT:
+            return cls.from_state(data, dtype)
+        return cls.from_mapping(data or {}, num_actions, dtype)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.to_state()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(QTable.from_state(state).__dict__)
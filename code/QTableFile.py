@@ -0,0 +1,264 @@
+import hashlib
+import os
+import pickle
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class QTableFile:
+    """
+    Read-only view of a Q-table file that is opened without loading the table.
+
+    File layout (little-endian):
+        header      HEADER, padded to HEADER_SIZE bytes
+        values      (num_states, num_actions) matrix of the table's dtype
+        visits      (num_states, num_actions) int64 matrix of update counts
+        key offsets num_key_blocks + 1 uint64 offsets into the key blobs
+        key blobs   state keys pickled in blocks of key_block_size keys
+
+    The value and visit matrices are opened with numpy.memmap, so only the pages that are actually
+    read are loaded, by the OS page cache. State keys are unpickled one block at a time; the
+    key -> row id index is only built when a lookup by key needs it. The header stores a SHA-256 of
+    the key offsets and blobs, which is checked whenever all keys are loaded.
+
+    The rows can also be checksummed in chunks (see write and chunk_digest): chunk c covers rows
+    [c * chunk_rows, (c + 1) * chunk_rows), and its digest covers the bytes of those rows in the
+    value matrix, the visit matrix and the key blobs, in that order.
+    """
+
+    MAGIC = b"QTAB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHH8sQIQQQQQ32s")
+    HEADER_SIZE = 128
+    KEY_BLOCK_SIZE = 1024
+    ALIGNMENT = 64
+
+    def __init__(self, file_path: str):
+        """
+        Open a Q-table file.
+
+        :param file_path: Path to the file.
+        :raises ValueError: If the file is not a valid Q-table file.
+        """
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            header = f.read(self.HEADER_SIZE)
+        if len(header) < self.HEADER.size:
+            raise ValueError(f"Q-table file {file_path} is truncated.")
+        (magic, version, self.num_actions, dtype, self.num_states, self.key_block_size, num_key_blocks,
+         self.values_offset, self.visits_offset, key_offsets_offset, self.keys_offset, self.keys_digest) = self.HEADER.unpack(header[:self.HEADER.size])
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{file_path} is not a Q-table file.")
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode())
+
+        shape = (self.num_states, self.num_actions)
+        self.key_offsets = self._map(np.uint64, num_key_blocks + 1, key_offsets_offset)
+        if os.path.getsize(file_path) != self.keys_offset + int(self.key_offsets[-1]):
+            raise ValueError(f"Q-table file {file_path} is truncated.")
+        self.q_values = self._map(self.dtype, shape, self.values_offset)
+        self.visits = self._map(np.int64, shape, self.visits_offset)
+        self._index: Optional[Dict[Any, int]] = None
+        self._key_blobs: Optional[bytes] = None  # Key section kept by verify_keys
+        self.keys_verified = False  # Set once the key section is known to be intact, e.g. by a manifest check
+
+    def _map(self, dtype, shape, offset, mode='r') -> np.ndarray:
+        """Map an array of the file; empty arrays are allocated instead, as mmap cannot map zero bytes."""
+        if np.prod(shape) == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.file_path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+    def map_matrices(self, mode: str = 'c') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map the value and visit matrices in another mode, by default copy-on-write so a training
+        process can update them without touching the file.
+        """
+        shape = (self.num_states, self.num_actions)
+        return self._map(self.dtype, shape, self.values_offset, mode), self._map(np.int64, shape, self.visits_offset, mode)
+
+    def __len__(self) -> int:
+        return self.num_states
+
+    def __enter__(self) -> 'QTableFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Drop the memory maps, so the file can be replaced on systems that lock mapped files."""
+        self.q_values = self.visits = self.key_offsets = None
+        self._index = self._key_blobs = None
+
+    def _key_block(self, block: int) -> List[Any]:
+        start, end = int(self.key_offsets[block]), int(self.key_offsets[block + 1])
+        if self._key_blobs is not None:
+            return pickle.loads(self._key_blobs[start:end])
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.keys_offset + start)
+            return pickle.loads(f.read(end - start))
+
+    def key(self, state_id: int) -> Any:
+        """Get the state key of a row id, unpickling only the block that holds it."""
+        return self._key_block(state_id // self.key_block_size)[state_id % self.key_block_size]
+
+    def verify_keys(self) -> None:
+        """
+        Read the key section and check it against the checksum stored in the header. The section
+        is kept in memory, so keys are unpickled from it later without reading the file again.
+
+        :raises ValueError: If the key section does not match the checksum.
+        """
+        if self._key_blobs is not None:
+            return
+        self._key_blobs = self._read_key_section()
+        self.keys_verified = True
+
+    def _read_key_section(self) -> bytes:
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.keys_offset)
+            blobs = f.read()
+        if not self.keys_verified:
+            sha256 = hashlib.sha256(np.ascontiguousarray(self.key_offsets).tobytes())
+            sha256.update(blobs)
+            if sha256.digest() != self.keys_digest:
+                raise ValueError(f"Q-table keys in {self.file_path} do not match their checksum.")
+        return blobs
+
+    def load_keys(self) -> List[Any]:
+        """
+        Read all state keys in row id order. The checksum is skipped if the keys were already verified.
+
+        :raises ValueError: If the key section does not match the checksum stored in the header.
+        """
+        blobs = self._key_blobs if self._key_blobs is not None else self._read_key_section()
+        keys = []
+        for block in range(len(self.key_offsets) - 1):
+            keys.extend(pickle.loads(blobs[int(self.key_offsets[block]):int(self.key_offsets[block + 1])]))
+        return keys
+
+    def load_key_blocks(self, first_block: int, end_block: int) -> List[Any]:
+        """Read the state keys of a range of key blocks, without checking the key checksum in the header."""
+        start, end = int(self.key_offsets[first_block]), int(self.key_offsets[end_block])
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.keys_offset + start)
+            blobs = f.read(end - start)
+        keys = []
+        for block in range(first_block, end_block):
+            keys.extend(pickle.loads(blobs[int(self.key_offsets[block]) - start:int(self.key_offsets[block + 1]) - start]))
+        return keys
+
+    def chunk_count(self, chunk_rows: int) -> int:
+        return -(-self.num_states // chunk_rows)
+
+    def chunk_digest(self, chunk: int, chunk_rows: int) -> str:
+        """
+        Compute the SHA-256 of one row chunk, reading only its bytes. hashlib releases the GIL while
+        hashing large buffers, so chunks can be checked in parallel threads.
+        """
+        first_row, end_row = chunk * chunk_rows, min((chunk + 1) * chunk_rows, self.num_states)
+        first_block, end_block = first_row // self.key_block_size, -(-end_row // self.key_block_size)
+        sha256 = hashlib.sha256(self._raw_bytes(np.ascontiguousarray(self.q_values[first_row:end_row])))
+        sha256.update(self._raw_bytes(np.ascontiguousarray(self.visits[first_row:end_row])))
+        start, end = int(self.key_offsets[first_block]), int(self.key_offsets[end_block])
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.keys_offset + start)
+            sha256.update(f.read(end - start))
+        return sha256.hexdigest()
+
+    def keys(self) -> Iterator[Any]:
+        """Iterate over the state keys in row id order, one block in memory at a time."""
+        for block in range(len(self.key_offsets) - 1):
+            yield from self._key_block(block)
+
+    def get_id(self, key: Any) -> Optional[int]:
+        """Get the row id of a state, building the key index on first use."""
+        if self._index is None:
+            self._index = {state_key: i for i, state_key in enumerate(self.load_keys())}
+        return self._index.get(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get_id(key) is not None
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        state_id = self.get_id(key)
+        if state_id is None:
+            raise KeyError(key)
+        return self.q_values[state_id]
+
+    def top_states(self, n: int = 10) -> List[Tuple[float, Tuple[Any, np.ndarray]]]:
+        """
+        Get the n states with the highest maximum Q-value, reading only the keys of those states.
+
+        :return: A list of (max Q-value, (state key, Q-value row)) sorted from highest to lowest.
+        """
+        if self.num_states == 0:
+            return []
+        best_values = self.q_values.max(axis=1)
+        top_ids = np.argpartition(-best_values, min(n, self.num_states) - 1)[:n]
+        top_ids = top_ids[np.argsort(-best_values[top_ids], kind='stable')]
+        return [(best_values[i], (self.key(i), np.array(self.q_values[i]))) for i in top_ids]
+
+    @staticmethod
+    def _raw_bytes(array: np.ndarray) -> memoryview:
+        """View a contiguous array as bytes, so it is written without a copy."""
+        return memoryview(array.reshape(-1).view(np.uint8))
+
+    @staticmethod
+    def write(file, state: Dict[str, Any], key_block_size: int = KEY_BLOCK_SIZE, chunk_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Write a Q-table snapshot in this format.
+
+        :param file: A writable binary file object; only its write method is used.
+        :param state: A snapshot as returned by QTable.to_state.
+        :param key_block_size: Number of state keys pickled together.
+        :param chunk_rows: Rows per checksummed chunk, a multiple of key_block_size; None skips chunk checksums.
+        :return: The hex SHA-256 of the header ("header") and of every row chunk ("chunks"), computed
+                 from the bytes as they are written.
+        """
+        values = np.ascontiguousarray(state['values'])
+        values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+        num_states, num_actions = values.shape if values.ndim == 2 else (0, 4)
+        visits = np.ascontiguousarray(state.get('visits', np.zeros(values.shape)), dtype='<i8')
+        keys = state['keys']
+
+        blobs = [pickle.dumps(keys[i:i + key_block_size], protocol=pickle.HIGHEST_PROTOCOL) for i in range(0, len(keys), key_block_size)]
+        key_offsets = np.zeros(len(blobs) + 1, dtype='<u8')
+        key_offsets[1:] = np.cumsum([len(blob) for blob in blobs], dtype=np.int64)
+        sha256 = hashlib.sha256(key_offsets.tobytes())
+        for blob in blobs:
+            sha256.update(blob)
+
+        align = QTableFile.ALIGNMENT
+        values_offset = QTableFile.HEADER_SIZE
+        visits_offset = -(-(values_offset + values.nbytes) // align) * align
+        key_offsets_offset = -(-(visits_offset + visits.nbytes) // align) * align
+        keys_offset = key_offsets_offset + key_offsets.nbytes
+        header = QTableFile.HEADER.pack(
+            QTableFile.MAGIC, QTableFile.VERSION, num_actions, values.dtype.str.encode(), num_states,
+            key_block_size, len(blobs), values_offset, visits_offset, key_offsets_offset, keys_offset, sha256.digest()
+        )
+
+        if chunk_rows is not None and (chunk_rows <= 0 or chunk_rows % key_block_size):
+            raise ValueError("chunk_rows must be a positive multiple of key_block_size")
+        chunks = range(0, num_states, chunk_rows) if chunk_rows else []
+        chunk_hashes = [hashlib.sha256() for _ in chunks]
+        blocks_per_chunk = (chunk_rows or key_block_size) // key_block_size
+
+        header = header.ljust(QTableFile.HEADER_SIZE, b"\0")
+        file.write(header)
+        for sha256, first_row in zip(chunk_hashes, chunks):
+            sha256.update(QTableFile._raw_bytes(values[first_row:first_row + chunk_rows]))
+        file.write(QTableFile._raw_bytes(values))
+        file.write(b"\0" * (visits_offset - values_offset - values.nbytes))
+        for sha256, first_row in zip(chunk_hashes, chunks):
+            sha256.update(QTableFile._raw_bytes(visits[first_row:first_row + chunk_rows]))
+        file.write(QTableFile._raw_bytes(visits))
+        file.write(b"\0" * (key_offsets_offset - visits_offset - visits.nbytes))
+        file.write(QTableFile._raw_bytes(key_offsets))
+        for block, blob in enumerate(blobs):
+            if chunk_hashes:
+                chunk_hashes[block // blocks_per_chunk].update(blob)
+            file.write(blob)
+        return {'header': hashlib.sha256(header).hexdigest(), 'chunks': [sha256.hexdigest() for sha256 in chunk_hashes]}
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from QTable import QTable
+from QTableFile import QTableFile
+
+
+class QTableStore:
+    """
+    Q-table persistence for a profile directory.
+
+    The table is written as a QTableFile with a uniquely named data file (q_table-*.qtab), whose rows
+    are checksummed in chunks while it is written. A JSON manifest lists the data file, its size,
+    the header checksum and the checksum of every chunk. The manifest is replaced atomically after
+    the data file is fsynced, so replacing it is the commit point of a save: a crash before that
+    leaves the previous table in place.
+
+    On load the chunks are verified in parallel threads. A corrupted chunk is reported and its rows
+    are skipped, instead of discarding the whole table.
+    """
+
+    MANIFEST_NAME = "q_table.manifest"
+    FORMAT = "qtab-chunks-v1"
+    CHUNK_ROWS = 65536
+
+    @staticmethod
+    def read_manifest(profile_dir: str) -> Optional[Dict[str, Any]]:
+        """Read the manifest of a profile, or None if it has none."""
+        try:
+            with open(f"{profile_dir}/{QTableStore.MANIFEST_NAME}", 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return manifest if manifest.get("format") == QTableStore.FORMAT else None
+
+    @staticmethod
+    def save(profile_dir: str, state: Dict[str, Any], chunk_rows: int = CHUNK_ROWS) -> None:
+        """
+        Atomically save a Q-table snapshot.
+
+        :param profile_dir: Directory of the profile.
+        :param state: A snapshot as returned by QTable.to_state.
+        :param chunk_rows: Rows per checksummed chunk.
+        """
+        os.makedirs(profile_dir, exist_ok=True)
+        previous = QTableStore.read_manifest(profile_dir)
+
+        with tempfile.NamedTemporaryFile(prefix="q_table-", suffix=".qtab", dir=profile_dir, delete=False) as data_file:
+            digests = QTableFile.write(data_file, state, chunk_rows=chunk_rows)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+            data_name = os.path.basename(data_file.name)
+            size = data_file.tell()
+
+        manifest = {
+            "format": QTableStore.FORMAT,
+            "file": data_name,
+            "size": size,
+            "chunk_rows": chunk_rows,
+            "header_sha256": digests['header'],
+            "chunks": digests['chunks'],
+        }
+        with tempfile.NamedTemporaryFile('w', dir=profile_dir, delete=False) as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+            temp_name = manifest_file.name
+        os.replace(temp_name, f"{profile_dir}/{QTableStore.MANIFEST_NAME}")
+
+        # The previous data file is no longer referenced
+        if previous is not None and previous["file"] != data_name:
+            try:
+                os.remove(f"{profile_dir}/{previous['file']}")
+            except OSError:
+                pass  # Already gone, or still mapped on a system that locks mapped files
+
+    @staticmethod
+    def verify(profile_dir: str, manifest: Optional[Dict[str, Any]] = None, workers: Optional[int] = None) -> List[int]:
+        """
+        Verify the saved table of a profile against its manifest.
+
+        :param profile_dir: Directory of the profile.
+        :param manifest: The manifest, if already read.
+        :param workers: Number of threads that hash chunks; defaults to the number of CPUs, at most 8.
+        :return: The indexes of the corrupted chunks.
+        :raises ValueError: If there is no manifest, or the data file or its header is damaged.
+        """
+        manifest = manifest or QTableStore.read_manifest(profile_dir)
+        if manifest is None:
+            raise ValueError(f"No Q-table manifest in {profile_dir}.")
+        data_path = f"{profile_dir}/{manifest['file']}"
+        if not os.path.exists(data_path) or os.path.getsize(data_path) != manifest["size"]:
+            raise ValueError(f"Q-table file {data_path} is missing or has the wrong size.")
+        with open(data_path, 'rb') as f:
+            if hashlib.sha256(f.read(QTableFile.HEADER_SIZE)).hexdigest() != manifest["header_sha256"]:
+                raise ValueError(f"Q-table file {data_path} has a corrupted header.")
+
+        mapped = QTableFile(data_path)
+        chunk_rows = manifest["chunk_rows"]
+        if mapped.chunk_count(chunk_rows) != len(manifest["chunks"]):
+            raise ValueError(f"Q-table file {data_path} does not match its manifest.")
+        with ThreadPoolExecutor(workers or min(8, os.cpu_count() or 1)) as executor:
+            digests = list(executor.map(lambda chunk: mapped.chunk_digest(chunk, chunk_rows), range(len(manifest["chunks"]))))
+        return [chunk for chunk, (digest, expected) in enumerate(zip(digests, manifest["chunks"])) if digest != expected]
+
+    @staticmethod
+    def load(profile_dir: str, dtype: Any = None, workers: Optional[int] = None) -> Optional[QTable]:
+        """
+        Verify and open the saved table of a profile.
+
+        If every chunk is intact the table is opened lazily with QTable.from_file. Otherwise the
+        corrupted chunks are reported and the table is rebuilt in memory from the intact ones.
+        Profiles saved as a single q_table.qtab without a manifest have their keys checked against
+        the checksum in the file header instead.
+
+        :param profile_dir: Directory of the profile.
+        :param dtype: Value type of the loaded table; defaults to the stored type.
+        :param workers: Number of threads that verify chunks.
+        :return: The table, or None if the profile has no table in these formats.
+        :raises ValueError: If the data file or its header is damaged.
+        """
+        manifest = QTableStore.read_manifest(profile_dir)
+        if manifest is None:
+            single_path = f"{profile_dir}/q_table.qtab"
+            return QTable.from_file(single_path, dtype) if os.path.exists(single_path) else None
+
+        data_path = f"{profile_dir}/{manifest['file']}"
+        corrupted = QTableStore.verify(profile_dir, manifest, workers)
+        if not corrupted:
+            return QTable.from_file(data_path, dtype, verified=True)
+
+        mapped = QTableFile(data_path)
+        chunk_rows = manifest["chunk_rows"]
+        blocks_per_chunk = chunk_rows // mapped.key_block_size
+        keys, values, visits = [], [], []
+        for chunk in range(len(manifest["chunks"])):
+            first_row, end_row = chunk * chunk_rows, min((chunk + 1) * chunk_rows, len(mapped))
+            if chunk in corrupted:
+                print(f"Q-table chunk {chunk} (states {first_row}-{end_row - 1}) is corrupted; skipping it.")
+                continue
+            end_block = min((chunk + 1) * blocks_per_chunk, len(mapped.key_offsets) - 1)
+            keys.extend(mapped.load_key_blocks(chunk * blocks_per_chunk, end_block))
+            values.append(mapped.q_values[first_row:end_row])
+            visits.append(mapped.visits[first_row:end_row])
+        empty = np.zeros((0, mapped.num_actions))
+        state = {
+            'format': QTable.FORMAT,
+            'keys': keys,
+            'values': np.concatenate(values).astype(dtype or mapped.dtype) if values else empty.astype(dtype or mapped.dtype),
+            'visits': np.concatenate(visits) if visits else empty.astype(np.int64),
+        }
+        return QTable.from_state(state)
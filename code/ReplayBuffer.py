@@ -0,0 +1,80 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, capacity: int):
+        """
+        Initialize a fixed-capacity ring buffer of Q-learning transitions.
+
+        Transitions are stored as (state id, action, reward, next state id) in preallocated arrays, with
+        state ids being QTable row ids. Once full, the oldest transitions are overwritten.
+
+        :param capacity: Maximum number of transitions kept.
+        """
+        if capacity <= 0:
+            raise ValueError("Replay buffer capacity must be positive")
+        self.capacity = capacity
+        self.state_ids = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_state_ids = np.zeros(capacity, dtype=np.int64)
+        self.position = 0  # Index the next transition is written to
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, state_ids, actions, rewards, next_state_ids) -> None:
+        """
+        Store one transition, or a batch of transitions given as equally long arrays.
+        """
+        state_ids = np.atleast_1d(state_ids)
+        count = len(state_ids)
+        if count > self.capacity:
+            # Only the newest transitions of an oversized batch would survive anyway
+            state_ids, actions, rewards, next_state_ids = (
+                np.atleast_1d(values)[-self.capacity:] for values in (state_ids, actions, rewards, next_state_ids)
+            )
+            count = self.capacity
+        indices = (self.position + np.arange(count)) % self.capacity
+        self.state_ids[indices] = state_ids
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_state_ids[indices] = next_state_ids
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Draw a batch of stored transitions uniformly at random, with replacement.
+
+        :return: Arrays of state ids, actions, rewards and next state ids.
+        """
+        indices = np.random.randint(self.size, size=batch_size)
+        return self.state_ids[indices], self.actions[indices], self.rewards[indices], self.next_state_ids[indices]
+
+    def remap(self, id_map: np.ndarray) -> None:
+        """
+        Rewrite the stored state ids after the Q-table was compacted, dropping transitions whose
+        states were evicted. The remaining transitions keep their order, oldest first.
+
+        :param id_map: Array mapping old row ids to new ones, -1 for evicted states (see QTable.compact).
+        """
+        order = (self.position - self.size + np.arange(self.size)) % self.capacity
+        state_ids = id_map[self.state_ids[order]]
+        next_state_ids = id_map[self.next_state_ids[order]]
+        kept = order[(state_ids >= 0) & (next_state_ids >= 0)]
+        count = len(kept)
+        self.actions[:count] = self.actions[kept]
+        self.rewards[:count] = self.rewards[kept]
+        self.state_ids[:count] = id_map[self.state_ids[kept]]
+        self.next_state_ids[:count] = id_map[self.next_state_ids[kept]]
+        self.position = count % self.capacity
+        self.size = count
+
+    def clear(self) -> None:
+        """Drop all stored transitions."""
+        self.position = 0
+        self.size = 0
@@ -0,0 +1,88 @@
+# Times RewardSystem.get_reward against the original per-step eval() of every reward modifier,
+# with visits given as the visited-positions dict and as a dense visit-count array.
+# Used for measuring the per-step reward cost; not part of the main program.
+#
+# Usage: python RewardBenchmark.py [steps] [maze size]
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from BotTools import BotTools
+from Maze import Maze
+from RewardSystem import RewardConfig, RewardSystem
+
+
+def interpreted_reward(maze, reward_config, position, new_position, visited_positions):
+    """The original get_reward: builds and eval()s a string for every modifier on every step."""
+    reward = 0
+    optimal_length = maze.optimal_path_length
+    context = {'optimal_length': optimal_length, 'visited_positions': visited_positions, 'new_position': new_position}
+    bot_tools = BotTools(maze)
+    on_optimal_path = bot_tools.is_on_optimal_path(position, new_position)
+    goal_in_sight = bot_tools.check_goal_in_sight(new_position)
+    for key, expr in reward_config.reward_modifiers.items():
+        multiplied_expr = str(int(expr) * optimal_length/100)
+        if key == 'goal_reached' and new_position == maze.end:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'hit_wall' and not maze.is_valid_position(*new_position):
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'revisit_optimal_path' and new_position in visited_positions and on_optimal_path:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'revisit_non_optimal_path' and new_position in visited_positions and not on_optimal_path:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'move_in_optimal_path' and on_optimal_path:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'see_goal_new_location' and goal_in_sight and new_position not in visited_positions:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'see_goal_revisit' and goal_in_sight and new_position in visited_positions:
+            reward += eval(multiplied_expr, {}, context)
+        elif key == 'per_move_penalty':
+            reward += eval(multiplied_expr, {}, context)
+    return reward
+
+
+def random_moves(maze, steps, seed=0):
+    """Random moves from open cells, and a visited-positions dict holding about half of the open cells."""
+    rng = random.Random(seed)
+    open_cells = [(x, y) for x in range(maze.height) for y in range(maze.width) if maze.grid[x, y] == 0]
+    visited = {cell: 1 for cell in open_cells if rng.random() < 0.5}
+    moves = []
+    for _ in range(steps):
+        x, y = rng.choice(open_cells)
+        dx, dy = rng.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
+        moves.append(((x, y), (x + dx, y + dy)))
+    return moves, visited
+
+
+def main(steps=20000, size=30):
+    random.seed(0)
+    maze = Maze(size, size)
+    reward_config = RewardConfig()
+    reward_system = RewardSystem(maze, reward_config)
+    moves, visited = random_moves(maze, steps)
+
+    started = time.perf_counter()
+    before = [interpreted_reward(maze, reward_config, position, new_position, visited) for position, new_position in moves]
+    interpreted_time = time.perf_counter() - started
+    started = time.perf_counter()
+    after = [reward_system.get_reward(position, new_position, visited) for position, new_position in moves]
+    compiled_time = time.perf_counter() - started
+    visit_counts = np.zeros(maze.grid.shape, dtype=np.int64)
+    for position, count in visited.items():
+        visit_counts[position] = count
+    started = time.perf_counter()
+    dense = [reward_system.get_reward(position, new_position, visit_counts) for position, new_position in moves]
+    dense_time = time.perf_counter() - started
+
+    if before != after or before != dense:
+        print("Compiled rewards differ from the interpreted rewards!")
+    print(f"{'':>12} {'us/step':>10} {'speedup':>8}")
+    for name, elapsed in (('interpreted', interpreted_time), ('dict visits', compiled_time), ('dense visits', dense_time)):
+        print(f"{name:>12} {elapsed / steps * 1e6:>10.2f} {interpreted_time / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -2,38 +2,99 @@ import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
+
+from EpisodeLog import EpisodeLog
+
 class RewardGrapher:
-    def __init__(self, filenames=None):
+    # Most points drawn per reward curve; longer histories are plotted as averages over equal episode bins
+    MAX_PLOT_POINTS = 4000
+    # Episodes summed at a time by calculate_slope, bounding its temporary arrays
+    FIT_CHUNK = 1 << 20
+
+    def __init__(self, filenames=None, start=None, stop=None):
+        """
+        :param filenames: Episode logs (episodes.bin) or reward text files of older profiles to plot.
+        :param start: First episode to plot (0-based, like a slice); defaults to the first episode.
+        :param stop: Episode to stop before; defaults to the end of the history.
+        """
         if filenames is None:
             filenames = ['C:\\Users\\miimi\\OneDrive\\Desktop\\PuzzleAI\\profiles\\OldQValueTest3\\SimulationRewards.txt']
         self.filenames = filenames
+        self.start = start
+        self.stop = stop
 
     def read_rewards(self, filename):
-        with open(filename, 'r') as f:
-            rewards = [float(line.strip()) for line in f]
+        """
+        Read the reward history of a profile. Episode logs are read zero-copy from their memory-mapped
+        reward column, so slicing the result to an episode range only touches those episodes.
+        """
+        if filename.endswith('.bin'):
+            rewards = EpisodeLog.rewards(filename)
+            if rewards is None:
+                rewards = np.zeros(0)
+        else:
+            with open(filename, 'r') as f:
+                rewards = np.array([float(line.strip()) for line in f if line.strip()])
         return rewards
-    
-    def calculate_slope(self, rewards):
-        episodes = np.arange(len(rewards))
-        if len(episodes) < 2: # Not enough data to calculate slope
-            return np.nan, np.nan
-        try:
-            slope, intercept = np.polyfit(episodes, rewards, 1)
-            return slope, intercept
-        except np.linalg.LinAlgError:
+
+    def first_episode(self, rewards_count):
+        """0-based index of the first plotted episode, as the start of the range resolves for a history of rewards_count episodes."""
+        return slice(self.start, self.stop).indices(rewards_count)[0]
+
+    def calculate_slope(self, rewards, first_episode=0):
+        """
+        Fit a least-squares line to the rewards against their 0-based episode numbers.
+        The closed form is summed in chunks, so the fit needs no copy of the rewards.
+        """
+        count = len(rewards)
+        if count < 2: # Not enough data to calculate slope
             return np.nan, np.nan
+        mean_episode = (count - 1) / 2
+        ramp = np.arange(min(count, self.FIT_CHUNK), dtype=np.float64)
+        sum_rewards = 0.0
+        covariance = 0.0
+        for offset in range(0, count, self.FIT_CHUNK):
+            chunk = np.asarray(rewards[offset:offset + self.FIT_CHUNK], dtype=np.float64)
+            chunk_sum = chunk.sum()
+            sum_rewards += chunk_sum
+            # Sum of chunk * (episode - mean_episode), with the episodes of the chunk as offset + ramp
+            covariance += chunk @ ramp[:len(chunk)] + (offset - mean_episode) * chunk_sum
+        slope = covariance / (count * (count * count - 1) / 12)
+        intercept = sum_rewards / count - slope * (mean_episode + first_episode)
+        return slope, intercept
+
+    def downsample(self, rewards, first_episode=0):
+        """
+        Reduce a reward curve to at most MAX_PLOT_POINTS points: the average reward of each bin of
+        consecutive episodes, placed at the bin's middle episode.
+
+        :return: The episode numbers and rewards to plot.
+        """
+        count = len(rewards)
+        if count <= self.MAX_PLOT_POINTS:
+            return np.arange(first_episode, first_episode + count), np.asarray(rewards)
+        bin_size = -(-count // self.MAX_PLOT_POINTS)
+        full_bins = count // bin_size
+        means = np.asarray(rewards[:full_bins * bin_size]).reshape(full_bins, bin_size).mean(axis=1)
+        if full_bins * bin_size < count:
+            means = np.append(means, np.asarray(rewards[full_bins * bin_size:]).mean())
+        episodes = first_episode + np.minimum(np.arange(len(means)) * bin_size + (bin_size - 1) / 2, count - 1)
+        return episodes, means
 
-    def plot_rewards(self, rewards, slope, intercept, label, ax):
-        episodes = np.arange(1, len(rewards) + 1) # Start from 1 instead of 0 for more accurate visualization
-        ax.plot(rewards, label=f'{label} Rewards per Episode')
-        ax.plot(episodes, slope * episodes + intercept, label=f'{label} Fit Line (slope={slope:.2f})', linestyle='--')
+    def plot_rewards(self, rewards, slope, intercept, label, ax, first_episode=0):
+        episodes, plotted_rewards = self.downsample(rewards, first_episode)
+        ax.plot(episodes, plotted_rewards, label=f'{label} Rewards per Episode')
+        fit_episodes = np.array([first_episode + 1, first_episode + len(rewards)]) # Start from 1 instead of 0 for more accurate visualization
+        ax.plot(fit_episodes, slope * fit_episodes + intercept, label=f'{label} Fit Line (slope={slope:.2f})', linestyle='--')
 
     def plot_multiple_rewards(self, ax):
         for filename in self.filenames:
             rewards = self.read_rewards(filename)
-            slope, intercept = self.calculate_slope(rewards)
+            first_episode = self.first_episode(len(rewards))
+            rewards = rewards[self.start:self.stop]
+            slope, intercept = self.calculate_slope(rewards, first_episode)
             label = filename.split('\\')[-2]  # Use folder name as label
-            self.plot_rewards(rewards, slope, intercept, label, ax)
+            self.plot_rewards(rewards, slope, intercept, label, ax, first_episode)
         ax.set_xlabel('Episode')
         ax.set_ylabel('Cumulative Reward')
         ax.set_title('Rewards over Episodes')
@@ -43,8 +104,10 @@ class RewardGrapher:
         fig, ax = plt.subplots(figsize=(10, 5))
         if len(self.filenames) == 1:
             rewards = self.read_rewards(self.filenames[0])
-            slope, intercept = self.calculate_slope(rewards)
-            self.plot_rewards(rewards, slope, intercept, 'Single', ax)
+            first_episode = self.first_episode(len(rewards))
+            rewards = rewards[self.start:self.stop]
+            slope, intercept = self.calculate_slope(rewards, first_episode)
+            self.plot_rewards(rewards, slope, intercept, 'Single', ax, first_episode)
             ax.set_xlabel('Episode')
             ax.set_ylabel('Cumulative Reward')
             ax.set_title(f'Rewards over Episodes\nSlope: {slope:.2f}')
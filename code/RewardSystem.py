@@ -1,5 +1,7 @@
 
-from typing import Any, Dict, Tuple
+import ast
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple, Union
 from BotTools import BotTools
 
 from typing import Dict
@@ -37,6 +39,18 @@ class RewardConfig:
                 if key in self.reward_modifiers:
                     self.reward_modifiers[key] = str(value)
 class RewardSystem:
+    # Reward modifier keys in the order get_reward computes their conditions
+    CONDITION_KEYS = ('goal_reached', 'hit_wall', 'revisit_optimal_path', 'revisit_non_optimal_path',
+                      'move_in_optimal_path', 'see_goal_new_location', 'see_goal_revisit', 'per_move_penalty')
+    # Syntax allowed in reward modifier expressions: arithmetic on numbers and the names in EXPRESSION_NAMES
+    ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+                     ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd)
+    EXPRESSION_NAMES = ('optimal_length',)
+    ACTION_INDEX = {offset: action for action, offset in enumerate(BotTools.ACTION_OFFSETS)}  # Move -> action
+    # Modifiers that only apply when the new position was not visited before / was visited before
+    NEW_VISIT_KEYS = ('see_goal_new_location',)
+    REVISIT_KEYS = ('revisit_optimal_path', 'revisit_non_optimal_path', 'see_goal_revisit')
+
     def __init__(self, maze, reward_config):
         self.maze = maze
         self.reward_config = reward_config
@@ -44,6 +58,13 @@ class RewardSystem:
         self.times_hit_wall = 0
         self.times_revisited_square = 0
         self.non_repeating_steps_taken = 0
+        self.bot_tools = BotTools(maze)
+        # Reward terms and tables compiled for the modifiers and maze lookup tables they were built from
+        self._compiled_modifiers = None
+        self._compiled_maze: Tuple = ()
+        self._terms: List[Tuple[int, float]] = []
+        self.reward_if_new: Optional[np.ndarray] = None
+        self.reward_if_revisit: Optional[np.ndarray] = None
     
     def evaluate_expression(self, expression: str, **kwargs: Any) -> int:
         """
@@ -59,47 +80,170 @@ class RewardSystem:
             print(f"Error evaluating expression '{expression}': {e}")
             return 0
 
-    def get_reward(self, new_position: Tuple[int, int], optimal_path: list, optimal_length: int, visited_positions: Dict[Tuple[int, int], int]) -> int:
+    @classmethod
+    def compile_expression(cls, expression: str):
+        """
+        Compile a reward modifier expression, allowing only arithmetic on numbers and EXPRESSION_NAMES.
+
+        :param expression: The expression, e.g. "-100" or "2 * optimal_length".
+        :return: A code object to evaluate with the names as locals.
+        :raises ValueError: If the expression is not valid or uses anything else.
+        """
+        try:
+            tree = ast.parse(str(expression).strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"invalid syntax: {e.msg}")
+        for node in ast.walk(tree):
+            if not isinstance(node, cls.ALLOWED_NODES):
+                raise ValueError(f"{type(node).__name__} is not allowed")
+            if isinstance(node, ast.Name) and node.id not in cls.EXPRESSION_NAMES:
+                raise ValueError(f"unknown name '{node.id}'")
+            if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+                raise ValueError(f"{node.value!r} is not a number")
+        return compile(tree, '<reward modifier>', 'eval')
+
+    def modifier_weights(self) -> Dict[str, float]:
+        """
+        Get the reward of every modifier for the current maze: its value scaled by the optimal path
+        length, as get_reward adds it. Integer modifiers are used as they are; other values are
+        evaluated as whitelisted expressions (see compile_expression), and invalid ones count as 0.
+        """
+        optimal_length = self.maze.optimal_path_length
+        weights = {}
+        for key, expr in self.reward_config.reward_modifiers.items():
+            try:
+                value = int(expr)
+            except (TypeError, ValueError):
+                try:
+                    value = eval(self.compile_expression(expr), {'__builtins__': {}}, {'optimal_length': optimal_length})
+                except Exception as e:
+                    print(f"Error evaluating expression '{expr}': {e}")
+                    value = 0
+            weights[key] = value * optimal_length / 100
+        return weights
+
+    def _maze_state(self) -> Tuple:
+        # Every maze change replaces at least one of these, see Maze.update_lookup_tables
+        maze = self.maze
+        return maze.distance_map, maze.optimal_path_mask, maze.goal_directions, maze.optimal_path_length
+
+    def _is_compiled(self) -> bool:
+        maze, compiled_maze = self.maze, self._compiled_maze
+        return (bool(compiled_maze) and compiled_maze[0] is maze.distance_map and compiled_maze[1] is maze.optimal_path_mask
+                and compiled_maze[2] is maze.goal_directions and compiled_maze[3] == maze.optimal_path_length
+                and self._compiled_modifiers == self.reward_config.reward_modifiers)
+
+    def _compile(self) -> None:
+        """
+        Fuse the modifiers into (condition index, reward) terms in modifier order, and precompute the
+        reward tables of the current maze.
+        """
+        weights = self.modifier_weights()
+        self._terms = [(self.CONDITION_KEYS.index(key), weight) for key, weight in weights.items() if key in self.CONDITION_KEYS]
+        self.reward_if_new, self.reward_if_revisit = self._build_reward_tables(weights)
+        self._compiled_modifiers = dict(self.reward_config.reward_modifiers)
+        self._compiled_maze = self._maze_state()
+
+    def _build_reward_tables(self, weights: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate every modifier condition for every (position, action) pair of the maze at once.
+        The rewards are added in modifier order, like get_reward's terms, so a table entry is
+        exactly the reward get_reward would add up for that move.
+        """
+        maze = self.maze
+        rows, cols = np.indices((maze.height, maze.width))
+        offsets = np.array(BotTools.ACTION_OFFSETS)
+        next_rows = rows[..., None] + offsets[:, 0]
+        next_cols = cols[..., None] + offsets[:, 1]
+        in_bounds = (next_rows >= 0) & (next_rows < maze.height) & (next_cols >= 0) & (next_cols < maze.width)
+        clipped_rows = np.clip(next_rows, 0, maze.height - 1)
+        clipped_cols = np.clip(next_cols, 0, maze.width - 1)
+
+        distances = maze.distance_map
+        next_distances = np.where(in_bounds, distances[clipped_rows, clipped_cols], -1)
+        on_optimal_path = (next_distances >= 0) & (next_distances == distances[..., None] - 1)
+        goal_in_sight = in_bounds & maze.goal_directions[clipped_rows, clipped_cols].any(axis=-1)
+        for x, y, action in np.argwhere(~in_bounds).tolist():
+            # Rays from just outside the maze can still reach into it
+            goal_in_sight[x, y, action] = self.bot_tools.check_goal_in_sight((next_rows[x, y, action].item(), next_cols[x, y, action].item()))
+        conditions = {
+            'goal_reached': (next_rows == maze.end[0]) & (next_cols == maze.end[1]),
+            'hit_wall': ~(in_bounds & (maze.grid[clipped_rows, clipped_cols] == 0)),
+            'revisit_optimal_path': on_optimal_path,
+            'revisit_non_optimal_path': ~on_optimal_path,
+            'move_in_optimal_path': on_optimal_path,
+            'see_goal_new_location': goal_in_sight,
+            'see_goal_revisit': goal_in_sight,
+            'per_move_penalty': np.ones(in_bounds.shape, dtype=bool),
+        }
+
+        reward_if_new = np.zeros(in_bounds.shape, dtype=np.float64)
+        reward_if_revisit = np.zeros(in_bounds.shape, dtype=np.float64)
+        for key, weight in weights.items():
+            if key not in conditions:
+                continue
+            if key not in self.REVISIT_KEYS:
+                reward_if_new += conditions[key] * weight
+            if key not in self.NEW_VISIT_KEYS:
+                reward_if_revisit += conditions[key] * weight
+        return reward_if_new, reward_if_revisit
+
+    def reward_tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rewards of every move in the current maze as two (height, width, 4) tables indexed by
+        position and action: one for moves to a position not visited before, one for revisits.
+        They are rebuilt when the maze or the reward modifiers change.
+        """
+        if not self._is_compiled():
+            self._compile()
+        return self.reward_if_new, self.reward_if_revisit
+
+    def get_reward(self, position: Tuple[int, int], new_position: Tuple[int, int],
+                   visited_positions: Union[Dict[Tuple[int, int], int], np.ndarray]) -> float:
         """
         Calculate the reward for moving to a new position.
+
+        Everything except whether the new position was visited before only depends on the maze, so
+        a move is a lookup in the reward tables; only moves that are not a single step are scored
+        term by term.
         
+        :param position: The current position of the bot.
         :param new_position: The new position of the bot.
-        :param optimal_path: The optimal path to the goal.
-        :param optimal_length: The length of the optimal path.
-        :param visited_positions: The dictionary of visited positions.
+        :param visited_positions: The dictionary of visited positions, or a dense (height, width)
+                                  array of visit counts (see BotStatistics.visit_counts).
         :return: The calculated reward.
         """
-        reward = 0
+        if not self._is_compiled():
+            self._compile()
 
-        context = {
-            'optimal_length': optimal_length,
-            'visited_positions': visited_positions,
-            'optimal_path': optimal_path,
-            'new_position': new_position
-        }
+        if isinstance(visited_positions, np.ndarray):
+            x, y = new_position
+            height, width = visited_positions.shape
+            revisit = 0 <= x < height and 0 <= y < width and visited_positions.item(x, y) > 0
+        else:
+            revisit = new_position in visited_positions
+        action = self.ACTION_INDEX.get((new_position[0] - position[0], new_position[1] - position[1]))
+        if action is not None:
+            table = self.reward_if_revisit if revisit else self.reward_if_new
+            return table.item(position[0], position[1], action)
 
-        bot_tools = BotTools(self.maze)
-        optimal_length = bot_tools.get_optimal_path_info(self.maze.start, self.maze.end, 'length')
-        for key, expr in self.reward_config.reward_modifiers.items():
-            multiplied_expr = str(int(expr) * optimal_length/100)
-
-            if key == 'goal_reached' and new_position == self.maze.end:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'hit_wall' and not self.maze.is_valid_position(None, *new_position):
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'revisit_optimal_path' and new_position in visited_positions and new_position in optimal_path:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'revisit_non_optimal_path' and new_position in visited_positions and new_position not in optimal_path:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'move_in_optimal_path' and new_position in optimal_path:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'see_goal_new_location' and bot_tools.check_goal_in_sight(new_position) and new_position not in visited_positions:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'see_goal_revisit' and bot_tools.check_goal_in_sight(new_position) and new_position in visited_positions:
-                reward += self.evaluate_expression(multiplied_expr, **context)
-            elif key == 'per_move_penalty':
-                reward += self.evaluate_expression(multiplied_expr, **context)
-        
+        on_optimal_path = self.bot_tools.is_on_optimal_path(position, new_position)
+        goal_in_sight = self.bot_tools.check_goal_in_sight(new_position)
+        conditions = (
+            new_position == self.maze.end,
+            not self.maze.is_valid_position(*new_position),
+            revisit and on_optimal_path,
+            revisit and not on_optimal_path,
+            on_optimal_path,
+            goal_in_sight and not revisit,
+            goal_in_sight and revisit,
+            True,
+        )
+
+        reward = 0
+        for condition, weight in self._terms:
+            if conditions[condition]:
+                reward += weight
         return reward
 
     def update_rewards(self, reward: int) -> None:
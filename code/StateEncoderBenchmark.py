@@ -0,0 +1,68 @@
+# Measures Q-table growth and training speed for every visited-positions state encoder.
+# Used for comparing encoders; not part of the main program.
+#
+# Usage: python StateEncoderBenchmark.py [episodes] [maze size]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from GameEnvironment import GameEnvironment
+from QLearningBot import QLearningConfig
+from RewardSystem import RewardConfig
+from StateEncoders import state_encoders
+
+
+def key_bytes(key, seen):
+    """Approximate memory held by a state key, counting objects shared between keys only once."""
+    if id(key) in seen:
+        return 0
+    seen.add(id(key))
+    size = sys.getsizeof(key)
+    if isinstance(key, tuple):
+        size += sum(key_bytes(item, seen) for item in key)
+    return size
+
+
+def benchmark_encoder(encoder_name, episodes, size, seed=0):
+    """
+    Train a fresh profile with one encoder and report how large its Q-table grew.
+    Every encoder sees the same mazes and the same random action sequence.
+
+    :return: A dict with the number of states, the table size in bytes, total steps and steps per second.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            env = GameEnvironment(size, size)
+            env.setup_new_profile('benchmark', 'QLearningBot', QLearningConfig(state_encoder=encoder_name), RewardConfig())
+            started = time.perf_counter()
+            env.game_loop(episodes, 0)
+            elapsed = time.perf_counter() - started
+            profile_data = env.bots[0].statistics.get_profile_counters('benchmark')
+        finally:
+            os.chdir(cwd)
+
+    q_table = env.bots[0].q_learning.q_table
+    seen = set()
+    table_bytes = q_table.q_values[:len(q_table)].nbytes + sum(key_bytes(key, seen) for key in q_table.keys())
+    steps = profile_data.get('total_steps', 0) + profile_data.get('times_hit_wall', 0)
+    return {'states': len(q_table), 'bytes': table_bytes, 'steps': steps, 'steps_per_second': steps / elapsed}
+
+
+def main(episodes=20, size=10):
+    print(f"{'encoder':>14} {'states':>10} {'table size':>14} {'steps':>10} {'steps/sec':>12}")
+    for name in state_encoders:
+        result = benchmark_encoder(name, episodes, size)
+        print(f"{name:>14} {result['states']:>10} {result['bytes'] / 1024:>11.1f} KB {result['steps']:>10} {result['steps_per_second']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
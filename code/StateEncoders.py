@@ -0,0 +1,123 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple
+
+
+class StateEncoder(ABC):
+    """
+    Encodes the visited positions of an episode into the part of the Q-learning state key that
+    describes visitation. Encoders other than FullVisitedEncoder produce a fixed-width value, so key
+    size and hashing cost no longer grow with the episode length.
+    """
+
+    @abstractmethod
+    def encode_visited(self, position: Tuple[int, int], visited: Dict[Tuple[int, int], int]) -> Any:
+        """
+        Encode the visited positions.
+
+        :param position: The current position of the bot.
+        :param visited: The visited positions and their visit counts, in first-visit order: a dict or
+                        a BotStatistics.visited_positions view.
+        :return: A hashable value stored in the state key.
+        """
+        pass
+
+
+class FullVisitedEncoder(StateEncoder):
+    """Every visited position in first-visit order; the original state key."""
+
+    def encode_visited(self, position, visited):
+        return tuple(visited)
+
+
+class ZobristVisitedEncoder(StateEncoder):
+    """
+    64-bit Zobrist hash of the set of visited positions.
+
+    The hash is updated incrementally: positions are only ever added to the visited dict during an
+    episode, so the new ones are the last entries in its insertion order. A BotStatistics view
+    hands them out directly with added_since.
+    """
+
+    MASK = (1 << 64) - 1
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._position_keys: Dict[Tuple[int, int], int] = {}
+        self._visited_id = None
+        self._visited_count = 0
+        self._hash = 0
+
+    def _position_key(self, position):
+        """Get the random 64-bit key of a position (splitmix64 of its coordinates, so it is stable across runs)."""
+        key = self._position_keys.get(position)
+        if key is None:
+            z = (((position[0] & 0xFFFFFFFF) << 32 | (position[1] & 0xFFFFFFFF)) + self.seed + 0x9E3779B97F4A7C15) & self.MASK
+            z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & self.MASK
+            z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & self.MASK
+            key = z ^ (z >> 31)
+            self._position_keys[position] = key
+        return key
+
+    def encode_visited(self, position, visited):
+        if id(visited) != self._visited_id or len(visited) < self._visited_count:
+            # A different or reset dict: start over
+            self._visited_id = id(visited)
+            self._visited_count = 0
+            self._hash = 0
+
+        new_positions = len(visited) - self._visited_count
+        if new_positions and hasattr(visited, 'added_since'):
+            for visited_position in visited.added_since(self._visited_count):
+                self._hash ^= self._position_key(visited_position)
+            self._visited_count = len(visited)
+        elif new_positions:
+            for added, visited_position in enumerate(reversed(visited)):
+                if added == new_positions:
+                    break
+                self._hash ^= self._position_key(visited_position)
+            self._visited_count = len(visited)
+        return self._hash
+
+
+class NeighborhoodVisitedEncoder(StateEncoder):
+    """5-bit mask of whether the current cell and its Up, Down, Left and Right neighbors were visited."""
+
+    OFFSETS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+    def encode_visited(self, position, visited):
+        mask = 0
+        for bit, (dx, dy) in enumerate(self.OFFSETS):
+            if (position[0] + dx, position[1] + dy) in visited:
+                mask |= 1 << bit
+        return mask
+
+
+class VisitCountBucketEncoder(StateEncoder):
+    """Bucketed visit count of the current cell: the index of the first bucket edge the count is below."""
+
+    def __init__(self, bucket_edges: Tuple[int, ...] = (1, 2, 4, 8)):
+        self.bucket_edges = bucket_edges
+
+    def encode_visited(self, position, visited):
+        count = visited.get(position, 0)
+        for bucket, edge in enumerate(self.bucket_edges):
+            if count < edge:
+                return bucket
+        return len(self.bucket_edges)
+
+
+class NoVisitedEncoder(StateEncoder):
+    """Drop visitation from the state entirely."""
+
+    def encode_visited(self, position, visited):
+        return None
+
+
+# Encoders selectable by name through QLearningConfig.state_encoder
+state_encoders = {
+    'full': FullVisitedEncoder,
+    'zobrist': ZobristVisitedEncoder,
+    'neighborhood': NeighborhoodVisitedEncoder,
+    'visit_count': VisitCountBucketEncoder,
+    'none': NoVisitedEncoder,
+}
@@ -0,0 +1,250 @@
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class TieredQTable:
+    """
+    Out-of-core Q-table: a bounded in-memory LRU cache of hot states on top of a sqlite3 store.
+
+    It has the same row id interface as QTable, so QLearning.choose_action and update_q_value work
+    unchanged: row_id returns a slot of the cache matrices, loading the state from the store (or
+    adding it with zero Q-values) and evicting the least recently used state when the cache is full.
+    Caching is write-back: an evicted row is written to the store only if it changed since it was
+    loaded, and flush writes all changed rows and commits.
+
+    Row ids are only valid until the next capacity - 1 lookups, so nothing may hold them for
+    longer; experience replay, compaction and parallel merging therefore need the in-memory QTable.
+
+    The cache and the store are guarded by a lock, so another thread (e.g. the GUI listing the top
+    states) can read the table while training runs.
+    """
+
+    FORMAT = 'dense-v1'
+
+    def __init__(self, database_path: str, capacity: int = 100000, num_actions: int = 4, dtype: Any = np.float64):
+        """
+        Open (or create) a tiered Q-table.
+
+        :param database_path: Path to the sqlite3 database file.
+        :param capacity: Number of states kept in memory.
+        :param num_actions: Number of actions (columns) per state.
+        :param dtype: Value type of the in-memory matrix.
+        """
+        self.database_path = database_path
+        self.capacity = max(2, capacity)
+        self.num_actions = num_actions
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS q_table (key BLOB PRIMARY KEY, q_values BLOB NOT NULL, visits BLOB NOT NULL, best REAL NOT NULL)")
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.size = self.connection.execute("SELECT COUNT(*) FROM q_table").fetchone()[0]
+
+        self.cache: "OrderedDict[Any, int]" = OrderedDict()  # Key -> slot, least recently used first
+        self.slot_keys: List[Any] = [None] * self.capacity
+        self.q_values = np.zeros((self.capacity, num_actions), dtype=dtype)
+        self.visits = np.zeros((self.capacity, num_actions), dtype=np.int64)
+        self.last_touched = np.zeros(self.capacity, dtype=np.int64)
+        # Row contents as loaded, to tell which rows need writing back
+        self._clean_values = np.zeros_like(self.q_values)
+        self._clean_visits = np.zeros_like(self.visits)
+        self.episode = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+
+    @staticmethod
+    def _canonical(key: Any) -> Any:
+        """Convert NumPy scalars in a key to Python values, so equal keys always pickle the same."""
+        if isinstance(key, tuple):
+            return tuple(TieredQTable._canonical(item) for item in key)
+        if isinstance(key, np.generic):
+            return key.item()
+        return key
+
+    @staticmethod
+    def _key_bytes(key: Any) -> bytes:
+        return pickle.dumps(TieredQTable._canonical(key), protocol=4)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self.cache or self._fetch(key) is not None
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Get the Q-values of a state as a writable row view of its cache slot."""
+        state_id = self.get_id(key)
+        if state_id is None:
+            raise KeyError(key)
+        return self.q_values[state_id]
+
+    def __setitem__(self, key: Any, values) -> None:
+        self.q_values[self.row_id(key)] = values
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Get the cache counters."""
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'evictions': self.evictions, 'writebacks': self.writebacks, 'cached_states': len(self.cache)}
+
+    def _fetch(self, key: Any) -> Optional[Tuple[bytes, bytes]]:
+        return self.connection.execute("SELECT q_values, visits FROM q_table WHERE key = ?", (self._key_bytes(key),)).fetchone()
+
+    def get_id(self, key: Any) -> Optional[int]:
+        """Get the cache slot of a state, loading it from the store; None if the state is not in the table."""
+        with self._lock:
+            if key in self.cache or self._fetch(key) is not None:
+                return self.row_id(key)
+            return None
+
+    def row_id(self, key: Any) -> int:
+        """Get the cache slot of a state, loading it from the store or adding it with zero Q-values."""
+        with self._lock:
+            return self._row_id(key)
+
+    def _row_id(self, key: Any) -> int:
+        slot = self.cache.get(key)
+        if slot is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            if len(self.cache) < self.capacity:
+                slot = len(self.cache)
+            else:
+                evicted_key, slot = self.cache.popitem(last=False)
+                self._write_back(slot, evicted_key)
+                self.evictions += 1
+            row = self._fetch(key)
+            if row is None:
+                self.q_values[slot] = 0
+                self.visits[slot] = 0
+                self.size += 1
+                self._clean_values[slot] = np.nan  # Never stored, so always written back
+            else:
+                self.q_values[slot] = np.frombuffer(row[0], dtype=np.float64)
+                self.visits[slot] = np.frombuffer(row[1], dtype=np.int64)
+                self._clean_values[slot] = self.q_values[slot]
+            self._clean_visits[slot] = self.visits[slot]
+            self.cache[key] = slot
+            self.slot_keys[slot] = key
+        self.last_touched[slot] = self.episode
+        return slot
+
+    def _write_back(self, slot: int, key: Any) -> None:
+        """Write a cached row to the store if it changed since it was loaded."""
+        values, visits = self.q_values[slot], self.visits[slot]
+        if np.array_equal(values, self._clean_values[slot]) and np.array_equal(visits, self._clean_visits[slot]):
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO q_table (key, q_values, visits, best) VALUES (?, ?, ?, ?)",
+            (self._key_bytes(key), values.astype(np.float64).tobytes(), visits.tobytes(), float(values.max()))
+        )
+        self._clean_values[slot] = values
+        self._clean_visits[slot] = visits
+        self.writebacks += 1
+
+    def record_visits(self, state_ids, actions) -> None:
+        """Count one Q-update for each (slot, action) pair; ids and actions may be scalars or arrays."""
+        np.add.at(self.visits, (state_ids, actions), 1)
+
+    def flush(self) -> None:
+        """Write every changed cached row to the store and commit, e.g. at a checkpoint."""
+        with self._lock:
+            for key, slot in self.cache.items():
+                self._write_back(slot, key)
+            self.connection.commit()
+
+    def close(self) -> None:
+        """Flush and close the store."""
+        with self._lock:
+            self.flush()
+            self.connection.close()
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Bulk-load a snapshot (as returned by QTable.to_state) into the store, e.g. to migrate an existing profile."""
+        values = np.asarray(state['values'], dtype=np.float64)
+        visits = np.asarray(state.get('visits', np.zeros(values.shape)), dtype=np.int64)
+        with self._lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO q_table (key, q_values, visits, best) VALUES (?, ?, ?, ?)",
+                ((self._key_bytes(key), values[i].tobytes(), visits[i].tobytes(), float(values[i].max())) for i, key in enumerate(state['keys']))
+            )
+            self.connection.commit()
+            self.size = self.connection.execute("SELECT COUNT(*) FROM q_table").fetchone()[0]
+
+    def items(self) -> Iterator[Tuple[Any, np.ndarray]]:
+        """Iterate over (state key, Q-values) pairs of the whole table, reading from the store in batches."""
+        with self._lock:
+            self.flush()
+            cursor = self.connection.execute("SELECT key, q_values FROM q_table")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for key, values in rows:
+                yield pickle.loads(key), np.frombuffer(values, dtype=np.float64)
+
+    def keys(self) -> Iterator[Any]:
+        return (key for key, _ in self.items())
+
+    def top_states(self, n: int = 10) -> List[Tuple[float, Tuple[Any, np.ndarray]]]:
+        """
+        Get the n states with the highest maximum Q-value, selected by the store.
+
+        :return: A list of (max Q-value, (state key, Q-value row)) sorted from highest to lowest.
+        """
+        with self._lock:
+            self.flush()
+            rows = self.connection.execute("SELECT key, q_values, best FROM q_table ORDER BY best DESC LIMIT ?", (n,)).fetchall()
+        return [(best, (pickle.loads(key), np.frombuffer(values, dtype=np.float64))) for key, values, best in rows]
+
+    def memory_bytes(self, sample_size: int = 64) -> int:
+        """Memory held by the cache matrices; the cache size bounds it, whatever the table size."""
+        return self.q_values.nbytes + self.visits.nbytes + self.last_touched.nbytes + self._clean_values.nbytes + self._clean_visits.nbytes
+
+    def compact(self, memory_budget: int, min_idle_episodes: int = 10, value_tolerance: float = 1e-9) -> Tuple[int, Optional[np.ndarray]]:
+        """Nothing to compact: memory is bounded by the cache capacity."""
+        return 0, None
+
+    def detach(self) -> None:
+        pass
+
+    def to_state(self) -> Dict[str, Any]:
+        """Export the whole table in the in-memory QTable snapshot format."""
+        with self._lock:
+            self.flush()
+            rows = self.connection.execute("SELECT key, q_values, visits FROM q_table").fetchall()
+        keys, values, visits = [], [], []
+        for key, q_values, state_visits in rows:
+            keys.append(pickle.loads(key))
+            values.append(np.frombuffer(q_values, dtype=np.float64))
+            visits.append(np.frombuffer(state_visits, dtype=np.int64))
+        shape = (0, self.num_actions)
+        return {'format': self.FORMAT, 'keys': keys,
+                'values': np.array(values) if values else np.zeros(shape),
+                'visits': np.array(visits) if visits else np.zeros(shape, dtype=np.int64)}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the location and shape of the table only; the rows stay in the store, flushed first."""
+        self.flush()
+        return {'database_path': self.database_path, 'capacity': self.capacity,
+                'num_actions': self.num_actions, 'dtype': self.q_values.dtype.str}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Reopen the store of a pickled table, with an empty cache."""
+        self.__init__(state['database_path'], state['capacity'], state['num_actions'], np.dtype(state['dtype']))
@@ -0,0 +1,150 @@
+import time
+from collections import deque
+
+import numpy as np
+from typing import Dict, Tuple
+
+from BaseBot import BaseBot
+from BotTools import BotTools
+
+
+class ValueIterationConfig:
+    def __init__(self, discount_factor: float = 0.9, tolerance: float = 1e-6, max_sweeps: int = 10000):
+        self.discount_factor = discount_factor
+        self.tolerance = tolerance  # Stop sweeping once no state value changes by more than this
+        self.max_sweeps = max_sweeps  # Upper bound on Bellman sweeps per maze
+
+
+class ValueIterationBot(BaseBot):
+    # Number of most recent episodes kept in solve_history, and saved with the profile
+    SOLVE_HISTORY_LENGTH = 1000
+    ACTION_OFFSETS = np.array(BotTools.ACTION_OFFSETS, dtype=np.int64)
+
+    def __init__(self, maze, config, reward_system, statistics, profile_name):
+        """
+        Initialize a bot that solves each maze exactly with value iteration and follows the optimal policy.
+
+        The maze is treated as a deterministic MDP over positions: a move into a wall or off the maze
+        leaves the bot in place, and the goal is terminal. The reward of every (position, action)
+        pair is the reward system's reward for a move to a position not visited before, since a
+        position-only policy cannot depend on the visit history. The state values are then found
+        with Bellman sweeps over the whole grid at once. The bot is a ground truth to benchmark
+        learned policies against; its episodes are scored by the reward system like any other bot's.
+
+        :param maze: The maze object.
+        :param config: Value iteration configuration.
+        :param reward_system: Reward system for evaluating actions.
+        :param statistics: Instance of BotStatistics for tracking statistics.
+        :param profile_name: Name of the profile for saving/loading data.
+        """
+        super().__init__(maze, statistics, config)
+        self.tools = BotTools(maze)
+        self.reward_system = reward_system
+        self.profile_name = profile_name
+        self.gamma = float(getattr(config, 'discount_factor', 0.9))
+        self.tolerance = float(getattr(config, 'tolerance', 1e-6))
+        self.max_sweeps = int(getattr(config, 'max_sweeps', 10000))
+        self.total_reward = 0
+        self.position = maze.get_start()
+        self.values = None
+        self.policy = None
+        self.solve_history: deque = deque(maxlen=self.SOLVE_HISTORY_LENGTH)  # Solve time and sweeps of the recent episodes
+
+    def get_bot_specific_data(self):
+        """Retrieve bot-specific data."""
+        return {'solve_history': list(self.solve_history)}
+
+    def initialize_specific_data(self, data):
+        """Initialize bot-specific data."""
+        self.solve_history = deque(data.get('solve_history', []), maxlen=self.SOLVE_HISTORY_LENGTH)
+
+    def calculate_state(self):
+        """The state of an MDP over positions is the position."""
+        return self.position
+
+    def reward_table(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the (height, width, 4) table of rewards for taking each action in each position, as the
+        reward system scores a move to a position not visited before.
+
+        :return: The reward table and the (height, width, 4) row and column indices of the next positions.
+        """
+        maze = self.maze
+        rewards, _ = self.reward_system.reward_tables()
+        rows, cols = np.indices((maze.height, maze.width))
+        next_rows = rows[..., None] + self.ACTION_OFFSETS[:, 0]
+        next_cols = cols[..., None] + self.ACTION_OFFSETS[:, 1]
+        in_bounds = (next_rows >= 0) & (next_rows < maze.height) & (next_cols >= 0) & (next_cols < maze.width)
+        valid = in_bounds & (maze.grid[np.clip(next_rows, 0, maze.height - 1), np.clip(next_cols, 0, maze.width - 1)] == 0)
+
+        # Moves that are not possible leave the bot where it is
+        next_rows = np.where(valid, next_rows, rows[..., None])
+        next_cols = np.where(valid, next_cols, cols[..., None])
+        return rewards, next_rows, next_cols
+
+    def solve(self) -> Dict[str, float]:
+        """
+        Run Bellman sweeps over the current maze until the values converge, and derive the greedy policy.
+
+        :return: The solve time in seconds and the number of sweeps.
+        """
+        start_time = time.perf_counter()
+        rewards, next_rows, next_cols = self.reward_table()
+        is_goal = (next_rows == self.maze.end[0]) & (next_cols == self.maze.end[1])
+        open_cells = self.maze.grid == 0
+        open_cells[self.maze.end] = False  # The goal is terminal and keeps a value of 0
+
+        values = np.zeros(self.maze.grid.shape, dtype=np.float64)
+        sweeps = 0
+        while sweeps < self.max_sweeps:
+            q_values = rewards + self.gamma * np.where(is_goal, 0.0, values[next_rows, next_cols])
+            new_values = np.where(open_cells, q_values.max(axis=-1), 0.0)
+            sweeps += 1
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta <= self.tolerance:
+                break
+
+        self.values = values
+        self.policy = (rewards + self.gamma * np.where(is_goal, 0.0, values[next_rows, next_cols])).argmax(axis=-1)
+        solve_stats = {'solve_time': time.perf_counter() - start_time, 'sweeps': sweeps}
+        self.solve_history.append(solve_stats)
+        return solve_stats
+
+    def run_episode(self):
+        """Solve the maze, then walk it with the optimal policy, scoring each move with the reward system."""
+        started = time.perf_counter()
+        self.solve()  # Sweeps and solve time are kept in solve_history
+
+        step_limit = 4 * self.maze.width * self.maze.height
+        visit_counts = self.statistics.track_visits(self.maze.grid.shape)
+        while self.position != self.maze.end and self.statistics.total_steps < step_limit:
+            action = int(self.policy[self.position])
+            new_position = self.tools.calculate_next_position(self.position, action)
+            reward = self.reward_system.get_reward(self.position, new_position, visit_counts)
+            self.total_reward += reward
+            self.statistics.total_steps += 1
+
+            if not self.maze.is_valid_position(new_position[0], new_position[1]):
+                self.statistics.record_wall_hit(self.profile_name)
+                continue
+
+            self.statistics.update_last_visited(self.position)
+            self.statistics.update_visited_positions(self.position)
+            if new_position in self.statistics.get_visited_positions():
+                self.statistics.times_revisited_squares += 1
+            else:
+                self.statistics.non_repeating_steps_taken += 1
+            self.position = new_position
+
+        heatmap_data = self.statistics.get_visited_positions()
+        self.statistics.save_all_maze_data(self.profile_name, self.maze, heatmap_data, self.total_reward)
+        self.statistics.record_episode(self.profile_name, heatmap_data, self.total_reward, time.perf_counter() - started)
+
+    def reset_bot(self):
+        """Reset the bot's position and statistics for the next maze."""
+        self.position = self.maze.start
+        self.statistics.reset()
+        self.total_reward = 0
+        self.values = None
+        self.policy = None
@@ -0,0 +1,188 @@
+import time
+import numpy as np
+from typing import List
+
+from BotStatistics import BotStatistics
+from BotTools import BotTools
+from Maze import Maze
+from QLearningBot import QLearningBot, QLearningConfig
+from RewardSystem import RewardSystem
+
+
+class VectorizedQLearningConfig(QLearningConfig):
+    def __init__(self, num_envs: int = 8, **kwargs):
+        super().__init__(**kwargs)
+        self.num_envs = num_envs  # Number of mazes stepped in lockstep per episode
+
+
+class VectorizedQLearningBot(QLearningBot):
+    ACTION_OFFSETS = np.array(BotTools.ACTION_OFFSETS, dtype=np.int64)
+
+    def __init__(self, maze, config, reward_system, statistics, profile_name):
+        """
+        Initialize a Q-learning bot that trains on several independent mazes at once.
+
+        The first environment is the shared maze of the GameEnvironment, so visualization and the
+        maze snapshots keep working; the others are headless mazes owned by the bot. Positions,
+        actions, rewards and done flags of all environments are NumPy arrays, and the Q-updates of a
+        step are applied to the shared Q-table in one batch. Profiles created for QLearningBot can
+        train with this bot unchanged; their config falls back to 8 environments. Steps, visits and
+        the step limit are counted as QLearningBot counts them, so both bots log comparable episodes.
+
+        :param maze: The maze object.
+        :param config: Q-learning configuration, optionally with num_envs.
+        :param reward_system: Reward system for evaluating actions.
+        :param statistics: Instance of BotStatistics for tracking statistics.
+        :param profile_name: Name of the profile for saving/loading data.
+        """
+        super().__init__(maze, config, reward_system, statistics, profile_name)
+        self.num_envs = max(1, int(getattr(config, 'num_envs', 8)))
+        if self.q_learning.q_table_backend == 'tiered' and self.q_learning.cache_states < 2 * self.num_envs:
+            # The row ids of a step's states and next states must all stay cached until the batch update
+            raise ValueError("The Q-table cache must hold at least two states per parallel maze")
+        self.base_size = (maze.width, maze.height)  # Size the extra mazes are redrawn from on every reset
+        self.extra_mazes = [Maze(maze.width, maze.height) for _ in range(self.num_envs - 1)]
+        self.extra_statistics = [BotStatistics() for _ in range(self.num_envs - 1)]
+        # One encoder per environment: encoders such as Zobrist keep incremental per-episode state
+        encoder_class = type(self.q_learning.state_encoder)
+        self.state_encoders = [self.q_learning.state_encoder] + [encoder_class() for _ in range(self.num_envs - 1)]
+
+    @property
+    def mazes(self) -> List[Maze]:
+        return [self.maze] + self.extra_mazes
+
+    def _stack_mazes(self, mazes):
+        """
+        Stack the grids and ray tables of all mazes into arrays padded to the largest maze.
+        Padding cells are walls, so moves off a smaller maze are rejected like any wall hit.
+        """
+        height = max(maze.height for maze in mazes)
+        width = max(maze.width for maze in mazes)
+        grids = np.ones((len(mazes), height, width), dtype=np.uint8)
+        wall_distances = np.zeros((len(mazes), height, width, 4), dtype=np.int64)
+        goal_directions = np.zeros((len(mazes), height, width, 4), dtype=np.int64)
+        for env, maze in enumerate(mazes):
+            grids[env, :maze.height, :maze.width] = maze.grid
+            wall_distances[env, :maze.height, :maze.width] = maze.wall_distances
+            goal_directions[env, :maze.height, :maze.width] = maze.goal_directions
+        return grids, wall_distances, goal_directions
+
+    def _state_keys(self, envs, positions, ends, visited, wall_distances, goal_directions):
+        """
+        Build the Q-table keys of the given environments, in the same layout as QLearningBot.calculate_state
+        so both bots share one Q-table.
+        """
+        xs, ys = positions[envs, 0], positions[envs, 1]
+        walls = wall_distances[envs, xs, ys].tolist()
+        goals = goal_directions[envs, xs, ys].tolist()
+        distances = np.hypot(*(positions[envs] - ends[envs]).T)
+        keys = []
+        for i, env in enumerate(envs.tolist()):
+            position = (xs[i].item(), ys[i].item())
+            encoded_visited = self.state_encoders[env].encode_visited(position, visited[env])
+            keys.append((position, tuple(walls[i]), encoded_visited, distances[i], tuple(goals[i])))
+        return keys
+
+    def run_episode(self):
+        """Run one episode in every maze, stepping all unfinished mazes together."""
+        started = time.perf_counter()
+        mazes = self.mazes
+        statistics = [self.statistics] + self.extra_statistics
+        reward_systems = [self.reward_system] + [RewardSystem(maze, self.reward_system.reward_config) for maze in self.extra_mazes]
+        visited = [stats.get_visited_positions() for stats in statistics]
+        visit_counts = [stats.track_visits(maze.grid.shape) for stats, maze in zip(statistics, mazes)]
+        grids, wall_distances, goal_directions = self._stack_mazes(mazes)
+
+        positions = np.array([maze.get_start() for maze in mazes], dtype=np.int64)
+        ends = np.array([maze.end for maze in mazes], dtype=np.int64)
+        step_limits = np.array([1000 * maze.optimal_path_length for maze in mazes], dtype=np.int64)
+        steps = np.zeros(self.num_envs, dtype=np.int64)
+        total_rewards = np.zeros(self.num_envs, dtype=np.float64)
+        done = np.zeros(self.num_envs, dtype=bool)
+
+        q_table = self.q_learning.q_table
+        envs = np.arange(self.num_envs)
+        state_ids = np.array([q_table.row_id(key) for key in self._state_keys(envs, positions, ends, visited, wall_distances, goal_directions)])
+
+        while not done.all():
+            active = np.flatnonzero(~done)
+            ids = state_ids[active]
+
+            # Epsilon-greedy actions for all active environments at once, with the same rate as QLearningBot
+            explore = np.random.rand(len(active)) < self.q_learning.exploration_rate()
+            actions = np.where(explore, np.random.randint(self.q_learning.num_actions, size=len(active)), q_table.q_values[ids].argmax(axis=1))
+
+            new_positions = positions[active] + self.ACTION_OFFSETS[actions]
+            in_bounds = ((new_positions >= 0) & (new_positions < grids.shape[1:3])).all(axis=1)
+            clipped = np.where(in_bounds[:, None], new_positions, 0)
+            valid = in_bounds & (grids[active, clipped[:, 0], clipped[:, 1]] == 0)
+
+            # Like QLearningBot, only moves count towards the step limit, and the move made after the
+            # limit is exceeded ends the episode with a penalty
+            over_limit = valid & (steps[active] > step_limits[active])
+
+            rewards = np.zeros(len(active), dtype=np.float64)
+            for i, env in enumerate(active.tolist()):
+                position = (positions[env, 0].item(), positions[env, 1].item())
+                new_position = (new_positions[i, 0].item(), new_positions[i, 1].item())
+                stats = statistics[env]
+                if valid[i]:
+                    stats.update_last_visited(position)
+                    stats.update_visited_positions(position)
+                    rewards[i] = reward_systems[env].get_reward(position, new_position, visit_counts[env])
+                    if new_position in visited[env]:
+                        stats.times_revisited_squares += 1
+                    else:
+                        stats.non_repeating_steps_taken += 1
+                    stats.total_steps = stats.times_revisited_squares + stats.non_repeating_steps_taken
+                    if not over_limit[i]:
+                        stats.update_visited_positions(position)  # QLearningBot records each move twice; the logged steps match it
+                else:
+                    stats.record_wall_hit(self.profile_name)
+                    rewards[i] = reward_systems[env].get_reward(position, new_position, visit_counts[env])
+
+            # Wall hits leave the bot where it is
+            positions[active[valid]] = new_positions[valid]
+            steps[active[valid]] += 1
+            rewards[over_limit] -= 1000
+            total_rewards[active] += rewards
+            done[active] = over_limit | (positions[active] == ends[active]).all(axis=1)
+
+            new_ids = np.array([q_table.row_id(key) for key in self._state_keys(active, positions, ends, visited, wall_distances, goal_directions)])
+            self.update_q_values(ids, actions, rewards, new_ids)
+            state_ids[active] = new_ids
+
+        self.position = (positions[0, 0].item(), positions[0, 1].item())
+        self.state = self.calculate_state()
+        self.total_reward = total_rewards[0].item()
+
+        duration = time.perf_counter() - started  # The mazes are run together, so each record gets the time of the batch
+        for env, maze in enumerate(mazes):
+            heatmap_data = visited[env]
+            statistics[env].save_all_maze_data(self.profile_name, maze, heatmap_data, total_rewards[env].item())
+            statistics[env].record_episode(self.profile_name, heatmap_data, total_rewards[env].item(), duration)
+        self.q_learning.end_episode()
+
+        self.q_learning.checkpoint(self.profile_name)
+
+    def update_q_values(self, state_ids, actions, rewards, new_state_ids):
+        """
+        Apply the Q-learning update to a batch of transitions.
+        Transitions that share a state-action pair all contribute to it, as with sequential updates
+        starting from the same value.
+        """
+        q_table = self.q_learning.q_table
+        q_values = q_table.q_values  # Fetched after interning, which may have grown the matrix
+        targets = rewards + self.q_learning.gamma * q_values[new_state_ids].max(axis=1)
+        np.add.at(q_values, (state_ids, actions), self.q_learning.lr * (targets - q_values[state_ids, actions]))
+        q_table.record_visits(state_ids, actions)
+        self.q_learning.remember(state_ids, actions, rewards, new_state_ids)
+
+    def reset_bot(self):
+        """Reset the bot and draw new mazes for the extra environments."""
+        for maze, stats in zip(self.extra_mazes, self.extra_statistics):
+            # setup_simple_maze grows the maze it redraws, so start from the base size as MazePool does
+            maze.width, maze.height = self.base_size
+            maze.setup_simple_maze()
+            stats.reset()
+        super().reset_bot()
@@ -10,8 +10,15 @@ class VisualizationStrategy(ABC):
 
 class QLearningBotVisualizationStrategy(VisualizationStrategy):
     def visualize(self, frame, bot, profile_index):
+        self.display_heatmaps(frame, bot)
+        frame.display_qtable(bot, profile_index)
+        frame.display_statistics(bot, profile_index)
+        frame.display_reward_graph(bot)
+
+    @staticmethod
+    def display_heatmaps(frame, bot):
         selected_profile = frame.profile_select.get()
-        maze_data_path = f"profiles/{selected_profile}/mazes.json"
+        maze_data_path = f"profiles/{selected_profile}/mazes.bin"
         
         # Ensure the maze data is loaded correctly
         bot_statistics = BotStatistics()
@@ -29,8 +36,10 @@ class QLearningBotVisualizationStrategy(VisualizationStrategy):
         else:
             print("Missing required keys in maze_data")
 
-        frame.display_qtable(bot, profile_index)
+
+class ValueIterationBotVisualizationStrategy(VisualizationStrategy):
+    def visualize(self, frame, bot, profile_index):
+        # The bot has no Q-table to show; its policy is solved again for every maze
+        QLearningBotVisualizationStrategy.display_heatmaps(frame, bot)
         frame.display_statistics(bot, profile_index)
         frame.display_reward_graph(bot)
-
-
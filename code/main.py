@@ -6,3 +6,4 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = MazeAIApp(root)
     root.mainloop()
+    app.game_env.close()